@@ -2,14 +2,15 @@ from datetime import datetime, timedelta
 import hashlib
 import secrets
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from .config import get_settings
-from .db import SessionLocal
+from .db import SessionLocal, on_primary
 from . import models
+from .services.auth_cache import cached_values, get_auth_cache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -26,6 +27,16 @@ def get_db():
         db.close()
 
 
+# Gesetzt nach schreibenden Requests (main.py): Folge-Reads desselben Clients lesen vom Primary
+PRIMARY_STICKY_COOKIE = "db_primary"
+
+
+def use_replica(request: Request, db: Session = Depends(get_db)) -> None:
+    """Route-Dependency für read-only Endpoints: Lesezugriffe des Requests gehen an das Replica."""
+    if request.method in ("GET", "HEAD") and not request.cookies.get(PRIMARY_STICKY_COOKIE):
+        db.info["replica"] = True
+
+
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
@@ -73,6 +84,22 @@ def revoke_session(db: Session, session: models.Session) -> None:
     session.revoked_at = datetime.utcnow()
     db.add(session)
     db.commit()
+    get_auth_cache().invalidate([session.id])
+
+
+def revoke_user_sessions(db: Session, user_id: str) -> int:
+    """Widerruft alle aktiven Sessions eines Users (z.B. nach Passwort-Reset). Returns: Anzahl."""
+    session_ids = [
+        row.id
+        for row in db.query(models.Session.id).filter(models.Session.user_id == user_id, models.Session.revoked_at.is_(None))
+    ]
+    if session_ids:
+        db.query(models.Session).filter(models.Session.id.in_(session_ids)).update(
+            {models.Session.revoked_at: datetime.utcnow()}, synchronize_session=False
+        )
+    db.commit()
+    get_auth_cache().invalidate(session_ids)
+    return len(session_ids)
 
 
 def validate_refresh(db: Session, refresh_token: str) -> models.Session:
@@ -89,15 +116,35 @@ def get_current_session(token: str = Depends(oauth2_scheme), db: Session = Depen
     session_id = payload.get("sid")
     if not user_id or not session_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
-    session = db.query(models.Session).filter(models.Session.id == session_id, models.Session.user_id == user_id).first()
+    cache = get_auth_cache()
+    cached = cache.get(session_id)
+    if cached is not None:
+        session_values, user_values = cached_values(cached)
+        if session_values["user_id"] != user_id:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session expired or revoked")
+        session = _attach_cached(db, models.Session, session_values)
+        user = _attach_cached(db, models.User, user_values)
+    else:
+        # Vom Primary: ein nachlaufendes Replica würde widerrufene Sessions erneut cachen
+        with on_primary(db):
+            session = db.query(models.Session).filter(models.Session.id == session_id, models.Session.user_id == user_id).first()
+            user = db.query(models.User).filter(models.User.id == user_id).first() if session else None
     if not session or session.revoked_at or session.expires_at < datetime.utcnow():
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session expired or revoked")
-    user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User inactive")
+    if cached is None:
+        cache.set(session, user)
     return session, user
 
 
+def _attach_cached(db: Session, model, values: dict):
+    """Hängt einen Cache-Snapshot ohne SELECT als persistentes Objekt an die DB-Session."""
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return db.merge(obj, load=False)
+
+
 def get_current_user(session_user=Depends(get_current_session)) -> models.User:
     _, user = session_user
     return user
@@ -1,23 +1,31 @@
+from typing import Dict, Iterable
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 from . import models
+from .services.membership_cache import REQUEST_MEMO_KEY, get_membership_cache
 
 
-def assert_org_member(db: Session, user: models.User, organization_id: str, roles: list[str] | None = None) -> models.Membership:
-    membership = (
-        db.query(models.Membership)
-        .filter(models.Membership.organization_id == organization_id, models.Membership.user_id == user.id)
-        .first()
-    )
-    if not membership:
+def org_roles(db: Session, user: models.User) -> Dict[str, str]:
+    """{organization_id: role} des Users; pro DB-Session (= Request) nur einmal ermittelt."""
+    memo = db.info.setdefault(REQUEST_MEMO_KEY, {})
+    if user.id not in memo:
+        memo[user.id] = get_membership_cache().roles_for(db, user.id)
+    return memo[user.id]
+
+
+def assert_org_member(db: Session, user: models.User, organization_id: str, roles: list[str] | None = None) -> str:
+    """Returns: Rolle des Users in der Organisation."""
+    role = org_roles(db, user).get(organization_id)
+    if role is None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of organization")
-    if roles and membership.role not in roles:
+    if roles and role not in roles:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
-    return membership
+    return role
 
 
 def assert_project_member(db: Session, user: models.User, project_id: str, roles: list[str] | None = None) -> models.Project:
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+    # db.get nutzt die Identity-Map: wiederholte Checks im selben Request ohne Query
+    project = db.get(models.Project, project_id)
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     assert_org_member(db, user, project.organization_id, roles)
@@ -25,8 +33,31 @@ def assert_project_member(db: Session, user: models.User, project_id: str, roles
 
 
 def assert_plan_member(db: Session, user: models.User, plan_id: str, roles: list[str] | None = None) -> models.Plan:
-    plan = db.query(models.Plan).filter(models.Plan.id == plan_id).first()
+    plan = db.get(models.Plan, plan_id)
     if not plan:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
-    project = assert_project_member(db, user, plan.project_id, roles)
+    assert_project_member(db, user, plan.project_id, roles)
     return plan
+
+
+def accessible_projects(db: Session, user: models.User, project_ids: Iterable[str], roles: list[str] | None = None) -> Dict[str, models.Project]:
+    """Batch-Variante für Listen: lädt alle Projekte in einer Query und behält die erlaubten."""
+    project_ids = list(dict.fromkeys(project_ids))
+    if not project_ids:
+        return {}
+    user_roles = org_roles(db, user)
+    projects = db.query(models.Project).filter(models.Project.id.in_(project_ids)).all()
+    return {
+        project.id: project
+        for project in projects
+        if project.organization_id in user_roles and (not roles or user_roles[project.organization_id] in roles)
+    }
+
+
+def assert_projects_member(db: Session, user: models.User, project_ids: Iterable[str], roles: list[str] | None = None) -> Dict[str, models.Project]:
+    """Wie assert_project_member für mehrere IDs; 404 wenn eines fehlt oder nicht zugänglich ist."""
+    project_ids = list(dict.fromkeys(project_ids))
+    allowed = accessible_projects(db, user, project_ids, roles)
+    if len(allowed) != len(project_ids):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    return allowed
@@ -1,6 +1,8 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from .config import get_settings
+from .services.async_runtime import get_async_runtime
 
 settings = get_settings()
 
@@ -40,87 +42,67 @@ celery.conf.beat_schedule = {
     },
     "poll-publish-status": {
         "task": "tasks.poll_publish_status",
-        "schedule": 900,
+        # Kurzes Intervall: pro Lauf werden nur fällige Assets abgefragt (publish_tracking)
+        "schedule": 60,
         "args": ("__broadcast__",),
     },
+    "rollup-metrics": {
+        "task": "tasks.rollup_metrics",
+        "schedule": 900,
+    },
+    "flush-usage-ledger": {
+        "task": "tasks.flush_usage_ledger",
+        "schedule": 10,
+    },
+    "reconcile-usage-counters": {
+        "task": "tasks.reconcile_usage_counters",
+        "schedule": 3600,
+    },
     "refresh-tokens": {
         "task": "tasks.refresh_expiring_tokens",
         "schedule": 1800,  # Every 30 minutes
     },
+    "collect-orphaned-blobs": {
+        "task": "tasks.collect_orphaned_blobs",
+        "schedule": 3600,
+    },
 }
 
 
-@celery.task(name="tasks.enqueue_due_plans")
-def enqueue_due_plans():
-    from datetime import date, timedelta
-    from .db import SessionLocal
-    from . import models
-    from .celery_app import celery
-    
-    db = SessionLocal()
+@worker_process_init.connect
+def _reset_db_pools(**kwargs):
+    # Vom Elternprozess geerbte Pool-Verbindungen nicht teilen (close=False: Eltern-Sockets bleiben offen)
+    from .db import RoutingSession, engine
+
+    engine.dispose(close=False)
+    if RoutingSession.replica_bind is not None:
+        RoutingSession.replica_bind.dispose(close=False)
+
+
+@worker_process_init.connect
+def _reset_s3_client(**kwargs):
+    from .providers.storage import reset_s3_client
+
+    reset_s3_client()
+
+
+@worker_process_init.connect
+def _start_async_runtime(**kwargs):
+    # Ein Event-Loop pro Worker-Prozess (nach dem Fork gestartet)
+    from .providers.http_client import get_http_registry
+
+    runtime = get_async_runtime()
+    runtime.on_shutdown(get_http_registry().aclose)
+    runtime.start()
+
+
+@worker_process_shutdown.connect
+def _stop_async_runtime(**kwargs):
+    get_async_runtime().stop()
+    # Gepufferte Usage-Events vor dem Beenden schreiben
+    from .services.usage_writer import get_usage_writer
+
     try:
-        # Find plans that are due in the next 24 hours and need assets generated
-        tomorrow = date.today() + timedelta(days=1)
-        due_plans = (
-            db.query(models.Plan)
-            .join(models.Project)
-            .filter(
-                models.Plan.slot_date <= tomorrow,
-                models.Plan.slot_date >= date.today(),
-                models.Plan.status == "scheduled",
-                models.Plan.approved == True,
-                models.Project.autopilot_enabled == True,
-            )
-            .all()
-        )
-        
-        enqueued = 0
-        for plan in due_plans:
-            # Check if job already exists
-            idem = f"gen:{plan.id}"
-            existing = (
-                db.query(models.Job)
-                .filter(
-                    models.Job.organization_id == plan.organization_id,
-                    models.Job.idempotency_key == idem,
-                    models.Job.type == "generate_assets",
-                )
-                .first()
-            )
-            if existing:
-                continue
-            
-            # Check if asset already exists
-            existing_asset = (
-                db.query(models.VideoAsset)
-                .filter(models.VideoAsset.plan_id == plan.id)
-                .first()
-            )
-            if existing_asset:
-                continue
-            
-            # Create job
-            job = models.Job(
-                organization_id=plan.organization_id,
-                project_id=plan.project_id,
-                type="generate_assets",
-                status="pending",
-                payload=str(plan.id),
-                idempotency_key=idem,
-            )
-            db.add(job)
-            db.commit()
-            db.refresh(job)
-            
-            # Enqueue task
-            celery.send_task("tasks.generate_assets", args=[job.id, plan.project_id, plan.id])
-            enqueued += 1
-        
-        return f"enqueued={enqueued}"
-    except Exception as e:
-        if db:
-            db.rollback()
-        raise
-    finally:
-        if db:
-            db.close()
+        get_usage_writer().flush_memory()
+    except Exception:
+        pass
@@ -8,6 +8,15 @@ class Settings(BaseModel):
     environment: str = Field(default="development")
     secret_key: str = Field(default="dev-secret")
     database_url: str = Field(default="postgresql+psycopg2://codex:codex@db:5432/codex")
+    database_replica_url: str = Field(default="", description="Optional read replica for read-only endpoints")
+    replica_sticky_seconds: int = Field(default=5, description="Reads stay on the primary this long after a client's write")
+    db_role: str = Field(default="api", description="Process role for pool sizing: api, worker or beat")
+    db_pool_size: int | None = Field(default=None, description="Overrides the role default")
+    db_max_overflow: int | None = Field(default=None, description="Overrides the role default")
+    db_pool_timeout: float = Field(default=30.0)
+    db_pool_recycle: int = Field(default=1800, description="Seconds before a pooled connection is replaced")
+    db_pool_pre_ping: bool = Field(default=True)
+    db_pgbouncer: bool = Field(default=False, description="Transaction pooling via PgBouncer; disables the client-side pool")
     redis_url: str = Field(default="redis://redis:6379/0")
     broker_url: str = Field(default="redis://redis:6379/1")
     storage_backend: str = Field(default="local")
@@ -18,6 +27,15 @@ class Settings(BaseModel):
     storage_s3_access_key: str = Field(default="")
     storage_s3_secret_key: str = Field(default="")
     storage_s3_prefix: str = Field(default="")
+    storage_s3_max_pool_connections: int = Field(default=50, description="HTTP connection pool of the shared S3 client")
+    storage_s3_multipart_threshold: int = Field(default=16 * 1024 * 1024, description="Files from this size on are uploaded in parts")
+    storage_s3_part_size: int = Field(default=8 * 1024 * 1024, description="Multipart part size in bytes (min 5 MiB)")
+    storage_s3_upload_concurrency: int = Field(default=8, description="Parallel part uploads per file")
+    storage_cache_path: str = Field(default="/tmp/codex-storage-cache", description="Node-local read-through cache for S3 objects")
+    storage_cache_max_bytes: int = Field(default=5 * 1024 ** 3, description="Size cap of the storage cache; LRU entries are evicted above it")
+    storage_download_mode: str = Field(default="file", description="Local downloads: file (FileResponse) or accel (nginx X-Accel-Redirect, only for requests proxied with X-Accel-Enabled: 1)")
+    storage_accel_prefix: str = Field(default="/protected-storage/", description="Internal nginx location aliased to storage_path")
+    storage_presign_expires: int = Field(default=300, description="Lifetime of presigned S3 download URLs in seconds")
     use_mock_providers: bool = Field(default=False)
     openrouter_api_key: str = Field(default="", description="Optional; mocked when empty")
     openrouter_base_url: str = Field(default="https://openrouter.ai/api/v1")
@@ -25,14 +43,29 @@ class Settings(BaseModel):
     tiktok_client_secret: str = Field(default="", description="Optional; mocked when empty")
     tiktok_redirect_uri: str = Field(default="http://localhost:8000/tiktok/oauth/callback")
     tiktok_api_base: str = Field(default="https://open-api.tiktok.com")
+    http_max_connections_per_host: int = Field(default=20)
+    http_max_keepalive_per_host: int = Field(default=10)
+    http_keepalive_expiry: float = Field(default=30.0)
+    http2_enabled: bool = Field(default=False, description="Requires the optional h2 package")
+    publish_poll_concurrency: int = Field(default=20, description="Max concurrent TikTok status queries per poll run")
+    publish_poll_batch_size: int = Field(default=2000, description="Max due assets fetched per poll run")
+    usage_flush_batch_size: int = Field(default=500)
+    usage_flush_interval: float = Field(default=2.0, description="Seconds between usage ledger flushes")
+    usage_flush_max_batches: int = Field(default=20, description="Stream batches written per flush run; the rest waits for the next run")
+    metrics_snapshot_minutes: int = Field(default=60, description="Sampling bucket for metric snapshots (divides 1440)")
     ffmpeg_path: str = Field(default="ffmpeg")
     enable_pgvector: bool = Field(default=False)
     log_level: str = Field(default="INFO")
     demo_email: str = Field(default="demo@codex.dev")
     demo_password: str = Field(default="demopass123")
     fernet_secret: str = Field(default="", description="REQUIRED: Fernet encryption key for secrets. Must be set via environment variable.")
+    fernet_previous_secrets: str = Field(default="", description="Comma-separated retired Fernet keys, still accepted for decryption")
+    credential_cache_ttl: float = Field(default=60.0, description="Seconds a decrypted provider secret is cached in-process")
     access_token_exp_minutes: int = Field(default=1440)  # 24 Stunden (statt 15 Minuten)
     refresh_token_exp_days: int = Field(default=30)  # 30 Tage (statt 14)
+    auth_cache_ttl: int = Field(default=60, description="Seconds a session/user snapshot stays in Redis")
+    auth_cache_local_ttl: float = Field(default=5.0, description="Seconds a snapshot stays in the in-process cache")
+    membership_cache_ttl: int = Field(default=300, description="Seconds a user's role index stays in Redis")
 
     class Config:
         env_file = ".env"
@@ -1,12 +1,80 @@
 from contextlib import contextmanager
+from typing import Optional
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from sqlalchemy.pool import NullPool
 from .config import get_settings
 
 
 settings = get_settings()
-engine = create_engine(settings.database_url, echo=False, future=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+
+# Pool-Größen pro Prozess und Rolle; jedes Celery-Prefork-Kind hat einen eigenen Pool
+POOL_DEFAULTS = {
+    "api": {"pool_size": 10, "max_overflow": 20},
+    "worker": {"pool_size": 2, "max_overflow": 3},
+    "beat": {"pool_size": 1, "max_overflow": 0},
+}
+
+
+def engine_options(url: str, role: Optional[str] = None) -> dict:
+    """create_engine-Argumente für die Prozessrolle (DB_ROLE) aus den Settings."""
+    options = {"echo": False, "future": True}
+    if url.startswith("sqlite"):
+        return options
+    if settings.db_pgbouncer:
+        # PgBouncer im Transaction-Pooling poolt selbst: keine Verbindungen im Prozess halten
+        options["poolclass"] = NullPool
+        return options
+    defaults = POOL_DEFAULTS.get(role or settings.db_role, POOL_DEFAULTS["api"])
+    options.update(
+        pool_size=settings.db_pool_size if settings.db_pool_size is not None else defaults["pool_size"],
+        max_overflow=settings.db_max_overflow if settings.db_max_overflow is not None else defaults["max_overflow"],
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    return options
+
+
+class RoutingSession(Session):
+    """
+    Session, die Lesezugriffe an das Replica schickt, wenn info["replica"] gesetzt ist.
+    Flushes und DML-Statements gehen immer an den Primary.
+    """
+
+    replica_bind: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self.replica_bind is not None
+            and self.info.get("replica")
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+        ):
+            return self.replica_bind
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
+if settings.database_replica_url:
+    RoutingSession.replica_bind = create_engine(
+        settings.database_replica_url, **engine_options(settings.database_replica_url)
+    )
+SessionLocal = sessionmaker(
+    bind=engine, class_=RoutingSession, autoflush=False, autocommit=False, expire_on_commit=False, future=True
+)
+
+
+@contextmanager
+def on_primary(session: Session):
+    """Lesezugriffe im Block gehen an den Primary (für Daten, die in prozessübergreifende Caches wandern)."""
+    replica = session.info.pop("replica", None)
+    try:
+        yield session
+    finally:
+        if replica is not None:
+            session.info["replica"] = replica
 
 
 class Base(DeclarativeBase):
@@ -24,3 +92,15 @@ def session_scope():
         raise
     finally:
         session.close()
+
+
+def dialect_insert(session):
+    """insert()-Konstrukt des aktiven Dialekts (für ON CONFLICT ... DO UPDATE / RETURNING)."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Upsert (ON CONFLICT) not supported for database dialect {dialect!r}")
+    return insert
@@ -1,7 +1,10 @@
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from .auth import PRIMARY_STICKY_COOKIE
 from .config import get_settings
+from .providers.http_client import get_http_registry
+from .services.usage_writer import get_usage_writer
 from .routers import auth, orgs, projects, plans, video, analytics, health, credentials, prompts, knowledge, jobs, youtube, tiktok, usage
 
 settings = get_settings()
@@ -24,8 +27,37 @@ app.add_middleware(
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
     allow_credentials=True,
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+
+if settings.database_replica_url:
+    @app.middleware("http")
+    async def _primary_after_write(request: Request, call_next):
+        response = await call_next(request)
+        # Read-your-writes: nach erfolgreichem Schreiben liest der Client kurz vom Primary (Replica-Lag)
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            response.set_cookie(
+                PRIMARY_STICKY_COOKIE,
+                "1",
+                max_age=settings.replica_sticky_seconds,
+                httponly=True,
+                samesite="lax",
+            )
+        return response
+
+
+@app.on_event("shutdown")
+async def _close_http_clients():
+    # Gepoolte Provider-Verbindungen sauber schließen
+    await get_http_registry().aclose()
+
+
+@app.on_event("shutdown")
+def _flush_usage_ledger():
+    # Gepufferte Usage-Events vor dem Beenden schreiben
+    get_usage_writer().flush_memory()
+
 app.include_router(health.router, prefix="/health", tags=["health"])
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(orgs.router, prefix="/orgs", tags=["organizations"])
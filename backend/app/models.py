@@ -1,13 +1,16 @@
 import uuid
 from datetime import datetime, date
 from sqlalchemy import (
+    BigInteger,
     String,
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Text,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .db import Base
@@ -45,10 +48,24 @@ class User(Base):
     sessions: Mapped[list["Session"]] = relationship("Session", back_populates="user")
     password_resets: Mapped[list["PasswordReset"]] = relationship("PasswordReset", back_populates="user")
 
+    # Indizes siehe Migration 0018
+    __table_args__ = (
+        Index(
+            "ix_users_verification_token",
+            "verification_token",
+            postgresql_where=text("verification_token IS NOT NULL"),
+            sqlite_where=text("verification_token IS NOT NULL"),
+        ),
+    )
+
 
 class Membership(Base):
     __tablename__ = "memberships"
-    __table_args__ = (UniqueConstraint("user_id", "organization_id"),)
+    # Der Unique-Constraint deckt auch Lookups nach user_id ab
+    __table_args__ = (
+        UniqueConstraint("user_id", "organization_id"),
+        Index("ix_memberships_organization_id", "organization_id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=uid)
     user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -79,6 +96,8 @@ class Project(Base):
     organization: Mapped[Organization] = relationship("Organization", back_populates="projects")
     plans: Mapped[list["Plan"]] = relationship("Plan", back_populates="project")
 
+    __table_args__ = (Index("ix_projects_organization_id", "organization_id"),)
+
 
 class Plan(Base):
     __tablename__ = "plans"
@@ -109,6 +128,17 @@ class Plan(Base):
 
     project: Mapped[Project] = relationship("Project", back_populates="plans")
 
+    __table_args__ = (
+        Index("ix_plans_project_slot", "project_id", "slot_date", "slot_index"),
+        # Autopilot-Scheduler: freigegebene, nicht gelockte Slots nach Datum
+        Index(
+            "ix_plans_due_slot_date",
+            "slot_date",
+            postgresql_where=text("approved IS true AND locked IS false"),
+            sqlite_where=text("approved IS 1 AND locked IS 0"),
+        ),
+    )
+
 
 class UsageLedger(Base):
     __tablename__ = "usage_ledger"
@@ -117,10 +147,31 @@ class UsageLedger(Base):
     organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id"), nullable=False)
     metric: Mapped[str] = mapped_column(String(100), nullable=False)
     amount: Mapped[int] = mapped_column(Integer, default=0)
+    dedup_key: Mapped[str | None] = mapped_column(String(64), nullable=True)  # Idempotenz für gepufferte Writes
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     organization: Mapped[Organization] = relationship("Organization")
 
+    __table_args__ = (
+        UniqueConstraint("dedup_key", name="uq_usage_ledger_dedup_key"),
+        Index("ix_usage_ledger_org_metric_created", "organization_id", "metric", "created_at"),
+        Index("ix_usage_ledger_created_at", "created_at"),
+    )
+
+
+class UsageMonthly(Base):
+    """Monatssummen pro Org und Metrik, vom Ledger-Writer inkrementell gepflegt."""
+    __tablename__ = "usage_monthly"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=uid)
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id"), nullable=False)
+    metric: Mapped[str] = mapped_column(String(100), nullable=False)
+    period: Mapped[date] = mapped_column(nullable=False)  # erster Tag des Monats
+    amount: Mapped[int] = mapped_column(BigInteger, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (UniqueConstraint("organization_id", "metric", "period", name="uq_usage_monthly_org_metric_period"),)
+
 
 class Credential(Base):
     __tablename__ = "credentials"
@@ -133,6 +184,8 @@ class Credential(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     version: Mapped[int] = mapped_column(Integer, default=1)
 
+    __table_args__ = (Index("ix_credentials_org_provider", "organization_id", "provider"),)
+
 
 class KnowledgeDoc(Base):
     __tablename__ = "knowledge_docs"
@@ -167,13 +220,39 @@ class VideoAsset(Base):
     video_path: Mapped[str] = mapped_column(String(500))
     thumbnail_path: Mapped[str] = mapped_column(String(500))
     transcript: Mapped[str | None] = mapped_column(Text, nullable=True)
-    publish_response: Mapped[str | None] = mapped_column(Text, nullable=True)
+    publish_response: Mapped[str | None] = mapped_column(Text, nullable=True)  # Roh-Antwort von TikTok als JSON
+    tiktok_video_id: Mapped[str | None] = mapped_column(String(255), nullable=True, index=True)
+    tiktok_publish_id: Mapped[str | None] = mapped_column(String(255), nullable=True, index=True)
+    publish_status: Mapped[str | None] = mapped_column(String(50), nullable=True, index=True)  # letzter TikTok-Status
     # Übersetzungs-Felder (für YouTube Video-Übersetzung)
     original_language: Mapped[str | None] = mapped_column(String(10), nullable=True)  # z.B. "en", "de"
     translated_language: Mapped[str | None] = mapped_column(String(10), nullable=True)  # z.B. "de", "en"
     voice_clone_model_id: Mapped[str | None] = mapped_column(String(255), nullable=True)  # z.B. "rask/voice-clone-v1"
     translation_provider: Mapped[str | None] = mapped_column(String(50), nullable=True)  # z.B. "rask", "heygen", "elevenlabs"
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Publish-Status-Tracking (siehe services/publish_tracking.py); next_poll_at NULL = nicht mehr pollen
+    published_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    next_poll_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_polled_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    poll_attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Inhaltsadressierte Dateien (services/blob_store.py); NULL bei Assets vor der Blob-Ablage
+    video_blob_id: Mapped[str | None] = mapped_column(ForeignKey("blobs.id"), nullable=True)
+    thumbnail_blob_id: Mapped[str | None] = mapped_column(ForeignKey("blobs.id"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_video_assets_next_poll_at", "next_poll_at", postgresql_where="next_poll_at IS NOT NULL"),
+        Index("ix_video_assets_plan_id", "plan_id"),
+        # Keyset-Listing (services/pagination.py): Projekt-Assets und org-level Assets
+        Index("ix_video_assets_project_created", "project_id", "created_at", "id"),
+        Index(
+            "ix_video_assets_org_created",
+            "organization_id",
+            "created_at",
+            "id",
+            postgresql_where=text("project_id IS NULL"),
+            sqlite_where=text("project_id IS NULL"),
+        ),
+    )
 
 
 class Job(Base):
@@ -186,9 +265,32 @@ class Job(Base):
     status: Mapped[str] = mapped_column(String(50), default="pending")
     idempotency_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
     payload: Mapped[str] = mapped_column(Text, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
     runs: Mapped[list["JobRun"]] = relationship("JobRun", back_populates="job")
 
+    # Entspricht Migration 0007; Ziel für ON CONFLICT beim Bulk-Insert (services/scheduler.py)
+    __table_args__ = (
+        Index(
+            "ix_jobs_idempotency_org_type",
+            "organization_id",
+            "idempotency_key",
+            "type",
+            unique=True,
+            postgresql_where=text("idempotency_key IS NOT NULL"),
+            sqlite_where=text("idempotency_key IS NOT NULL"),
+        ),
+        Index("ix_jobs_org_status", "organization_id", "status"),
+        Index("ix_jobs_project_created", "project_id", "created_at", "id"),
+        Index(
+            "ix_jobs_org_created",
+            "organization_id",
+            "created_at",
+            "id",
+            postgresql_where=text("project_id IS NULL"),
+            sqlite_where=text("project_id IS NULL"),
+        ),
+    )
+
 
 class Metric(Base):
     __tablename__ = "metrics"
@@ -203,6 +305,48 @@ class Metric(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
+class MetricSnapshot(Base):
+    """Eine Zeile pro TikTok-Video und Sampling-Bucket (Upsert), alle Statistiken als kumulative Zähler."""
+    __tablename__ = "metric_snapshots"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=uid)
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id"), nullable=False)
+    project_id: Mapped[str] = mapped_column(ForeignKey("projects.id"), nullable=False)
+    plan_id: Mapped[str | None] = mapped_column(ForeignKey("plans.id"), nullable=True)
+    asset_id: Mapped[str | None] = mapped_column(ForeignKey("video_assets.id"), nullable=True)
+    tiktok_video_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    open_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    views: Mapped[int] = mapped_column(BigInteger, default=0)
+    likes: Mapped[int] = mapped_column(BigInteger, default=0)
+    comments: Mapped[int] = mapped_column(BigInteger, default=0)
+    shares: Mapped[int] = mapped_column(BigInteger, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("project_id", "tiktok_video_id", "bucket_start", name="uq_metric_snapshots_video_bucket"),
+        Index("ix_metric_snapshots_bucket", "bucket_start"),
+    )
+
+
+class MetricRollup(Base):
+    """Vorberechnete Aggregate (hour/day) pro Projekt (plan_id NULL) bzw. pro Plan."""
+    __tablename__ = "metric_rollups"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=uid)
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id"), nullable=False)
+    project_id: Mapped[str] = mapped_column(ForeignKey("projects.id"), nullable=False)
+    plan_id: Mapped[str | None] = mapped_column(ForeignKey("plans.id"), nullable=True)
+    granularity: Mapped[str] = mapped_column(String(10), nullable=False)  # "hour" oder "day"
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    metric: Mapped[str] = mapped_column(String(100), nullable=False)
+    value: Mapped[int] = mapped_column(BigInteger, default=0)
+
+    __table_args__ = (
+        Index("ix_metric_rollups_project_bucket", "project_id", "granularity", "bucket_start"),
+    )
+
+
 class SocialAccount(Base):
     __tablename__ = "social_accounts"
 
@@ -212,6 +356,8 @@ class SocialAccount(Base):
     handle: Mapped[str] = mapped_column(String(255), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (Index("ix_social_accounts_org_platform", "organization_id", "platform"),)
+
 
 class OAuthToken(Base):
     __tablename__ = "oauth_tokens"
@@ -223,6 +369,8 @@ class OAuthToken(Base):
     expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (Index("ix_oauth_tokens_social_account_id", "social_account_id"),)
+
 
 class Session(Base):
     __tablename__ = "sessions"
@@ -238,6 +386,11 @@ class Session(Base):
 
     user: Mapped[User] = relationship("User", back_populates="sessions")
 
+    __table_args__ = (
+        Index("ix_sessions_refresh_token_hash", "refresh_token_hash"),
+        Index("ix_sessions_user_id", "user_id"),
+    )
+
 
 class PasswordReset(Base):
     __tablename__ = "password_resets"
@@ -251,6 +404,8 @@ class PasswordReset(Base):
 
     user: Mapped[User] = relationship("User", back_populates="password_resets")
 
+    __table_args__ = (Index("ix_password_resets_token_hash", "token_hash"),)
+
 
 class JobRun(Base):
     __tablename__ = "job_runs"
@@ -262,3 +417,51 @@ class JobRun(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     job: Mapped[Job] = relationship("Job", back_populates="runs")
+
+    __table_args__ = (Index("ix_job_runs_job_created", "job_id", "created_at"),)
+
+
+class Blob(Base):
+    """Datei im Storage, adressiert über den SHA-256 ihres Inhalts (einmal pro Inhalt gespeichert)."""
+    __tablename__ = "blobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=uid)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    storage_uri: Mapped[str] = mapped_column(String(500), nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Zeitpunkt, zu dem ref_count auf 0 fiel; die Garbage Collection löscht nach einer Karenzzeit
+    orphaned_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_blobs_orphaned_at", "orphaned_at", postgresql_where=text("orphaned_at IS NOT NULL")),
+    )
+
+
+class BlobTombstone(Base):
+    """Storage-Objekt eines gelöschten Blobs, das noch entfernt werden muss (zweite GC-Phase)."""
+    __tablename__ = "blob_tombstones"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=uid)
+    storage_uri: Mapped[str] = mapped_column(String(500), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class BlobRef(Base):
+    """Verwendung eines Blobs durch einen Mandanten (z. B. Video eines VideoAssets)."""
+    __tablename__ = "blob_refs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=uid)
+    blob_id: Mapped[str] = mapped_column(ForeignKey("blobs.id"), nullable=False)
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id"), nullable=False)
+    owner_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    owner_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    role: Mapped[str] = mapped_column(String(50), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_blob_refs_owner", "owner_type", "owner_id"),
+        Index("ix_blob_refs_blob_id", "blob_id"),
+        Index("ix_blob_refs_org", "organization_id"),
+    )
@@ -0,0 +1,216 @@
+"""
+Knotenlokaler Read-Through-Cache für entfernte Storage-Objekte.
+Einträge sind nach (URI, ETag) adressiert, eine geänderte Version ist also automatisch ein Miss.
+Befüllt wird atomar (temporäre Datei + os.replace) unter einem flock pro Eintrag: gleichzeitige
+Leser desselben Objekts (auch aus anderen Prozessen) teilen sich einen Download. Über der
+Größengrenze werden die am längsten nicht gelesenen Einträge (mtime) verdrängt.
+"""
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: nur prozesslokale Sperren
+    fcntl = None
+
+LOCK_SUFFIX = ".lock"
+TMP_SUFFIX = ".tmp"
+# Reste abgebrochener Befüllungen
+STALE_TMP_SECONDS = 3600
+
+
+class DiskCache:
+    """Größenbegrenzter Datei-Cache mit LRU-Verdrängung und Hit/Miss-Zählern."""
+
+    def __init__(self, root: str, max_bytes: int, min_age: float = 300.0):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # Frisch gelesene Einträge nicht verdrängen: Aufrufer öffnen den Pfad erst nach get/fill
+        self.min_age = min_age
+        self._lock = threading.Lock()
+        self._filling: set = set()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "fills": 0, "fill_bytes": 0, "evictions": 0}
+
+    def path_for(self, uri: str, version: str) -> Path:
+        digest = hashlib.sha256(f"{uri}\0{version}".encode()).hexdigest()
+        return self.root / digest[:2] / digest
+
+    def get(self, uri: str, version: str) -> Optional[Path]:
+        """Pfad des Eintrags oder None (ohne zu befüllen)."""
+        path = self.path_for(uri, version)
+        if self._touch(path):
+            self._count("hits")
+            return path
+        return None
+
+    def fill(self, uri: str, version: str, fetch: Callable[[Path], None]) -> Path:
+        """
+        Read-Through: liefert den Eintrag, lädt ihn bei Bedarf über `fetch(ziel)`.
+        Wartet, falls ein anderer Leser denselben Eintrag gerade lädt.
+        """
+        path = self.path_for(uri, version)
+        if self._touch(path):
+            self._count("hits")
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._entry_lock(path):
+            if self._touch(path):
+                # Ein anderer Leser hat inzwischen geladen
+                self._count("hits")
+                return path
+            self._count("misses")
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}{TMP_SUFFIX}")
+            try:
+                fetch(tmp)
+                os.replace(tmp, path)
+            finally:
+                tmp.unlink(missing_ok=True)
+            size = path.stat().st_size
+            with self._lock:
+                self._stats["fills"] += 1
+                self._stats["fill_bytes"] += size
+        self.evict()
+        return path
+
+    def fill_in_background(self, uri: str, version: str, fetch: Callable[[Path], None]) -> None:
+        """Startet fill() in einem Thread; bereits laufende Befüllungen werden nicht doppelt gestartet."""
+        path = self.path_for(uri, version)
+        with self._lock:
+            if path in self._filling:
+                return
+            self._filling.add(path)
+
+        def run():
+            try:
+                self.fill(uri, version, fetch)
+            except Exception:
+                pass  # Nächster Leser versucht es erneut
+            finally:
+                with self._lock:
+                    self._filling.discard(path)
+
+        threading.Thread(target=run, name="disk-cache-fill", daemon=True).start()
+
+    def evict(self) -> int:
+        """Verdrängt LRU-Einträge bis unter 90 % der Grenze. Returns: Anzahl gelöschter Einträge."""
+        with self._global_lock(blocking=False) as acquired:
+            if not acquired:
+                return 0  # Ein anderer Prozess räumt gerade auf
+            now = time.time()
+            for tmp in self.root.glob(f"??/*{TMP_SUFFIX}"):
+                try:
+                    if tmp.stat().st_mtime < now - STALE_TMP_SECONDS:
+                        tmp.unlink()
+                except FileNotFoundError:
+                    pass
+            entries = []
+            total = 0
+            for path in self._entries():
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return 0
+            target = int(self.max_bytes * 0.9)
+            cutoff = now - self.min_age
+            removed = 0
+            for mtime, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= target or mtime > cutoff:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+                path.with_name(path.name + LOCK_SUFFIX).unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            self._count("evictions", removed)
+            return removed
+
+    def stats(self) -> dict:
+        size = 0
+        entries = 0
+        for path in self._entries():
+            try:
+                size += path.stat().st_size
+                entries += 1
+            except FileNotFoundError:
+                continue
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update(
+            entries=entries,
+            size_bytes=size,
+            max_bytes=self.max_bytes,
+            hit_ratio=round(stats["hits"] / lookups, 3) if lookups else None,
+        )
+        return stats
+
+    def _entries(self):
+        for path in self.root.glob("??/*"):
+            if not path.name.endswith((LOCK_SUFFIX, TMP_SUFFIX)):
+                yield path
+
+    def _touch(self, path: Path) -> bool:
+        # mtime als Zeitpunkt des letzten Zugriffs (atime ist bei noatime-Mounts unbrauchbar)
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += value
+
+    @contextmanager
+    def _entry_lock(self, path: Path):
+        with open(path.with_name(path.name + LOCK_SUFFIX), "a") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _global_lock(self, blocking: bool = True):
+        with open(self.root / ("evict" + LOCK_SUFFIX), "a") as handle:
+            if fcntl is None:
+                yield True
+                return
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+# Globale Instanz
+_disk_cache: Optional[DiskCache] = None
+
+
+def get_disk_cache() -> DiskCache:
+    """Singleton für den Storage-Cache dieses Knotens."""
+    global _disk_cache
+    if _disk_cache is None:
+        from ..config import get_settings
+
+        settings = get_settings()
+        _disk_cache = DiskCache(settings.storage_cache_path, settings.storage_cache_max_bytes)
+    return _disk_cache
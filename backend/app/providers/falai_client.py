@@ -1,11 +1,12 @@
-import httpx
 from typing import Optional, List, Dict
+from .http_client import HttpClientRegistry, get_http_registry, timeout_profile
 
 
 class FalAIClient:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, http: HttpClientRegistry | None = None):
         self.api_key = api_key
         self.base_url = "https://fal.run"
+        self.http = http or get_http_registry()
 
     async def list_models(self) -> List[Dict]:
         """Liste alle verfügbaren Transcription-Modelle von Fal.ai"""
@@ -244,8 +245,10 @@ class FalAIClient:
         if language:
             payload["language"] = language
         
-        async with httpx.AsyncClient(timeout=300) as client:
-            resp = await client.post(f"{self.base_url}/{model_id}", json=payload, headers=headers)
-            resp.raise_for_status()
-            return resp.json()
+        url = f"{self.base_url}/{model_id}"
+        client = self.http.client_for(url)
+        # Transkription läuft synchron: langes Read-Timeout
+        resp = await client.post(url, json=payload, headers=headers, timeout=timeout_profile("long_poll"))
+        resp.raise_for_status()
+        return resp.json()
 
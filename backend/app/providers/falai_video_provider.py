@@ -3,14 +3,16 @@ from pathlib import Path
 from typing import Optional, Dict
 import tempfile
 import asyncio
+from .http_client import HttpClientRegistry, get_http_registry, timeout_profile
 
 
 class FalAIVideoProvider:
     """Provider für Text-to-Video Generierung mit Fal.ai"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, http: HttpClientRegistry | None = None):
         self.api_key = api_key
         self.base_url = "https://fal.run"
+        self.http = http or get_http_registry()
     
     async def generate_video(
         self, 
@@ -47,46 +49,49 @@ class FalAIVideoProvider:
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
         try:
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                # Starte Video-Generierung
-                response = await client.post(
-                    f"{self.base_url}/{model_id}",
-                    json=payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                # Fal.ai gibt typischerweise eine Job-ID zurück, dann muss man den Status pollen
-                # Oder direkt eine Video-URL wenn synchron
-                video_url = result.get("video", {}).get("url") or result.get("video_url") or result.get("url")
-                
-                if not video_url:
-                    # Falls async Job: Polling erforderlich
-                    job_id = result.get("request_id") or result.get("id")
-                    if job_id:
-                        # Polling-Logik
-                        video_url = await self._poll_video_status(client, model_id, job_id, headers)
-                
-                if not video_url:
-                    raise RuntimeError("Keine Video-URL von Fal.ai erhalten")
-                
-                # Lade Video herunter
-                video_response = await client.get(video_url)
+            # Starte Video-Generierung
+            url = f"{self.base_url}/{model_id}"
+            client = self.http.client_for(url)
+            response = await client.post(
+                url,
+                json=payload,
+                headers=headers,
+                timeout=timeout_profile("long_poll"),
+            )
+            response.raise_for_status()
+            result = response.json()
+            
+            # Fal.ai gibt typischerweise eine Job-ID zurück, dann muss man den Status pollen
+            # Oder direkt eine Video-URL wenn synchron
+            video_url = result.get("video", {}).get("url") or result.get("video_url") or result.get("url")
+            
+            if not video_url:
+                # Falls async Job: Polling erforderlich
+                job_id = result.get("request_id") or result.get("id")
+                if job_id:
+                    # Polling-Logik
+                    video_url = await self._poll_video_status(client, model_id, job_id, headers)
+            
+            if not video_url:
+                raise RuntimeError("Keine Video-URL von Fal.ai erhalten")
+            
+            # Lade Video herunter
+            # Speichere Video lokal (gestreamt statt komplett im Speicher)
+            download_client = self.http.client_for(video_url)
+            async with download_client.stream("GET", video_url, timeout=timeout_profile("download")) as video_response:
                 video_response.raise_for_status()
-                
-                # Speichere Video lokal
                 with open(output_path, "wb") as f:
-                    f.write(video_response.content)
-                
-                # Generiere Thumbnail (erste Frame)
-                thumbnail_path = str(Path(output_path).with_suffix('.jpg'))
-                await self._generate_thumbnail(output_path, thumbnail_path)
-                
-                return {
-                    "video_path": output_path,
-                    "thumbnail_path": thumbnail_path
-                }
+                    async for chunk in video_response.aiter_bytes():
+                        f.write(chunk)
+            
+            # Generiere Thumbnail (erste Frame)
+            thumbnail_path = str(Path(output_path).with_suffix('.jpg'))
+            await self._generate_thumbnail(output_path, thumbnail_path)
+            
+            return {
+                "video_path": output_path,
+                "thumbnail_path": thumbnail_path
+            }
         
         except httpx.HTTPStatusError as e:
             raise RuntimeError(f"Fal.ai API Fehler: {e.response.status_code} - {e.response.text}")
@@ -109,7 +114,7 @@ class FalAIVideoProvider:
             await asyncio.sleep(poll_interval)
             
             try:
-                response = await client.get(status_url, headers=headers)
+                response = await client.get(status_url, headers=headers, timeout=timeout_profile("read"))
                 response.raise_for_status()
                 status_data = response.json()
                 
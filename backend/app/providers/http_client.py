@@ -0,0 +1,118 @@
+"""
+Prozessweite Registry für gepoolte httpx.AsyncClients.
+Ein Client pro Host und Event-Loop: Keep-Alive-Verbindungen (und TLS-Sessions)
+werden über Requests hinweg wiederverwendet statt pro Aufruf neu aufgebaut.
+"""
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..config import get_settings
+
+settings = get_settings()
+
+# Timeout-Profile pro Operationstyp
+TIMEOUT_PROFILES: Dict[str, httpx.Timeout] = {
+    "default": httpx.Timeout(30.0, connect=10.0),
+    "read": httpx.Timeout(30.0, connect=10.0),
+    "completion": httpx.Timeout(60.0, connect=10.0),
+    "upload": httpx.Timeout(connect=10.0, read=120.0, write=300.0, pool=30.0),
+    "download": httpx.Timeout(connect=10.0, read=300.0, write=30.0, pool=30.0),
+    "long_poll": httpx.Timeout(connect=10.0, read=600.0, write=60.0, pool=30.0),
+}
+
+
+def timeout_profile(name: str) -> httpx.Timeout:
+    """Gibt das Timeout-Profil zurück (Fallback: default)."""
+    return TIMEOUT_PROFILES.get(name, TIMEOUT_PROFILES["default"])
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HttpClientRegistry:
+    """
+    Verwaltet einen httpx.AsyncClient pro (Event-Loop, Origin).
+    AsyncClients sind an den Loop gebunden, in dem ihre Verbindungen entstanden sind,
+    daher wird zusätzlich nach Loop getrennt.
+    """
+
+    def __init__(
+        self,
+        max_connections: int | None = None,
+        max_keepalive_connections: int | None = None,
+        keepalive_expiry: float | None = None,
+        http2: bool | None = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.http_max_connections_per_host,
+            max_keepalive_connections=max_keepalive_connections or settings.http_max_keepalive_per_host,
+            keepalive_expiry=keepalive_expiry if keepalive_expiry is not None else settings.http_keepalive_expiry,
+        )
+        wants_http2 = settings.http2_enabled if http2 is None else http2
+        # HTTP/2 nur wenn das optionale h2-Paket installiert ist
+        self.http2 = bool(wants_http2) and _http2_available()
+        self._clients: Dict[Tuple[int, str], Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        if not parts.scheme or not parts.netloc:
+            raise ValueError(f"Absolute URL erforderlich: {url}")
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Gibt den gepoolten Client für den Host von url im aktuellen Loop zurück."""
+        loop = asyncio.get_running_loop()
+        key = (id(loop), self._origin(url))
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry and entry[0] is loop and not entry[1].is_closed:
+                return entry[1]
+            self._prune_closed_loops()
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=timeout_profile("default"),
+                http2=self.http2,
+            )
+            self._clients[key] = (loop, client)
+            return client
+
+    def _prune_closed_loops(self) -> None:
+        for key, (loop, _client) in list(self._clients.items()):
+            if loop.is_closed():
+                self._clients.pop(key, None)
+
+    async def aclose(self) -> None:
+        """Schließt alle Clients des aktuellen Loops (Worker-/App-Shutdown)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            owned = [(key, client) for key, (client_loop, client) in self._clients.items() if client_loop is loop]
+            for key, _client in owned:
+                self._clients.pop(key, None)
+        for _key, client in owned:
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+
+
+# Globale Instanz
+_registry: Optional[HttpClientRegistry] = None
+
+
+def get_http_registry() -> HttpClientRegistry:
+    """Singleton für die HTTP-Client-Registry."""
+    global _registry
+    if _registry is None:
+        _registry = HttpClientRegistry()
+    return _registry
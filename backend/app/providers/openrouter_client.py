@@ -1,14 +1,16 @@
 import httpx
 from typing import Optional, List, Dict
 from ..config import get_settings
+from .http_client import HttpClientRegistry, get_http_registry, timeout_profile
 
 settings = get_settings()
 
 
 class OpenRouterClient:
-    def __init__(self, api_key: str | None = None):
+    def __init__(self, api_key: str | None = None, http: HttpClientRegistry | None = None):
         self.api_key = api_key or settings.openrouter_api_key
         self.base_url = settings.openrouter_base_url
+        self.http = http or get_http_registry()
 
     async def complete(self, prompt: str, max_tokens: int = 4000, model_id: str | None = None) -> dict:
         """
@@ -27,50 +29,52 @@ class OpenRouterClient:
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": max_tokens
         }
-        async with httpx.AsyncClient(timeout=60) as client:
-            try:
-                resp = await client.post(f"{self.base_url}/chat/completions", json=payload, headers=headers)
-                resp.raise_for_status()
-                data = resp.json()
-                message = data["choices"][0]["message"]["content"]
-                return {"script": message, "raw": data}
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 402:
-                    error_detail = "Payment Required"
-                    try:
-                        error_data = e.response.json()
-                        error_detail = error_data.get("error", {}).get("message", "Payment Required")
-                    except:
-                        pass
-                    raise RuntimeError(
-                        f"OpenRouter API Fehler 402: {error_detail}. "
-                        "Bitte prüfe deinen API-Key und ob du Guthaben auf deinem OpenRouter-Account hast. "
-                        "Besuche https://openrouter.ai/ für mehr Informationen."
-                    )
-                elif e.response.status_code == 401:
-                    raise RuntimeError(
-                        "OpenRouter API Fehler 401: Ungültiger API-Key. "
-                        "Bitte prüfe deinen API-Key im Credentials-Tab."
-                    )
-                else:
-                    error_detail = f"HTTP {e.response.status_code}"
-                    try:
-                        error_data = e.response.json()
-                        error_detail = error_data.get("error", {}).get("message", error_detail)
-                    except:
-                        pass
-                    raise RuntimeError(f"OpenRouter API Fehler: {error_detail}")
+        url = f"{self.base_url}/chat/completions"
+        client = self.http.client_for(url)
+        try:
+            resp = await client.post(url, json=payload, headers=headers, timeout=timeout_profile("completion"))
+            resp.raise_for_status()
+            data = resp.json()
+            message = data["choices"][0]["message"]["content"]
+            return {"script": message, "raw": data}
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 402:
+                error_detail = "Payment Required"
+                try:
+                    error_data = e.response.json()
+                    error_detail = error_data.get("error", {}).get("message", "Payment Required")
+                except:
+                    pass
+                raise RuntimeError(
+                    f"OpenRouter API Fehler 402: {error_detail}. "
+                    "Bitte prüfe deinen API-Key und ob du Guthaben auf deinem OpenRouter-Account hast. "
+                    "Besuche https://openrouter.ai/ für mehr Informationen."
+                )
+            elif e.response.status_code == 401:
+                raise RuntimeError(
+                    "OpenRouter API Fehler 401: Ungültiger API-Key. "
+                    "Bitte prüfe deinen API-Key im Credentials-Tab."
+                )
+            else:
+                error_detail = f"HTTP {e.response.status_code}"
+                try:
+                    error_data = e.response.json()
+                    error_detail = error_data.get("error", {}).get("message", error_detail)
+                except:
+                    pass
+                raise RuntimeError(f"OpenRouter API Fehler: {error_detail}")
 
     async def list_models(self) -> List[Dict]:
         """Liste alle verfügbaren Modelle von OpenRouter"""
         if not self.api_key:
             raise RuntimeError("OpenRouter API key not configured")
         headers = {"Authorization": f"Bearer {self.api_key}"}
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.get(f"{self.base_url}/models", headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
-            return data.get("data", [])
+        url = f"{self.base_url}/models"
+        client = self.http.client_for(url)
+        resp = await client.get(url, headers=headers, timeout=timeout_profile("read"))
+        resp.raise_for_status()
+        data = resp.json()
+        return data.get("data", [])
 
     async def get_model_info(self, model_id: str) -> Optional[Dict]:
         """Hole Informationen zu einem spezifischen Modell"""
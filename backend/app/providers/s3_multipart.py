@@ -0,0 +1,216 @@
+"""
+Paralleler, fortsetzbarer Multipart-Upload nach S3/MinIO.
+Teile gehen mit SHA-256-Prüfsumme parallel hoch. Die UploadId liegt in Redis unter
+(Bucket, Key, SHA-256 des Inhalts), unabhängig vom lokalen (oft temporären) Pfad: ein erneuter
+Upload desselben Inhalts (z. B. Task-Retry) setzt fort und lädt nur Teile hoch, die S3 laut
+ListParts noch nicht hat. Ohne Redis wird ein fehlgeschlagener Upload sofort abgebrochen.
+Nie fortgesetzte Uploads räumt die Lifecycle-Regel AbortIncompleteMultipartUpload des Buckets ab.
+"""
+import base64
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import redis
+from botocore.exceptions import ClientError
+
+from ..config import get_settings
+
+settings = get_settings()
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+# Solange bleibt ein offener Upload fortsetzbar
+STATE_TTL_SECONDS = 24 * 3600
+
+
+def effective_part_size(size: int, part_size: int) -> int:
+    # S3: Teile mindestens 5 MiB (außer dem letzten), höchstens 10.000 Teile
+    return max(part_size, MIN_PART_SIZE, -(-size // MAX_PARTS))
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadStateStore:
+    """Offene Multipart-Uploads in Redis; ohne Redis `durable = False`."""
+
+    def __init__(self):
+        self.redis_client: Optional[redis.Redis] = None
+        self._init_redis()
+
+    def _init_redis(self):
+        """Initialisiert Redis-Client falls verfügbar."""
+        try:
+            if settings.redis_url:
+                self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+                self.redis_client.ping()
+        except Exception:
+            self.redis_client = None
+
+    @property
+    def durable(self) -> bool:
+        return self.redis_client is not None
+
+    @staticmethod
+    def _key(bucket: str, key: str, sha256: str) -> str:
+        return f"s3:multipart:{bucket}:{key}:{sha256}"
+
+    def load(self, bucket: str, key: str, sha256: str) -> Optional[dict]:
+        if not self.redis_client:
+            return None
+        try:
+            raw = self.redis_client.get(self._key(bucket, key, sha256))
+            return json.loads(raw) if raw else None
+        except (redis.RedisError, ValueError):
+            return None
+
+    def save(self, bucket: str, key: str, sha256: str, state: dict) -> bool:
+        if not self.redis_client:
+            return False
+        try:
+            self.redis_client.set(self._key(bucket, key, sha256), json.dumps(state), ex=STATE_TTL_SECONDS)
+            return True
+        except redis.RedisError:
+            return False
+
+    def delete(self, bucket: str, key: str, sha256: str) -> None:
+        if not self.redis_client:
+            return
+        try:
+            self.redis_client.delete(self._key(bucket, key, sha256))
+        except redis.RedisError:
+            pass
+
+
+# Globale Instanz
+_state_store: Optional[UploadStateStore] = None
+
+
+def get_upload_state_store() -> UploadStateStore:
+    """Singleton für den Upload-Status."""
+    global _state_store
+    if _state_store is None:
+        _state_store = UploadStateStore()
+    return _state_store
+
+
+class MultipartUpload:
+    """Upload einer lokalen Datei als Multipart-Objekt."""
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        key: str,
+        local_path: str,
+        part_size: int,
+        concurrency: int,
+        state_store: Optional[UploadStateStore] = None,
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.local_path = local_path
+        self.concurrency = max(1, concurrency)
+        self.state_store = state_store or get_upload_state_store()
+        self.size = os.path.getsize(local_path)
+        self.part_size = effective_part_size(self.size, part_size)
+        self.part_count = max(1, -(-self.size // self.part_size))
+        self.sha256 = file_sha256(local_path)
+        self.uploaded_parts = 0
+
+    def run(self) -> None:
+        upload_id, done = self._resume()
+        if upload_id is None:
+            upload_id = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ChecksumAlgorithm="SHA256"
+            )["UploadId"]
+            resumable = self.state_store.save(self.bucket, self.key, self.sha256, self._state(upload_id))
+        else:
+            resumable = True
+        pending = [number for number in range(1, self.part_count + 1) if number not in done]
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(pending) or 1)) as pool:
+                for part in pool.map(lambda number: self._upload_part(upload_id, number), pending):
+                    done[part["PartNumber"]] = part
+                    self.uploaded_parts += 1
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": [done[number] for number in range(1, self.part_count + 1)]},
+            )
+        except BaseException:
+            if not resumable:
+                # Niemand kennt die UploadId: hochgeladene Teile nicht als Leiche stehen lassen
+                self._abort(upload_id)
+            raise
+        self.state_store.delete(self.bucket, self.key, self.sha256)
+
+    def _upload_part(self, upload_id: str, number: int) -> dict:
+        # Eigenes Dateihandle pro Teil: Speicher pro Thread = part_size
+        with open(self.local_path, "rb") as f:
+            f.seek((number - 1) * self.part_size)
+            data = f.read(self.part_size)
+        checksum = base64.b64encode(hashlib.sha256(data).digest()).decode()
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=upload_id,
+            PartNumber=number,
+            Body=data,
+            ChecksumSHA256=checksum,
+        )
+        return {"PartNumber": number, "ETag": response["ETag"], "ChecksumSHA256": checksum}
+
+    def _expected_size(self, number: int) -> int:
+        if number < self.part_count:
+            return self.part_size
+        return self.size - (self.part_count - 1) * self.part_size
+
+    def _state(self, upload_id: str) -> dict:
+        return {"upload_id": upload_id, "size": self.size, "part_size": self.part_size}
+
+    def _resume(self) -> Tuple[Optional[str], Dict[int, dict]]:
+        """Returns: (upload_id, {part_number: part}) eines passenden offenen Uploads, sonst (None, {})."""
+        state = self.state_store.load(self.bucket, self.key, self.sha256)
+        if not state:
+            return None, {}
+        upload_id = state.get("upload_id")
+        if not upload_id or state != self._state(upload_id):
+            # Andere Teilgröße (geänderte Konfiguration): alten Upload verwerfen
+            if upload_id:
+                self._abort(upload_id)
+            self.state_store.delete(self.bucket, self.key, self.sha256)
+            return None, {}
+        done: Dict[int, dict] = {}
+        try:
+            paginator = self.client.get_paginator("list_parts")
+            for page in paginator.paginate(Bucket=self.bucket, Key=self.key, UploadId=upload_id):
+                for part in page.get("Parts", []):
+                    number = part["PartNumber"]
+                    if part.get("ChecksumSHA256") and part.get("Size") == self._expected_size(number):
+                        done[number] = {
+                            "PartNumber": number,
+                            "ETag": part["ETag"],
+                            "ChecksumSHA256": part["ChecksumSHA256"],
+                        }
+        except ClientError:
+            # Upload abgelaufen oder abgebrochen (NoSuchUpload)
+            self.state_store.delete(self.bucket, self.key, self.sha256)
+            return None, {}
+        return upload_id, done
+
+    def _abort(self, upload_id: str) -> None:
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=upload_id)
+        except ClientError:
+            pass
@@ -1,19 +1,45 @@
 import io
 import os
 import tempfile
+import threading
 import time
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, NamedTuple, Optional
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config as BotoConfig
 
 from ..config import get_settings
+from .disk_cache import get_disk_cache
+from .s3_multipart import MultipartUpload
 
 settings = get_settings()
 
 
+class ObjectStat(NamedTuple):
+    size: int
+    etag: str  # inkl. Anführungszeichen, direkt als ETag-Header verwendbar
+    last_modified: Optional[datetime]
+
+
+def _iter_file(path, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+    remaining = end - start + 1
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
 class StorageProvider:
+    # Puffergröße beim Streamen: begrenzt den Speicher pro Stream
+    chunk_size = 256 * 1024
+
     def save_file(self, key: str, local_path: str) -> str:
         raise NotImplementedError
 
@@ -26,6 +52,35 @@ class StorageProvider:
     def read_bytes_uri(self, uri: str) -> bytes:
         raise NotImplementedError
 
+    def stat_uri(self, uri: str) -> ObjectStat:
+        """Größe, ETag und Änderungszeit ohne den Inhalt zu lesen. Raises: FileNotFoundError."""
+        raise NotImplementedError
+
+    def iter_range(
+        self, uri: str, start: int, end: int, chunk_size: Optional[int] = None, version: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """
+        Liefert die Bytes start..end (inklusive) in Blöcken von höchstens chunk_size.
+        `version` ist der ETag aus einem vorherigen stat_uri(); damit entfällt ein erneutes Stat.
+        """
+        raise NotImplementedError
+
+    def delete_uri(self, uri: str) -> None:
+        """Löscht das Objekt; ein bereits fehlendes Objekt ist kein Fehler."""
+        raise NotImplementedError
+
+    def local_path(self, uri: str) -> Optional[Path]:
+        """Dateipfad für sendfile/X-Accel-Redirect, None wenn das Objekt nicht lokal liegt."""
+        return None
+
+    def fetch_to_local(self, uri: str) -> Path:
+        """Lokaler Dateipfad zum Objekt (nur lesen); entfernte Objekte landen dafür im Disk-Cache."""
+        raise NotImplementedError
+
+    def presigned_download_url(self, uri: str, filename: str, media_type: str, expires: Optional[int] = None) -> Optional[str]:
+        """Direkter Download-Link am API-Server vorbei, None wenn der Provider keine Links signiert."""
+        return None
+
 
 class LocalStorage(StorageProvider):
     def __init__(self, base_path: Optional[str] = None):
@@ -63,6 +118,62 @@ class LocalStorage(StorageProvider):
     def read_bytes_uri(self, uri: str) -> bytes:
         return Path(uri).read_bytes()
 
+    def delete_uri(self, uri: str) -> None:
+        Path(uri).unlink(missing_ok=True)
+
+    def local_path(self, uri: str) -> Optional[Path]:
+        return Path(uri)
+
+    def fetch_to_local(self, uri: str) -> Path:
+        return Path(uri)
+
+    def stat_uri(self, uri: str) -> ObjectStat:
+        stat = Path(uri).stat()
+        return ObjectStat(
+            size=stat.st_size,
+            etag=f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+            last_modified=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+        )
+
+    def iter_range(
+        self, uri: str, start: int, end: int, chunk_size: Optional[int] = None, version: Optional[str] = None
+    ) -> Iterator[bytes]:
+        return _iter_file(uri, start, end, chunk_size or self.chunk_size)
+
+
+# Prozessweiter S3-Client (boto3-Clients sind threadsicher und teilen einen Verbindungspool)
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """Singleton für den S3-Client."""
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                # Eigene Session: die Default-Session von boto3 ist nicht threadsicher
+                _s3_client = boto3.session.Session().client(
+                    "s3",
+                    endpoint_url=settings.storage_s3_endpoint or None,
+                    aws_access_key_id=settings.storage_s3_access_key,
+                    aws_secret_access_key=settings.storage_s3_secret_key,
+                    region_name=settings.storage_s3_region or None,
+                    config=BotoConfig(
+                        s3={"addressing_style": "path"},
+                        max_pool_connections=settings.storage_s3_max_pool_connections,
+                        retries={"max_attempts": 5, "mode": "standard"},
+                        tcp_keepalive=True,
+                    ),
+                )
+    return _s3_client
+
+
+def reset_s3_client() -> None:
+    """Verwirft den Client, z. B. nach einem Fork (Sockets nicht mit dem Elternprozess teilen)."""
+    global _s3_client
+    _s3_client = None
+
 
 class S3Storage(StorageProvider):
     def __init__(self):
@@ -70,27 +181,37 @@ class S3Storage(StorageProvider):
             raise RuntimeError("S3 storage not configured")
         self.bucket = settings.storage_s3_bucket
         self.prefix = settings.storage_s3_prefix.rstrip("/") if settings.storage_s3_prefix else ""
-        self.client = boto3.client(
-            "s3",
-            endpoint_url=settings.storage_s3_endpoint or None,
-            aws_access_key_id=settings.storage_s3_access_key,
-            aws_secret_access_key=settings.storage_s3_secret_key,
-            region_name=settings.storage_s3_region or None,
-            config=BotoConfig(s3={"addressing_style": "path"}),
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.storage_s3_multipart_threshold,
+            multipart_chunksize=settings.storage_s3_part_size,
+            max_concurrency=settings.storage_s3_upload_concurrency,
         )
 
+    @property
+    def client(self):
+        return get_s3_client()
+
     def _key(self, key: str) -> str:
         return f"{self.prefix}/{key}" if self.prefix else key
 
     def save_file(self, key: str, local_path: str) -> str:
         object_key = self._key(key)
-        with open(local_path, "rb") as f:
-            self.client.upload_fileobj(f, self.bucket, object_key)
+        if os.path.getsize(local_path) >= settings.storage_s3_multipart_threshold:
+            MultipartUpload(
+                self.client,
+                self.bucket,
+                object_key,
+                local_path,
+                part_size=settings.storage_s3_part_size,
+                concurrency=settings.storage_s3_upload_concurrency,
+            ).run()
+        else:
+            self.client.upload_file(local_path, self.bucket, object_key, Config=self.transfer_config)
         return f"s3://{self.bucket}/{object_key}"
 
     def save_bytes(self, key: str, content: bytes) -> str:
         object_key = self._key(key)
-        self.client.upload_fileobj(io.BytesIO(content), self.bucket, object_key)
+        self.client.upload_fileobj(io.BytesIO(content), self.bucket, object_key, Config=self.transfer_config)
         return f"s3://{self.bucket}/{object_key}"
 
     def signed_url(self, key: str, expires: int = 900) -> str:
@@ -101,22 +222,88 @@ class S3Storage(StorageProvider):
             ExpiresIn=expires,
         )
 
-    def read_bytes_uri(self, uri: str) -> bytes:
+    def _locate(self, uri: str) -> tuple[str, str]:
         # uri format s3://bucket/key
         if uri.startswith("s3://"):
             _, rest = uri.split("s3://", 1)
             bucket, key = rest.split("/", 1)
-        else:
-            bucket = self.bucket
-            key = uri
-        response = self.client.get_object(Bucket=bucket, Key=key)
-        return response["Body"].read()
+            return bucket, key
+        return self.bucket, uri
+
+    def read_bytes_uri(self, uri: str) -> bytes:
+        return self.fetch_to_local(uri).read_bytes()
+
+    def delete_uri(self, uri: str) -> None:
+        bucket, key = self._locate(uri)
+        self.client.delete_object(Bucket=bucket, Key=key)
+
+    def _download_to(self, uri: str):
+        bucket, key = self._locate(uri)
+
+        def download(target: Path) -> None:
+            # Parallele Ranged-GETs über den TransferManager
+            self.client.download_file(bucket, key, str(target), Config=self.transfer_config)
+
+        return download
+
+    def fetch_to_local(self, uri: str) -> Path:
+        # ETag im Cache-Schlüssel: überschriebene Objekte werden neu geladen
+        etag = self.stat_uri(uri).etag
+        return get_disk_cache().fill(uri, etag, self._download_to(uri))
+
+    def presigned_download_url(self, uri: str, filename: str, media_type: str, expires: Optional[int] = None) -> Optional[str]:
+        bucket, key = self._locate(uri)
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": bucket,
+                "Key": key,
+                "ResponseContentDisposition": f'attachment; filename="{filename}"',
+                "ResponseContentType": media_type,
+            },
+            ExpiresIn=expires or settings.storage_presign_expires,
+        )
+
+    def stat_uri(self, uri: str) -> ObjectStat:
+        bucket, key = self._locate(uri)
+        try:
+            head = self.client.head_object(Bucket=bucket, Key=key)
+        except self.client.exceptions.ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise FileNotFoundError(uri) from exc
+            raise
+        return ObjectStat(size=head["ContentLength"], etag=head["ETag"], last_modified=head.get("LastModified"))
+
+    def iter_range(
+        self, uri: str, start: int, end: int, chunk_size: Optional[int] = None, version: Optional[str] = None
+    ) -> Iterator[bytes]:
+        cache = get_disk_cache()
+        etag = version or self.stat_uri(uri).etag
+        cached = cache.get(uri, etag)
+        if cached is not None:
+            yield from _iter_file(cached, start, end, chunk_size or self.chunk_size)
+            return
+        # Miss: Ausschnitt direkt per Ranged GetObject liefern, das ganze Objekt im Hintergrund cachen
+        cache.fill_in_background(uri, etag, self._download_to(uri))
+        bucket, key = self._locate(uri)
+        response = self.client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}")
+        body = response["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size or self.chunk_size)
+        finally:
+            body.close()
+
+
+# Globale Instanz
+_storage: Optional[StorageProvider] = None
 
 
 def get_storage() -> StorageProvider:
-    if settings.storage_backend == "s3":
-        return S3Storage()
-    return LocalStorage()
+    """Singleton für den konfigurierten Storage-Provider."""
+    global _storage
+    if _storage is None:
+        _storage = S3Storage() if settings.storage_backend == "s3" else LocalStorage()
+    return _storage
 
 
 def tenant_prefix(org_id: str, project_id: str, post_id: Optional[str] = None) -> str:
@@ -1,17 +1,23 @@
-import httpx
 from pathlib import Path
 from datetime import datetime, timedelta
 import asyncio
 from ..config import get_settings
 from ..security import encrypt_secret, decrypt_secret
-from ..services.rate_limiter import get_rate_limiter
+from ..services.rate_limiter import get_rate_limiter, tiktok_buckets
 from ..services.retry import RetryStrategy, CircuitBreaker
+from .http_client import HttpClientRegistry, get_http_registry, timeout_profile
 
 settings = get_settings()
 
 
 class TikTokClient:
-    def __init__(self, client_key: str | None = None, client_secret: str | None = None, organization_id: str | None = None):
+    def __init__(
+        self,
+        client_key: str | None = None,
+        client_secret: str | None = None,
+        organization_id: str | None = None,
+        http: HttpClientRegistry | None = None,
+    ):
         self.client_key = client_key or settings.tiktok_client_key
         self.client_secret = client_secret or settings.tiktok_client_secret
         self.redirect_uri = settings.tiktok_redirect_uri
@@ -20,6 +26,7 @@ class TikTokClient:
         if not self.client_key or not self.client_secret:
             raise RuntimeError("TikTok credentials not configured")
         self.rate_limiter = get_rate_limiter()
+        self.http = http or get_http_registry()
         # Circuit Breaker: 5 Fehler = OPEN, 60 Sekunden Timeout
         self.circuit_breaker = CircuitBreaker(failure_threshold=5, timeout=60)
 
@@ -38,15 +45,15 @@ class TikTokClient:
         }
 
         async def _request():
-            async with httpx.AsyncClient(timeout=30) as client:
-                resp = await client.post(url, data=data)
-                # Handle rate limit (429)
-                if resp.status_code == 429:
-                    retry_after = int(resp.headers.get("Retry-After", 60))
-                    await asyncio.sleep(retry_after)
-                    resp.raise_for_status()
+            client = self.http.client_for(url)
+            resp = await client.post(url, data=data, timeout=timeout_profile("read"))
+            # Handle rate limit (429)
+            if resp.status_code == 429:
+                retry_after = int(resp.headers.get("Retry-After", 60))
+                await asyncio.sleep(retry_after)
                 resp.raise_for_status()
-                return resp.json()
+            resp.raise_for_status()
+            return resp.json()
 
         return await RetryStrategy.retry_async(
             _request,
@@ -61,14 +68,14 @@ class TikTokClient:
         data = {"client_key": self.client_key, "client_secret": self.client_secret, "grant_type": "refresh_token", "refresh_token": refresh_token}
 
         async def _request():
-            async with httpx.AsyncClient(timeout=30) as client:
-                resp = await client.post(url, data=data)
-                if resp.status_code == 429:
-                    retry_after = int(resp.headers.get("Retry-After", 60))
-                    await asyncio.sleep(retry_after)
-                    resp.raise_for_status()
+            client = self.http.client_for(url)
+            resp = await client.post(url, data=data, timeout=timeout_profile("read"))
+            if resp.status_code == 429:
+                retry_after = int(resp.headers.get("Retry-After", 60))
+                await asyncio.sleep(retry_after)
                 resp.raise_for_status()
-                return resp.json()
+            resp.raise_for_status()
+            return resp.json()
 
         return await RetryStrategy.retry_async(
             _request,
@@ -79,8 +86,8 @@ class TikTokClient:
         )
 
     async def upload_video(self, access_token: str, open_id: str, video_path: str, caption: str, idempotency_key: str | None = None) -> dict:
-        # Rate limiting: TikTok Upload Limits (ca. 10/min pro Org)
-        self.rate_limiter.wait_if_needed(self.organization_id, "upload", tokens=1, capacity=10, refill_rate=10.0 / 60.0)
+        # Rate limiting: TikTok Upload Limits (App, Org und Account gleichzeitig)
+        await self.rate_limiter.acquire_buckets(tiktok_buckets(self.organization_id, "upload", open_id))
         
         url = f"{self.base}/video/upload/"
         data = {"access_token": access_token, "open_id": open_id, "text": caption, "is_aigc": True}
@@ -89,16 +96,17 @@ class TikTokClient:
             headers["X-Tt-Idempotency-Id"] = idempotency_key
 
         async def _request():
-            async with httpx.AsyncClient(timeout=120) as client:  # Längeres Timeout für Uploads
-                with open(video_path, "rb") as f:
-                    files = {"video": (Path(video_path).name, f, "video/mp4")}
-                    resp = await client.post(url, data=data, files=files, headers=headers)
-                if resp.status_code == 429:
-                    retry_after = int(resp.headers.get("Retry-After", 60))
-                    await asyncio.sleep(retry_after)
-                    resp.raise_for_status()
+            client = self.http.client_for(url)
+            with open(video_path, "rb") as f:
+                files = {"video": (Path(video_path).name, f, "video/mp4")}
+                # Längeres Timeout für Uploads
+                resp = await client.post(url, data=data, files=files, headers=headers, timeout=timeout_profile("upload"))
+            if resp.status_code == 429:
+                retry_after = int(resp.headers.get("Retry-After", 60))
+                await asyncio.sleep(retry_after)
                 resp.raise_for_status()
-                return resp.json()
+            resp.raise_for_status()
+            return resp.json()
 
         return await RetryStrategy.retry_async(
             _request,
@@ -113,7 +121,7 @@ class TikTokClient:
         Inbox-Fallback (sofern API/Policy es verlangt). Nutzt identischen Endpoint mit Inbox-Flag.
         """
         # Rate limiting
-        self.rate_limiter.wait_if_needed(self.organization_id, "upload", tokens=1, capacity=10, refill_rate=10.0 / 60.0)
+        await self.rate_limiter.acquire_buckets(tiktok_buckets(self.organization_id, "upload", open_id))
         
         url = f"{self.base}/video/upload/"
         data = {"access_token": access_token, "open_id": open_id, "text": caption, "is_aigc": True, "post_mode": "inbox"}
@@ -122,16 +130,17 @@ class TikTokClient:
             headers["X-Tt-Idempotency-Id"] = idempotency_key
 
         async def _request():
-            async with httpx.AsyncClient(timeout=120) as client:
-                with open(video_path, "rb") as f:
-                    files = {"video": (Path(video_path).name, f, "video/mp4")}
-                    resp = await client.post(url, data=data, files=files, headers=headers)
-                if resp.status_code == 429:
-                    retry_after = int(resp.headers.get("Retry-After", 60))
-                    await asyncio.sleep(retry_after)
-                    resp.raise_for_status()
+            client = self.http.client_for(url)
+            with open(video_path, "rb") as f:
+                files = {"video": (Path(video_path).name, f, "video/mp4")}
+                # Längeres Timeout für Uploads
+                resp = await client.post(url, data=data, files=files, headers=headers, timeout=timeout_profile("upload"))
+            if resp.status_code == 429:
+                retry_after = int(resp.headers.get("Retry-After", 60))
+                await asyncio.sleep(retry_after)
                 resp.raise_for_status()
-                return resp.json()
+            resp.raise_for_status()
+            return resp.json()
 
         return await RetryStrategy.retry_async(
             _request,
@@ -142,21 +151,21 @@ class TikTokClient:
         )
 
     async def get_metrics(self, access_token: str, open_id: str) -> dict:
-        # Rate limiting: Read operations (ca. 100/min)
-        self.rate_limiter.wait_if_needed(self.organization_id, "read", tokens=1, capacity=100, refill_rate=100.0 / 60.0)
+        # Rate limiting: Read operations (App, Org und Account gleichzeitig)
+        await self.rate_limiter.acquire_buckets(tiktok_buckets(self.organization_id, "read", open_id))
         
         url = f"{self.base}/video/list/"
         params = {"access_token": access_token, "open_id": open_id}
 
         async def _request():
-            async with httpx.AsyncClient(timeout=30) as client:
-                resp = await client.get(url, params=params)
-                if resp.status_code == 429:
-                    retry_after = int(resp.headers.get("Retry-After", 60))
-                    await asyncio.sleep(retry_after)
-                    resp.raise_for_status()
+            client = self.http.client_for(url)
+            resp = await client.get(url, params=params, timeout=timeout_profile("read"))
+            if resp.status_code == 429:
+                retry_after = int(resp.headers.get("Retry-After", 60))
+                await asyncio.sleep(retry_after)
                 resp.raise_for_status()
-                return resp.json()
+            resp.raise_for_status()
+            return resp.json()
 
         return await RetryStrategy.retry_async(
             _request,
@@ -166,22 +175,23 @@ class TikTokClient:
             circuit_breaker=self.circuit_breaker,
         )
 
-    async def get_video_status(self, access_token: str, open_id: str, video_id: str) -> dict:
-        # Rate limiting: Read operations
-        self.rate_limiter.wait_if_needed(self.organization_id, "read", tokens=1, capacity=100, refill_rate=100.0 / 60.0)
-        
+    async def get_video_status(self, access_token: str, open_id: str, video_id: str, acquire_slot: bool = True) -> dict:
+        # Rate limiting: Read operations (acquire_slot=False wenn der Aufrufer den Slot bereits reserviert hat)
+        if acquire_slot:
+            await self.rate_limiter.acquire_buckets(tiktok_buckets(self.organization_id, "read", open_id))
+
         url = f"{self.base}/video/query/"
         params = {"access_token": access_token, "open_id": open_id, "video_id": video_id}
 
         async def _request():
-            async with httpx.AsyncClient(timeout=30) as client:
-                resp = await client.get(url, params=params)
-                if resp.status_code == 429:
-                    retry_after = int(resp.headers.get("Retry-After", 60))
-                    await asyncio.sleep(retry_after)
-                    resp.raise_for_status()
+            client = self.http.client_for(url)
+            resp = await client.get(url, params=params, timeout=timeout_profile("read"))
+            if resp.status_code == 429:
+                retry_after = int(resp.headers.get("Retry-After", 60))
+                await asyncio.sleep(retry_after)
                 resp.raise_for_status()
-                return resp.json()
+            resp.raise_for_status()
+            return resp.json()
     
         return await RetryStrategy.retry_async(
             _request,
@@ -1,6 +1,8 @@
+import asyncio
 import httpx
 from typing import Optional, Dict, List
 from ..config import get_settings
+from .http_client import HttpClientRegistry, get_http_registry, timeout_profile
 
 settings = get_settings()
 
@@ -8,10 +10,11 @@ settings = get_settings()
 class VoiceTranslationClient:
     """Basis-Klasse für Voice Translation/Cloning Provider"""
     
-    def __init__(self, api_key: str, provider: str):
+    def __init__(self, api_key: str, provider: str, http: HttpClientRegistry | None = None):
         self.api_key = api_key
         self.provider = provider
         self.base_url = self._get_base_url(provider)
+        self.http = http or get_http_registry()
     
     def _get_base_url(self, provider: str) -> str:
         """Gibt die Base-URL für den Provider zurück"""
@@ -103,28 +106,30 @@ class VoiceTranslationClient:
             "preserve_voice": True
         }
         
-        async with httpx.AsyncClient(timeout=600.0) as client:
-            # Starte Übersetzung
-            response = await client.post(
-                f"{self.base_url}/translate",
-                json=payload,
-                headers=headers
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            # Rask.ai gibt typischerweise eine Job-ID zurück
-            job_id = result.get("job_id") or result.get("id")
-            if job_id:
-                # Polling für Status
-                return await self._poll_rask_status(client, job_id, headers)
-            
-            # Falls direktes Ergebnis
-            return {
-                "video_url": result.get("video_url") or result.get("url"),
-                "audio_url": result.get("audio_url"),
-                "status": "completed"
-            }
+        url = f"{self.base_url}/translate"
+        client = self.http.client_for(url)
+        # Starte Übersetzung
+        response = await client.post(
+            url,
+            json=payload,
+            headers=headers,
+            timeout=timeout_profile("upload"),
+        )
+        response.raise_for_status()
+        result = response.json()
+        
+        # Rask.ai gibt typischerweise eine Job-ID zurück
+        job_id = result.get("job_id") or result.get("id")
+        if job_id:
+            # Polling für Status
+            return await self._poll_rask_status(client, job_id, headers)
+        
+        # Falls direktes Ergebnis
+        return {
+            "video_url": result.get("video_url") or result.get("url"),
+            "audio_url": result.get("audio_url"),
+            "status": "completed"
+        }
     
     async def _poll_rask_status(
         self,
@@ -141,7 +146,8 @@ class VoiceTranslationClient:
             try:
                 response = await client.get(
                     f"{self.base_url}/jobs/{job_id}",
-                    headers=headers
+                    headers=headers,
+                    timeout=timeout_profile("read"),
                 )
                 response.raise_for_status()
                 status_data = response.json()
@@ -209,24 +215,26 @@ class VoiceTranslationClient:
             "model": model_id or "heygen/voice-clone-v1"
         }
         
-        async with httpx.AsyncClient(timeout=600.0) as client:
-            response = await client.post(
-                f"{self.base_url}/video/translate",
-                json=payload,
-                headers=headers
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            job_id = result.get("job_id") or result.get("id")
-            if job_id:
-                return await self._poll_heygen_status(client, job_id, headers)
-            
-            return {
-                "video_url": result.get("video_url") or result.get("url"),
-                "audio_url": result.get("audio_url"),
-                "status": "completed"
-            }
+        url = f"{self.base_url}/video/translate"
+        client = self.http.client_for(url)
+        response = await client.post(
+            url,
+            json=payload,
+            headers=headers,
+            timeout=timeout_profile("upload"),
+        )
+        response.raise_for_status()
+        result = response.json()
+        
+        job_id = result.get("job_id") or result.get("id")
+        if job_id:
+            return await self._poll_heygen_status(client, job_id, headers)
+        
+        return {
+            "video_url": result.get("video_url") or result.get("url"),
+            "audio_url": result.get("audio_url"),
+            "status": "completed"
+        }
     
     async def _poll_heygen_status(
         self,
@@ -237,14 +245,14 @@ class VoiceTranslationClient:
         poll_interval: float = 5.0
     ) -> Dict:
         """Pollt HeyGen Übersetzungs-Status"""
-        import asyncio
         for attempt in range(max_attempts):
             await asyncio.sleep(poll_interval)
             
             try:
                 response = await client.get(
                     f"{self.base_url}/jobs/{job_id}",
-                    headers=headers
+                    headers=headers,
+                    timeout=timeout_profile("read"),
                 )
                 response.raise_for_status()
                 status_data = response.json()
@@ -301,24 +309,26 @@ class VoiceTranslationClient:
             "voice_clone": True
         }
         
-        async with httpx.AsyncClient(timeout=600.0) as client:
-            response = await client.post(
-                f"{self.base_url}/dubbing",
-                json=payload,
-                headers=headers
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            job_id = result.get("dubbing_id") or result.get("id")
-            if job_id:
-                return await self._poll_elevenlabs_status(client, job_id, headers)
-            
-            return {
-                "video_url": result.get("video_url") or result.get("url"),
-                "audio_url": result.get("audio_url"),
-                "status": "completed"
-            }
+        url = f"{self.base_url}/dubbing"
+        client = self.http.client_for(url)
+        response = await client.post(
+            url,
+            json=payload,
+            headers=headers,
+            timeout=timeout_profile("upload"),
+        )
+        response.raise_for_status()
+        result = response.json()
+        
+        job_id = result.get("dubbing_id") or result.get("id")
+        if job_id:
+            return await self._poll_elevenlabs_status(client, job_id, headers)
+        
+        return {
+            "video_url": result.get("video_url") or result.get("url"),
+            "audio_url": result.get("audio_url"),
+            "status": "completed"
+        }
     
     async def _poll_elevenlabs_status(
         self,
@@ -329,14 +339,14 @@ class VoiceTranslationClient:
         poll_interval: float = 5.0
     ) -> Dict:
         """Pollt ElevenLabs Übersetzungs-Status"""
-        import asyncio
         for attempt in range(max_attempts):
             await asyncio.sleep(poll_interval)
             
             try:
                 response = await client.get(
                     f"{self.base_url}/dubbing/{job_id}",
-                    headers=headers
+                    headers=headers,
+                    timeout=timeout_profile("read"),
                 )
                 response.raise_for_status()
                 status_data = response.json()
@@ -393,24 +403,26 @@ class VoiceTranslationClient:
             "preserve_voice": True
         }
         
-        async with httpx.AsyncClient(timeout=600.0) as client:
-            response = await client.post(
-                f"{self.base_url}/fal-ai/voice-clone",
-                json=payload,
-                headers=headers
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            job_id = result.get("request_id") or result.get("id")
-            if job_id:
-                return await self._poll_falai_voice_status(client, model_id or "fal-ai/voice-clone", job_id, headers)
-            
-            return {
-                "video_url": result.get("video_url") or result.get("url"),
-                "audio_url": result.get("audio_url"),
-                "status": "completed"
-            }
+        url = f"{self.base_url}/fal-ai/voice-clone"
+        client = self.http.client_for(url)
+        response = await client.post(
+            url,
+            json=payload,
+            headers=headers,
+            timeout=timeout_profile("upload"),
+        )
+        response.raise_for_status()
+        result = response.json()
+        
+        job_id = result.get("request_id") or result.get("id")
+        if job_id:
+            return await self._poll_falai_voice_status(client, model_id or "fal-ai/voice-clone", job_id, headers)
+        
+        return {
+            "video_url": result.get("video_url") or result.get("url"),
+            "audio_url": result.get("audio_url"),
+            "status": "completed"
+        }
     
     async def _poll_falai_voice_status(
         self,
@@ -422,14 +434,13 @@ class VoiceTranslationClient:
         poll_interval: float = 5.0
     ) -> Dict:
         """Pollt Fal.ai Voice Cloning Status"""
-        import asyncio
         status_url = f"{self.base_url}/{model_id}/status/{job_id}"
         
         for attempt in range(max_attempts):
             await asyncio.sleep(poll_interval)
             
             try:
-                response = await client.get(status_url, headers=headers)
+                response = await client.get(status_url, headers=headers, timeout=timeout_profile("read"))
                 response.raise_for_status()
                 status_data = response.json()
                 
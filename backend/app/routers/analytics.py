@@ -1,28 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from .. import models
-from ..auth import get_current_user, get_db
+from ..auth import get_current_user, get_db, use_replica
 from ..authorization import assert_project_member
 from ..providers.tiktok_official import TikTokClient
 from ..security import decrypt_secret
 from ..config import get_settings
 from ..celery_app import celery
+from ..services import analytics as analytics_service
+from ..services import metrics as metrics_service
 
 settings = get_settings()
 
 router = APIRouter()
 
 
-@router.get("/metrics/{project_id}")
-def list_metrics(project_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+@router.get("/metrics/{project_id}", dependencies=[Depends(use_replica)])
+def list_metrics(
+    project_id: str,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    plan_id: str | None = None,
+    limit: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Liest aus den vorberechneten Rollups (letzte `limit` Buckets), nicht aus den Roh-Snapshots."""
     project = assert_project_member(db, user, project_id)
-    metrics = (
-        db.query(models.Metric)
-        .filter(models.Metric.project_id == project_id)
-        .order_by(models.Metric.created_at.desc())
-        .all()
-    )
-    return {"metrics": [{"metric": m.metric, "value": m.value, "created_at": m.created_at} for m in metrics]}
+    rollups = metrics_service.list_rollups(db, project.id, granularity=granularity, plan_id=plan_id, limit=limit)
+    return {
+        "granularity": granularity,
+        "metrics": [
+            {"metric": r.metric, "value": r.value, "created_at": r.bucket_start, "plan_id": r.plan_id}
+            for r in rollups
+        ],
+    }
+
+
+@router.get("/aggregate/{project_id}", dependencies=[Depends(use_replica)])
+def aggregate_metrics(
+    project_id: str,
+    metric: str = Query("views"),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    bucket: str = Query("day", pattern="^(hour|day)$"),
+    group_by: str = Query("project", pattern="^(project|plan|video)$"),
+    max_points: int | None = Query(None, ge=3, le=5000),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Aggregierte Zeitreihen (Wert, Delta, Wachstum) pro Projekt/Plan/Video, optional per LTTB ausgedünnt."""
+    project = assert_project_member(db, user, project_id)
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=30)
+    try:
+        series = analytics_service.aggregate_series(
+            db, project.id, metric, start, end, bucket=bucket, group_by=group_by, max_points=max_points
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"metric": metric, "bucket": bucket, "group_by": group_by, "start": start, "end": end, "series": series}
 
 
 @router.post("/metrics/{project_id}/refresh")
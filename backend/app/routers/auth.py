@@ -11,6 +11,7 @@ from ..auth import (
     create_session,
     validate_refresh,
     revoke_session,
+    revoke_user_sessions,
     get_current_session,
     hash_token_value,
 )
@@ -104,6 +105,8 @@ def password_reset_confirm(payload: schemas.PasswordResetConfirm, db: Session =
     reset.used_at = datetime.utcnow()
     db.add_all([user, reset])
     db.commit()
+    # Bestehende Logins mit dem alten Passwort beenden (inkl. Auth-Cache)
+    revoke_user_sessions(db, user.id)
     return {"detail": "password updated"}
 
 
@@ -46,3 +46,13 @@ def readyz():
         )
     
     return {"status": "ready"}
+
+
+@router.get("/storage-cache")
+def storage_cache():
+    """Hit/Miss-Statistik des knotenlokalen Storage-Caches (nur bei S3-Storage aktiv)"""
+    if settings.storage_backend != "s3":
+        return {"enabled": False}
+    from ..providers.disk_cache import get_disk_cache
+
+    return {"enabled": True, **get_disk_cache().stats()}
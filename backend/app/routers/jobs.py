@@ -1,28 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import json
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, selectinload
 from .. import models, schemas
-from ..auth import get_current_user, get_db
-from ..authorization import assert_project_member
+from ..auth import get_current_user, get_db, use_replica
+from ..authorization import assert_project_member, assert_projects_member
+from ..services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
+from ..services.progress import TERMINAL_JOB_STATUSES, get_progress_bus
 
 router = APIRouter()
 
 
-@router.get("/{project_id}", response_model=dict)
-def list_jobs(project_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+@router.get("/{project_id}", response_model=dict, dependencies=[Depends(use_replica)])
+def list_jobs(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    active: bool = False,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Seite der Jobs des Projekts UND der org-level Jobs, neueste zuerst (Keyset-Cursor).
+    active=true liefert nur laufende Jobs (Status-Polling), auch wenn sie älter als die erste Seite sind.
+    """
     project = assert_project_member(db, user, project_id)
-    # Hole Jobs für Projekt UND org-level Jobs (z.B. Transcription ohne project_id)
-    project_jobs = db.query(models.Job).filter(models.Job.project_id == project_id).all()
-    org_jobs = db.query(models.Job).filter(
-        models.Job.organization_id == project.organization_id,
-        models.Job.project_id.is_(None)  # Org-level Jobs ohne Projekt
-    ).all()
-    # Kombiniere und sortiere nach created_at
-    all_jobs = sorted(project_jobs + org_jobs, key=lambda j: j.created_at, reverse=True)
-    return {"jobs": [schemas.JobOut.model_validate(j) for j in all_jobs]}
-
-
-@router.get("/detail/{job_id}", response_model=schemas.JobOut)
-def job_detail(job_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    # Org-level Jobs (z.B. Transcription ohne project_id) in derselben Query
+    query = db.query(models.Job).options(selectinload(models.Job.runs)).filter(
+        or_(
+            models.Job.project_id == project_id,
+            and_(models.Job.organization_id == project.organization_id, models.Job.project_id.is_(None)),
+        )
+    )
+    if active:
+        query = query.filter(models.Job.status.notin_(TERMINAL_JOB_STATUSES))
+    try:
+        jobs, next_cursor = keyset_page(query, models.Job, cursor, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"jobs": [schemas.JobOut.model_validate(j) for j in jobs], "next_cursor": next_cursor}
+
+
+@router.get("/", response_model=dict, dependencies=[Depends(use_replica)])
+def list_jobs_for_projects(
+    project_ids: List[str] = Query(...),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Seite der Jobs mehrerer Projekte (z. B. Dashboard), neueste zuerst; Zugriff für alle IDs in einer Query geprüft."""
+    if len(project_ids) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAGE_SIZE} project_ids")
+    projects = assert_projects_member(db, user, project_ids)
+    query = db.query(models.Job).options(selectinload(models.Job.runs)).filter(models.Job.project_id.in_(list(projects)))
+    try:
+        jobs, next_cursor = keyset_page(query, models.Job, cursor, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"jobs": [schemas.JobOut.model_validate(j) for j in jobs], "next_cursor": next_cursor}
+
+
+def _accessible_job(db: Session, user, job_id: str) -> models.Job:
     job = db.query(models.Job).filter(models.Job.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -34,3 +75,35 @@ def job_detail(job_id: str, db: Session = Depends(get_db), user=Depends(get_curr
         from ..authorization import assert_org_member
         assert_org_member(db, user, job.organization_id)
     return job
+
+
+@router.get("/detail/{job_id}", response_model=schemas.JobOut, dependencies=[Depends(use_replica)])
+def job_detail(job_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    return _accessible_job(db, user, job_id)
+
+
+def _sse(event: dict) -> str:
+    return f"event: progress\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/stream/{job_id}")
+async def job_stream(job_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    """Server-Sent Events mit dem Fortschritt eines Jobs; endet nach completed/failed."""
+    job = _accessible_job(db, user, job_id)
+    snapshot = {"job_id": job.id, "status": job.status}
+    # DB-Verbindung nicht für die Dauer des Streams halten
+    db.close()
+
+    async def events():
+        yield _sse(snapshot)
+        if snapshot["status"] in TERMINAL_JOB_STATUSES:
+            return
+        # Bei Client-Abbruch bricht Starlette den Generator ab, subscribe() räumt das Abo auf
+        async for event in get_progress_bus().subscribe(job_id):
+            yield _sse(event) if event is not None else ": keepalive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
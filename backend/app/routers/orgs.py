@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from .. import models, schemas
 from ..auth import get_current_user, get_db
+from ..authorization import org_roles
 
 router = APIRouter()
 
@@ -20,8 +21,5 @@ def create_org(payload: schemas.OrganizationCreate, db: Session = Depends(get_db
 
 @router.get("/", response_model=list[schemas.OrganizationOut])
 def list_orgs(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    org_ids = [
-        membership.organization_id
-        for membership in db.query(models.Membership).filter(models.Membership.user_id == user.id).all()
-    ]
+    org_ids = list(org_roles(db, user))
     return db.query(models.Organization).filter(models.Organization.id.in_(org_ids)).all()
@@ -1,55 +1,90 @@
 from datetime import date, timedelta
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import anyio
 from .. import models, schemas
-from ..auth import get_current_user, get_db
+from ..auth import get_current_user, get_db, use_replica
 from ..authorization import assert_project_member, assert_plan_member
 from ..services.orchestrator import Orchestrator
 from ..providers.openrouter_client import OpenRouterClient
-from ..security import decrypt_secret
+from ..services.credential_secrets import resolve_credential_secret
 from ..config import get_settings
 
 router = APIRouter()
 settings = get_settings()
 
+# Kalender wird in Tagesfenstern ausgeliefert statt alle Pläne des Projekts auf einmal
+CALENDAR_PAGE_DAYS = 31
+MAX_CALENDAR_PAGE_DAYS = 92
+
 
 @router.post("/generate/{project_id}", response_model=list[schemas.PlanOut])
 def generate_calendar(project_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    """Legt fehlende Slots der nächsten 30 Tage an und gibt nur dieses Fenster zurück."""
     project = assert_project_member(db, user, project_id)
     start_date = date.today()
-    created = []
+    end_date = start_date + timedelta(days=29)
+    window = (
+        db.query(models.Plan)
+        .filter(
+            models.Plan.project_id == project_id,
+            models.Plan.slot_date >= start_date,
+            models.Plan.slot_date <= end_date,
+        )
+    )
+    # Bestehende Slots in einer Query statt einer Abfrage pro Slot
+    existing = {(plan.slot_date, plan.slot_index) for plan in window.with_entities(models.Plan.slot_date, models.Plan.slot_index)}
     for day in range(30):
         for slot in range(1, 4):
-            existing = (
-                db.query(models.Plan)
-                .filter(
-                    models.Plan.project_id == project_id,
-                    models.Plan.slot_date == start_date + timedelta(days=day),
-                    models.Plan.slot_index == slot,
-                )
-                .first()
-            )
-            if existing:
+            slot_date = start_date + timedelta(days=day)
+            if (slot_date, slot) in existing:
                 continue
-            plan = models.Plan(
+            db.add(models.Plan(
                 organization_id=project.organization_id,
                 project_id=project_id,
-                slot_date=start_date + timedelta(days=day),
+                slot_date=slot_date,
                 slot_index=slot,
                 status="scheduled",
-            )
-            db.add(plan)
-            created.append(plan)
+            ))
     db.commit()
-    return db.query(models.Plan).filter(models.Plan.project_id == project_id).all()
+    return window.order_by(models.Plan.slot_date, models.Plan.slot_index).all()
 
 
-@router.get("/calendar/{project_id}", response_model=list[schemas.CalendarSlot])
-def get_calendar(project_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+@router.get("/calendar/{project_id}", response_model=list[schemas.CalendarSlot], dependencies=[Depends(use_replica)])
+def get_calendar(
+    project_id: str,
+    response: Response,
+    cursor: Optional[date] = None,
+    days: int = Query(CALENDAR_PAGE_DAYS, ge=1, le=MAX_CALENDAR_PAGE_DAYS),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Kalender-Fenster von `days` Tagen ab `cursor` (Default: Tag des ersten Plans), aufsteigend.
+    Der Starttag des nächsten Fensters mit Plänen steht im Header X-Next-Cursor.
+    """
     project = assert_project_member(db, user, project_id)
-    plans = db.query(models.Plan).filter(models.Plan.project_id == project_id).order_by(models.Plan.slot_date, models.Plan.slot_index).all()
+    project_plans = db.query(models.Plan).filter(models.Plan.project_id == project_id)
+    start = cursor or project_plans.with_entities(func.min(models.Plan.slot_date)).scalar()
+    if start is None:
+        return []
+    end = start + timedelta(days=days)
+    plans = (
+        project_plans.filter(models.Plan.slot_date >= start, models.Plan.slot_date < end)
+        .order_by(models.Plan.slot_date, models.Plan.slot_index)
+        .all()
+    )
+    next_date = (
+        project_plans.with_entities(models.Plan.slot_date)
+        .filter(models.Plan.slot_date >= end)
+        .order_by(models.Plan.slot_date)
+        .limit(1)
+        .scalar()
+    )
+    if next_date:
+        response.headers["X-Next-Cursor"] = next_date.isoformat()
     by_date = {}
     for plan in plans:
         by_date.setdefault(plan.slot_date, []).append(plan)
@@ -98,7 +133,7 @@ async def generate_content_plan(
     if not credential:
         raise HTTPException(status_code=400, detail="OpenRouter API-Key nicht gefunden. Bitte im Credentials-Tab hinzufügen.")
     
-    api_key = decrypt_secret(credential.encrypted_secret, settings.fernet_secret)
+    api_key = resolve_credential_secret(credential)
     if not api_key:
         raise HTTPException(status_code=500, detail="Fehler beim Entschlüsseln des API-Keys")
     
@@ -233,7 +268,7 @@ async def generate_script(
     if not credential:
         raise HTTPException(status_code=400, detail="OpenRouter API-Key nicht gefunden.")
     
-    api_key = decrypt_secret(credential.encrypted_secret, settings.fernet_secret)
+    api_key = resolve_credential_secret(credential)
     if not api_key:
         raise HTTPException(status_code=500, detail="Fehler beim Entschlüsseln des API-Keys")
     
@@ -335,7 +370,7 @@ Antworte NUR mit gültigem JSON, keine zusätzlichen Erklärungen."""
         raise HTTPException(status_code=500, detail=f"Fehler bei Script-Generierung: {str(e)}")
 
 
-@router.get("/day/{project_id}/{day_date}", response_model=List[schemas.PlanOut])
+@router.get("/day/{project_id}/{day_date}", response_model=List[schemas.PlanOut], dependencies=[Depends(use_replica)])
 def get_day_plans(
     project_id: str,
     day_date: date,
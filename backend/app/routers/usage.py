@@ -1,25 +1,72 @@
-from fastapi import APIRouter, Depends
+import hashlib
+import json
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from ..auth import get_current_user, get_db
+from ..auth import get_current_user, get_db, use_replica
 from ..authorization import assert_org_member
 from .. import models
 
 router = APIRouter()
 
 
-@router.get("/{org_id}")
-def usage_snapshot(org_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+def _month_start(months_back: int = 0) -> date:
+    # UTC wie usage_writer (Rollup-Perioden aus created_at = utcnow), nicht die Server-Zeitzone
+    today = datetime.utcnow().date()
+    index = today.year * 12 + today.month - 1 - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _etag_response(request: Request, response: Response, payload: dict):
+    """Schwaches ETag über den Inhalt; bei passendem If-None-Match nur 304 ohne Body."""
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    etag = f'W/"{hashlib.sha1(body.encode()).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return payload
+
+
+@router.get("/{org_id}", dependencies=[Depends(use_replica)])
+def usage_snapshot(org_id: str, request: Request, response: Response, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    """Summen des laufenden Monats aus usage_monthly (plus aktive Jobs)."""
     assert_org_member(db, user, org_id)
-    start = None
-    totals = {}
-    rows = db.query(models.UsageLedger.metric, func.count(models.UsageLedger.id)).filter(models.UsageLedger.organization_id == org_id).group_by(models.UsageLedger.metric).all()
-    for metric, cnt in rows:
-        totals[metric] = cnt
+    period = _month_start()
+    rows = (
+        db.query(models.UsageMonthly.metric, models.UsageMonthly.amount)
+        .filter(models.UsageMonthly.organization_id == org_id, models.UsageMonthly.period == period)
+        .all()
+    )
+    totals = {metric: amount for metric, amount in rows}
     active_jobs = (
         db.query(models.Job)
         .filter(models.Job.organization_id == org_id, models.Job.status.in_(["pending", "in_progress"]))
         .count()
     )
     totals["concurrent_jobs"] = active_jobs
-    return {"usage": totals}
+    return _etag_response(request, response, {"usage": totals, "period": period.isoformat()})
+
+
+@router.get("/{org_id}/trend", dependencies=[Depends(use_replica)])
+def usage_trend(
+    org_id: str,
+    request: Request,
+    response: Response,
+    months: int = Query(12, ge=1, le=36),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Monatssummen der letzten `months` Monate pro Metrik."""
+    assert_org_member(db, user, org_id)
+    rows = (
+        db.query(models.UsageMonthly.metric, models.UsageMonthly.period, models.UsageMonthly.amount)
+        .filter(models.UsageMonthly.organization_id == org_id, models.UsageMonthly.period >= _month_start(months - 1))
+        .order_by(models.UsageMonthly.metric, models.UsageMonthly.period)
+        .all()
+    )
+    trend: dict[str, list[dict]] = {}
+    for metric, period, amount in rows:
+        trend.setdefault(metric, []).append({"period": period.isoformat(), "amount": amount})
+    return _etag_response(request, response, {"months": months, "metrics": trend})
@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, status
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request, Response, status
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from .. import models, schemas
-from ..auth import get_current_user, get_db
+from ..auth import get_current_user, get_db, use_replica
 from ..authorization import assert_project_member, assert_org_member
 from ..security import decrypt_secret
+from ..services.credential_secrets import resolve_credential_secret
 from ..services.orchestrator import Orchestrator
 from ..services.usage import enforce_quota, log_usage, QuotaExceeded
 from ..services.idempotency import IdempotencyService
+from ..services import publish_tracking
+from ..services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
+from ..services.blob_store import VIDEO_ASSET, release_refs
+from ..services.range_streaming import download_response, range_response
 from ..providers.storage import get_storage
-from fastapi.responses import StreamingResponse
 from ..celery_app import celery
 from typing import List, Dict, Optional
 from ..providers.tiktok_official import TikTokClient
@@ -63,7 +68,7 @@ async def list_video_models(
             models.Credential.organization_id == req.org_id
         ).first()
         if credential:
-            api_key = decrypt_secret(credential.encrypted_secret, settings.fernet_secret)
+            api_key = resolve_credential_secret(credential)
             provider = credential.provider or "openrouter"
     
     if not api_key and req.api_key:
@@ -203,7 +208,7 @@ async def list_video_generation_models(
             models.Credential.organization_id == req.org_id
         ).first()
         if credential:
-            api_key = decrypt_secret(credential.encrypted_secret, settings.fernet_secret)
+            api_key = resolve_credential_secret(credential)
             provider = credential.provider or "falai"
     
     if not api_key and req.api_key:
@@ -330,7 +335,7 @@ async def generate_video_asset(project_id: str, plan_id: str, db: Session = Depe
         )
     
     # New job created - enqueue task
-    log_usage(db, project.organization_id, metric="video_generation")
+    log_usage(db, project.organization_id, metric="video_generation", dedup_key=f"video_generation:{job.id}")
     celery.send_task("tasks.generate_assets", args=[job.id, project.id, plan.id])
     return schemas.VideoGenerateResponse(
         job_id=job.id,
@@ -427,7 +432,7 @@ async def publish_now(
         return {"status": job.status if job else "pending", "job_id": job.id if job else None}
     
     # New job created - enqueue task
-    log_usage(db, org_id, metric="publish_now")
+    log_usage(db, org_id, metric="publish_now", dedup_key=f"publish_now:{job.id}")
     celery.send_task("tasks.publish_now", args=[job.id, asset.id, access_token, open_id, use_inbox])
     return {"status": "queued", "job_id": job.id}
 
@@ -450,7 +455,8 @@ def get_signed_urls(asset_id: str, db: Session = Depends(get_db), user=Depends(g
 
 
 @router.get("/assets/{asset_id}/stream")
-def stream_asset(asset_id: str, kind: str = "video", db: Session = Depends(get_db), user=Depends(get_current_user)):
+def stream_asset(asset_id: str, request: Request, kind: str = "video", db: Session = Depends(get_db), user=Depends(get_current_user)):
+    """Streamt Video/Thumbnail blockweise; unterstützt Range-Requests (206) für Seeking im Player."""
     asset = db.query(models.VideoAsset).filter(models.VideoAsset.id == asset_id).first()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
@@ -463,49 +469,48 @@ def stream_asset(asset_id: str, kind: str = "video", db: Session = Depends(get_d
         assert_org_member(db, user, asset.organization_id)
     
     uri = asset.video_path if kind == "video" else asset.thumbnail_path
+    if not uri:
+        raise HTTPException(status_code=404, detail="File not available")
+    media_type = "video/mp4" if kind == "video" else "image/jpeg"
     try:
-        data = storage.read_bytes_uri(uri)
+        return range_response(storage, uri, request.headers, media_type)
     except Exception:
         raise HTTPException(status_code=404, detail="File not available")
-    media_type = "video/mp4" if kind == "video" else "image/jpeg"
-    return StreamingResponse(iter([data]), media_type=media_type)
 
 
-@router.get("/download/{asset_id}")
-def download_video(asset_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    """Download-Route für VideoAssets - unterstützt alle Video-Typen (generiert, übersetzt, transkribiert)"""
+def _download_filename(asset: models.VideoAsset) -> str:
+    # Dateiname basierend auf Asset-Status
+    if asset.status == "translated":
+        return f"translated_{asset.translated_language}_{asset.id}.mp4"
+    if asset.status == "transcribed":
+        return f"transcribed_{asset.id}.mp4"
+    return f"video_{asset.id}.mp4"
+
+
+def _downloadable_asset(db: Session, user, asset_id: str) -> models.VideoAsset:
     asset = db.query(models.VideoAsset).filter(models.VideoAsset.id == asset_id).first()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
-    
+
     # Prüfe Zugriff: Entweder über Projekt oder Organisation
     if asset.project_id:
         assert_project_member(db, user, asset.project_id)
     else:
         # Org-level Asset (z.B. YouTube Transcription/Translation)
         assert_org_member(db, user, asset.organization_id)
-    
+    if not asset.video_path:
+        raise HTTPException(status_code=404, detail="File not available")
+    return asset
+
+
+@router.get("/download/{asset_id}")
+def download_video(asset_id: str, request: Request, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    """Download-Route für VideoAssets - unterstützt alle Video-Typen (generiert, übersetzt, transkribiert)"""
+    asset = _downloadable_asset(db, user, asset_id)
     try:
-        # Lade Video-Daten
-        video_data = storage.read_bytes_uri(asset.video_path)
-        
-        # Bestimme Dateiname basierend auf Asset-Status
-        filename = f"video_{asset.id}.mp4"
-        if asset.status == "translated":
-            filename = f"translated_{asset.translated_language}_{asset.id}.mp4"
-        elif asset.status == "transcribed":
-            filename = f"transcribed_{asset.id}.mp4"
-        
-        # Return als Download
-        from fastapi.responses import Response
-        return Response(
-            content=video_data,
-            media_type="video/mp4",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"',
-                "Content-Length": str(len(video_data))
-            }
-        )
+        return download_response(storage, asset.video_path, _download_filename(asset), "video/mp4", request.headers)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not available")
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -513,30 +518,68 @@ def download_video(asset_id: str, db: Session = Depends(get_db), user=Depends(ge
         )
 
 
-@router.get("/assets/project/{project_id}", response_model=List[schemas.VideoAssetOut])
-def list_assets(project_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    """Liste alle VideoAssets für ein Projekt UND org-level Assets (YouTube Transcription/Translation)"""
-    project = assert_project_member(db, user, project_id)
-    
-    # Hole Projekt-spezifische Assets
-    project_assets = (
-        db.query(models.VideoAsset)
-        .filter(models.VideoAsset.project_id == project.id)
-        .all()
+@router.get("/download/{asset_id}/link")
+def download_link(asset_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    """
+    Kurzlebiger Direkt-Link (presigned) für Browser-Downloads ohne Authorization-Header.
+    url ist None, wenn der Storage keine Links signiert; dann /download/{asset_id} verwenden.
+    """
+    asset = _downloadable_asset(db, user, asset_id)
+    url = storage.presigned_download_url(asset.video_path, _download_filename(asset), "video/mp4")
+    return {"url": url, "expires_in": settings.storage_presign_expires if url else None}
+
+
+@router.delete("/assets/{asset_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_asset(asset_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    """
+    Löscht ein VideoAsset. Dateien werden nur dereferenziert: die Garbage Collection entfernt
+    Blobs erst, wenn kein Asset (auch anderer Mandanten) sie mehr verwendet.
+    """
+    asset = db.query(models.VideoAsset).filter(models.VideoAsset.id == asset_id).first()
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    if asset.project_id:
+        assert_project_member(db, user, asset.project_id, roles=["owner", "admin", "editor"])
+    else:
+        assert_org_member(db, user, asset.organization_id, roles=["owner", "admin", "editor"])
+    release_refs(db, VIDEO_ASSET, asset.id)
+    db.query(models.MetricSnapshot).filter(models.MetricSnapshot.asset_id == asset.id).update(
+        {models.MetricSnapshot.asset_id: None}, synchronize_session=False
     )
-    
-    # Hole org-level Assets (YouTube Transcription/Translation ohne Projekt)
-    org_assets = (
-        db.query(models.VideoAsset)
-        .filter(
-            models.VideoAsset.organization_id == project.organization_id,
-            models.VideoAsset.project_id.is_(None)  # Org-level Assets
+    db.delete(asset)
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/assets/project/{project_id}", response_model=List[schemas.VideoAssetOut], dependencies=[Depends(use_replica)])
+def list_assets(
+    project_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Seite der VideoAssets eines Projekts UND der org-level Assets (YouTube Transcription/Translation),
+    neueste zuerst. Der Cursor der nächsten Seite steht im Header X-Next-Cursor.
+    """
+    project = assert_project_member(db, user, project_id)
+    query = db.query(models.VideoAsset).filter(
+        or_(
+            models.VideoAsset.project_id == project.id,
+            and_(
+                models.VideoAsset.organization_id == project.organization_id,
+                models.VideoAsset.project_id.is_(None),  # Org-level Assets
+            ),
         )
-        .all()
     )
-    
-    # Kombiniere und sortiere nach created_at
-    all_assets = sorted(project_assets + org_assets, key=lambda a: a.created_at or datetime.min, reverse=True)
+    try:
+        all_assets, next_cursor = keyset_page(query, models.VideoAsset, cursor, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
     # Generiere signed URLs
     for asset in all_assets:
@@ -595,38 +638,13 @@ async def publish_status(asset_id: str, db: Session = Depends(get_db), user=Depe
                 token_row.expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
                 db.add(token_row)
                 db.commit()
-    # try to extract video_id from publish_response
-    video_id = None
-    if asset.publish_response:
-        if "video_id" in asset.publish_response:
-            try:
-                import json
-                import ast
-                # FIX: Proper JSON parsing - handle both JSON strings and Python dict strings
-                response_str = asset.publish_response
-                try:
-                    parsed = json.loads(response_str)
-                except json.JSONDecodeError:
-                    try:
-                        parsed = ast.literal_eval(response_str)
-                    except (ValueError, SyntaxError):
-                        import re
-                        match = re.search(r'"video_id"\s*:\s*"([^"]+)"', response_str)
-                        if match:
-                            video_id = match.group(1)
-                            parsed = {}
-                        else:
-                            parsed = {}
-                if parsed:
-                    video_id = parsed.get("data", {}).get("video_id") or parsed.get("video_id")
-            except Exception:
-                pass
+    video_id = asset.tiktok_video_id
     if not video_id:
         raise HTTPException(status_code=400, detail="No video_id stored")
     resp = await client.get_video_status(access, account.handle, video_id)
-    asset.publish_response = str(resp)
     status = resp.get("data", {}).get("status", "unknown")
-    asset.status = status
+    publish_tracking.store_publish_response(asset, resp)
+    publish_tracking.record_status(asset, status)
     db.add(asset)
     db.commit()
     return {"status": status, "raw": resp}
@@ -9,7 +9,7 @@ from ..services.usage import enforce_quota, log_usage, QuotaExceeded
 from ..services.idempotency import IdempotencyService
 from ..auth import get_current_user, get_db
 from ..authorization import assert_org_member
-from ..security import decrypt_secret
+from ..services.credential_secrets import resolve_credential_secret
 from ..config import get_settings
 from ..providers.openrouter_client import OpenRouterClient
 from ..providers.falai_client import FalAIClient
@@ -200,7 +200,7 @@ async def list_models(req: ProviderKeyRequest, user=Depends(get_current_user), d
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Credential nicht gefunden"
             )
-        api_key = decrypt_secret(credential.encrypted_secret, settings.fernet_secret)
+        api_key = resolve_credential_secret(credential)
         if not api_key:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -242,7 +242,7 @@ async def transcribe(req: TranscribeRequest, user=Depends(get_current_user), db:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Credential nicht gefunden"
             )
-        api_key = decrypt_secret(credential.encrypted_secret, settings.fernet_secret)
+        api_key = resolve_credential_secret(credential)
         if not api_key:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -331,7 +331,7 @@ async def transcribe(req: TranscribeRequest, user=Depends(get_current_user), db:
         }
     
     # Neuer Job - enqueue task
-    log_usage(db, org_id, metric="youtube_transcription")
+    log_usage(db, org_id, metric="youtube_transcription", dedup_key=f"youtube_transcription:{job.id}")
     celery.send_task("tasks.youtube_transcribe", args=[job.id, json.dumps(payload_data)])
     
     # Berechne geschätzte Kosten basierend auf Modell
@@ -383,7 +383,7 @@ async def translate_video(req: TranslateRequest, user=Depends(get_current_user),
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Credential nicht gefunden"
             )
-        api_key = decrypt_secret(credential.encrypted_secret, settings.fernet_secret)
+        api_key = resolve_credential_secret(credential)
         if not api_key:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -442,7 +442,7 @@ async def translate_video(req: TranslateRequest, user=Depends(get_current_user),
     
     # Starte Celery Task
     celery.send_task("tasks.youtube_translate", args=[job.id, json.dumps(payload_data)])
-    log_usage(db, org_id, metric="youtube_translation")
+    log_usage(db, org_id, metric="youtube_translation", dedup_key=f"youtube_translation:{job.id}")
     
     return {
         "status": "queued",
@@ -474,7 +474,7 @@ async def list_voice_models(
             models.Credential.provider == provider
         ).first()
         if credential:
-            api_key = decrypt_secret(credential.encrypted_secret, settings.fernet_secret)
+            api_key = resolve_credential_secret(credential)
     
     if not api_key:
         raise HTTPException(
@@ -123,6 +123,8 @@ class VideoAssetOut(BaseModel):
     video_path: str
     thumbnail_path: str
     publish_response: str | None = None
+    tiktok_video_id: str | None = None
+    publish_status: str | None = None
     # Übersetzungs-Felder
     original_language: str | None = None
     translated_language: str | None = None
@@ -1,24 +1,77 @@
-from cryptography.fernet import Fernet, InvalidToken
-from typing import Optional
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
 import base64
 import os
 
+from .config import get_settings
 
+
+@lru_cache(maxsize=32)
 def get_fernet(secret: str) -> Fernet:
+    """Fernet-Instanz pro Schlüsselmaterial (gecacht: Key-Ableitung nur einmal pro Prozess)."""
     key = secret
     if len(secret) != 44:
         key = base64.urlsafe_b64encode(secret.encode().ljust(32, b"0"))
     return Fernet(key)
 
 
+def previous_keys() -> Tuple[str, ...]:
+    """Alte Schlüssel aus FERNET_PREVIOUS_SECRETS (kommagetrennt), nur noch zum Entschlüsseln."""
+    raw = get_settings().fernet_previous_secrets
+    return tuple(key.strip() for key in raw.split(",") if key.strip())
+
+
+@lru_cache(maxsize=32)
+def get_multi_fernet(secret: str, previous: Tuple[str, ...] = ()) -> MultiFernet:
+    """Verschlüsselt mit secret, entschlüsselt mit secret und allen previous-Schlüsseln."""
+    keys = [secret] + [key for key in previous if key != secret]
+    return MultiFernet([get_fernet(key) for key in keys])
+
+
+def _cipher(fernet_key: str) -> MultiFernet:
+    return get_multi_fernet(fernet_key, previous_keys())
+
+
 def encrypt_secret(secret: str, fernet_key: str) -> str:
-    f = get_fernet(fernet_key)
+    f = _cipher(fernet_key)
     return f.encrypt(secret.encode()).decode()
 
 
 def decrypt_secret(token: str, fernet_key: str) -> Optional[str]:
-    f = get_fernet(fernet_key)
+    f = _cipher(fernet_key)
     try:
         return f.decrypt(token.encode()).decode()
     except InvalidToken:
         return None
+
+
+def decrypt_many(tokens: Iterable[Optional[str]], fernet_key: str) -> List[Optional[str]]:
+    """Entschlüsselt viele Tokens (Batch-Tasks); gleiche Ciphertexte nur einmal. None bleibt None."""
+    f = _cipher(fernet_key)
+    tokens = list(tokens)
+    plain = {}
+    for token in set(token for token in tokens if token):
+        try:
+            plain[token] = f.decrypt(token.encode()).decode()
+        except InvalidToken:
+            plain[token] = None
+    return [plain.get(token) if token else None for token in tokens]
+
+
+def uses_current_key(token: str, fernet_key: str) -> bool:
+    """True, wenn der Token schon mit dem aktuellen Schlüssel verschlüsselt ist (Rotation unnötig)."""
+    try:
+        get_fernet(fernet_key).decrypt(token.encode())
+        return True
+    except InvalidToken:
+        return False
+
+
+def rotate_secret(token: str, fernet_key: str) -> Optional[str]:
+    """Verschlüsselt einen Token mit dem aktuellen Schlüssel neu (None wenn mit keinem Schlüssel lesbar)."""
+    f = _cipher(fernet_key)
+    try:
+        return f.rotate(token.encode()).decode()
+    except InvalidToken:
+        return None
@@ -0,0 +1,143 @@
+"""
+Serverseitige Aggregation von Metrik-Zeitreihen für Charts.
+Summen kommen aus den Rollups (bzw. für Einzelvideos aus den Snapshots), Deltas und
+Wachstumsraten werden per Window-Funktion (LAG) in der Datenbank berechnet.
+Optional wird jede Serie per Largest-Triangle-Three-Buckets auf N Punkte reduziert.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from .metrics import STATISTICS, as_datetime, truncate_sql
+
+GROUP_BY = ("project", "plan", "video")
+
+
+def lttb(points: Sequence[dict], threshold: int, x: str = "t", y: str = "value") -> List[dict]:
+    """
+    Largest-Triangle-Three-Buckets: reduziert eine Serie auf `threshold` Punkte und erhält
+    dabei die visuelle Form (erster und letzter Punkt bleiben immer erhalten).
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    def xv(p) -> float:
+        value = p[x]
+        return value.timestamp() if isinstance(value, datetime) else float(value)
+
+    def yv(p) -> float:
+        return float(p[y] or 0)
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Durchschnitt des nächsten Buckets als dritter Dreieckspunkt
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_range = points[avg_start:avg_end] or [points[-1]]
+        avg_x = sum(xv(p) for p in avg_range) / len(avg_range)
+        avg_y = sum(yv(p) for p in avg_range) / len(avg_range)
+
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        ax, ay = xv(points[a]), yv(points[a])
+        best, best_area = range_start, -1.0
+        for j in range(range_start, range_end):
+            area = abs((ax - avg_x) * (yv(points[j]) - ay) - (ax - xv(points[j])) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def _series_source(db: Session, project_id: str, metric: str, bucket: str, group_by: str, start: datetime, end: datetime):
+    """Subquery (key, bucket, value) je nach Gruppierung."""
+    if group_by == "video":
+        column = getattr(models.MetricSnapshot, metric)
+        bucket_col = truncate_sql(db, models.MetricSnapshot.bucket_start, bucket)
+        return (
+            select(
+                models.MetricSnapshot.tiktok_video_id.label("key"),
+                bucket_col.label("bucket"),
+                func.max(column).label("value"),
+            )
+            .where(
+                models.MetricSnapshot.project_id == project_id,
+                models.MetricSnapshot.bucket_start >= start,
+                models.MetricSnapshot.bucket_start < end,
+            )
+            .group_by(models.MetricSnapshot.tiktok_video_id, bucket_col)
+            .subquery()
+        )
+    rollup = models.MetricRollup
+    key = literal(project_id) if group_by == "project" else rollup.plan_id
+    return (
+        select(key.label("key"), rollup.bucket_start.label("bucket"), rollup.value.label("value"))
+        .where(
+            rollup.project_id == project_id,
+            rollup.granularity == bucket,
+            rollup.metric == metric,
+            rollup.plan_id.is_(None) if group_by == "project" else rollup.plan_id.isnot(None),
+            rollup.bucket_start >= start,
+            rollup.bucket_start < end,
+        )
+        .subquery()
+    )
+
+
+def aggregate_series(
+    db: Session,
+    project_id: str,
+    metric: str,
+    start: datetime,
+    end: datetime,
+    bucket: str = "day",
+    group_by: str = "project",
+    max_points: Optional[int] = None,
+) -> List[dict]:
+    """
+    Zeitreihen pro Gruppe mit Wert, Delta zum Vor-Bucket und Wachstumsrate.
+    Returns:
+        [{"key", "latest", "change", "points": [{"t", "value", "delta", "growth"}]}]
+    """
+    if metric not in STATISTICS:
+        raise ValueError(f"Unbekannte Metrik: {metric}")
+    if group_by not in GROUP_BY:
+        raise ValueError(f"Unbekannte Gruppierung: {group_by}")
+
+    source = _series_source(db, project_id, metric, bucket, group_by, start, end)
+    previous = func.lag(source.c.value).over(partition_by=source.c.key, order_by=source.c.bucket)
+    windowed = select(
+        source.c.key,
+        source.c.bucket,
+        source.c.value,
+        (source.c.value - previous).label("delta"),
+        ((source.c.value - previous) * 1.0 / func.nullif(previous, 0)).label("growth"),
+    ).subquery()
+    rows = db.execute(select(windowed).order_by(windowed.c.key, windowed.c.bucket)).all()
+
+    grouped: Dict[str, List[dict]] = {}
+    for key, bucket_value, value, delta, growth in rows:
+        grouped.setdefault(key, []).append({
+            "t": as_datetime(bucket_value),
+            "value": int(value or 0),
+            "delta": int(delta) if delta is not None else None,
+            "growth": float(growth) if growth is not None else None,
+        })
+
+    series = []
+    for key, points in grouped.items():
+        series.append({
+            "key": key,
+            "latest": points[-1]["value"],
+            "change": sum(p["delta"] or 0 for p in points),
+            "points": lttb(points, max_points) if max_points else points,
+        })
+    return series
@@ -0,0 +1,123 @@
+"""
+Persistente asyncio-Runtime pro Worker-Prozess.
+Sync Celery-Tasks reichen Coroutines an einen langlebigen Event-Loop weiter,
+statt für jeden Provider-Call mit anyio.run einen neuen Loop zu starten.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class AsyncRuntime:
+    """Event-Loop in einem Daemon-Thread, an den Coroutines übergeben werden."""
+
+    def __init__(self, name: str = "async-runtime"):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.pid: Optional[int] = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+        self._shutdown_hooks: list[Callable[[], Awaitable[None]]] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self.loop and self.thread and self.thread.is_alive() and self.pid == os.getpid())
+
+    def start(self) -> None:
+        """Startet den Loop-Thread (idempotent, fork-sicher)."""
+        with self._lock:
+            if self.running:
+                return
+            # Nach fork() ist der Thread des Elternprozesses nicht mehr vorhanden
+            self._started.clear()
+            self.loop = asyncio.new_event_loop()
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self._run_loop, name=self.name, daemon=True)
+            self.thread.start()
+        self._started.wait()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+        self.loop.run_forever()
+
+    def on_shutdown(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Registriert eine Coroutine-Funktion, die beim Stoppen im Loop ausgeführt wird (z.B. Clients schließen)."""
+        if hook not in self._shutdown_hooks:
+            self._shutdown_hooks.append(hook)
+
+    def submit(self, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> Future:
+        """Plant func(*args, **kwargs) im Runtime-Loop ein und gibt ein concurrent.futures.Future zurück."""
+        if not self.running:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(func(*args, **kwargs), self.loop)
+
+    def run(self, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """
+        Führt func(*args, **kwargs) im Runtime-Loop aus und blockiert bis zum Ergebnis.
+        Aufruf wie anyio.run, damit Aufrufer direkt umgestellt werden können.
+        """
+        if self.running and threading.current_thread() is self.thread:
+            raise RuntimeError("AsyncRuntime.run() darf nicht aus dem Runtime-Loop aufgerufen werden")
+        future = self.submit(func, *args, **kwargs)
+        try:
+            return future.result()
+        except BaseException:
+            # z.B. SoftTimeLimitExceeded von Celery: Coroutine im Loop abbrechen
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Schließt registrierte Ressourcen, stoppt den Loop und wartet auf den Thread."""
+        with self._lock:
+            if not self.running:
+                self.loop = None
+                self.thread = None
+                return
+            loop, thread = self.loop, self.thread
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=timeout)
+            except Exception:
+                pass
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=timeout)
+            loop.close()
+            self.loop = None
+            self.thread = None
+
+    async def _shutdown(self) -> None:
+        for hook in self._shutdown_hooks:
+            try:
+                await hook()
+            except Exception:
+                pass
+        current = asyncio.current_task()
+        pending = [t for t in asyncio.all_tasks() if t is not current]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+# Globale Instanz (eine pro Prozess)
+_runtime: Optional[AsyncRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_async_runtime() -> AsyncRuntime:
+    """Singleton für die Worker-Runtime."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AsyncRuntime()
+        return _runtime
+
+
+def run_async(func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+    """Kurzform für get_async_runtime().run(func, *args, **kwargs)."""
+    return get_async_runtime().run(func, *args, **kwargs)
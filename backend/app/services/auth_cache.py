@@ -0,0 +1,137 @@
+"""
+Kurzlebiger Cache für Session und User authentifizierter Requests.
+Zweistufig: prozesslokales LRU (sehr kurze TTL) vor Redis (Schlüssel = Session-ID).
+revoke_session, Logout und Passwort-Reset invalidieren explizit; in anderen Prozessen
+greift die Invalidierung spätestens nach der lokalen TTL.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, Optional
+
+import redis
+
+from .. import models
+from ..config import get_settings
+
+settings = get_settings()
+
+SESSION_FIELDS = ("id", "user_id", "expires_at", "revoked_at")
+# Kein Passwort-Hash im Cache; fehlende Felder lädt SQLAlchemy bei Zugriff nach
+USER_FIELDS = ("id", "email", "is_active", "email_verified", "created_at")
+DATETIME_FIELDS = {"expires_at", "revoked_at", "created_at"}
+
+
+def _dump(obj, fields) -> dict:
+    data = {}
+    for field in fields:
+        value = getattr(obj, field)
+        data[field] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+
+def _load(data: dict) -> dict:
+    return {
+        key: datetime.fromisoformat(value) if key in DATETIME_FIELDS and value else value
+        for key, value in data.items()
+    }
+
+
+class AuthCache:
+    """Session-/User-Snapshots pro Session-ID."""
+
+    def __init__(self, ttl: Optional[int] = None, local_ttl: Optional[float] = None, max_local_entries: int = 10000):
+        self.ttl = ttl if ttl is not None else settings.auth_cache_ttl
+        self.local_ttl = local_ttl if local_ttl is not None else settings.auth_cache_local_ttl
+        self.max_local_entries = max_local_entries
+        self._local: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.redis_client: Optional[redis.Redis] = None
+        self._init_redis()
+
+    def _init_redis(self):
+        """Initialisiert Redis-Client falls verfügbar."""
+        try:
+            if settings.redis_url:
+                self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+                self.redis_client.ping()
+        except Exception:
+            self.redis_client = None
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"auth:session:{session_id}"
+
+    def get(self, session_id: str) -> Optional[dict]:
+        """Returns: {"session": {...}, "user": {...}} oder None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(session_id)
+            if entry is not None:
+                if entry[0] > now:
+                    self._local.move_to_end(session_id)
+                    return entry[1]
+                self._local.pop(session_id, None)
+        if not self.redis_client:
+            return None
+        try:
+            raw = self.redis_client.get(self._key(session_id))
+        except Exception:
+            return None
+        if not raw:
+            return None
+        data = json.loads(raw)
+        self._remember(session_id, data)
+        return data
+
+    def set(self, session: models.Session, user: models.User) -> None:
+        data = {"session": _dump(session, SESSION_FIELDS), "user": _dump(user, USER_FIELDS)}
+        self._remember(session.id, data)
+        if self.redis_client:
+            try:
+                self.redis_client.set(self._key(session.id), json.dumps(data), ex=self.ttl)
+            except Exception:
+                pass
+
+    def _remember(self, session_id: str, data: dict) -> None:
+        with self._lock:
+            self._local[session_id] = (time.monotonic() + self.local_ttl, data)
+            self._local.move_to_end(session_id)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def invalidate(self, session_ids: Iterable[str]) -> None:
+        session_ids = [session_id for session_id in session_ids if session_id]
+        if not session_ids:
+            return
+        with self._lock:
+            for session_id in session_ids:
+                self._local.pop(session_id, None)
+        if self.redis_client:
+            try:
+                self.redis_client.delete(*[self._key(session_id) for session_id in session_ids])
+            except Exception:
+                pass
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+
+def cached_values(data: dict) -> tuple[dict, dict]:
+    """Session- und User-Felder eines Cache-Eintrags mit geparsten Datumswerten."""
+    return _load(data["session"]), _load(data["user"])
+
+
+# Globale Instanz
+_auth_cache: Optional[AuthCache] = None
+
+
+def get_auth_cache() -> AuthCache:
+    """Singleton für den Auth-Cache."""
+    global _auth_cache
+    if _auth_cache is None:
+        _auth_cache = AuthCache()
+    return _auth_cache
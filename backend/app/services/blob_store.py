@@ -0,0 +1,206 @@
+"""
+Inhaltsadressierte Ablage (SHA-256) mit Referenzzählung.
+Jeder Inhalt liegt genau einmal unter blobs/sha256/..; Mandanten halten BlobRefs darauf. Ist der
+Hash schon bekannt, entfällt der Upload. Fällt ref_count auf 0, wird der Blob nur markiert und
+erst nach einer Karenzzeit von collect_orphaned_blobs gelöscht (unter Zeilensperre, damit ein
+gleichzeitiger Upload desselben Inhalts den Blob nicht verliert).
+Der Objekt-Key enthält zusätzlich die Blob-ID: ein nach der Löschung neu hochgeladener gleicher
+Inhalt landet nie unter einem Key, den die GC gerade entfernt. Uploads, deren Transaktion
+zurückgerollt wird, löscht ein Session-Hook wieder (best effort; nur ein Prozessabsturz
+zwischen Upload und Commit hinterlässt ein unverwaltetes Objekt).
+"""
+import hashlib
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import case, event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..providers.storage import StorageProvider
+
+VIDEO_ASSET = "video_asset"
+ORPHAN_GRACE = timedelta(hours=1)
+# Uploads der laufenden Transaktion: [(storage, blob)] in Session.info
+_UPLOADS_KEY = "blob_store_uploads"
+
+
+def blob_key(sha256: str, blob_id: str, suffix: str = "") -> str:
+    return f"blobs/sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}-{blob_id}{suffix}"
+
+
+def hash_file(path, chunk_size: int = 1024 * 1024) -> tuple[str, int]:
+    """Returns: (sha256 hex, Größe in Bytes)."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _locked_blob(db: Session, sha256: str) -> Optional[models.Blob]:
+    return db.query(models.Blob).filter(models.Blob.sha256 == sha256).with_for_update().first()
+
+
+def add_ref(db: Session, blob: models.Blob, organization_id: str, owner_type: str, owner_id: str, role: str) -> models.Blob:
+    """Weitere Referenz auf einen (gesperrten oder neuen) Blob."""
+    blob.ref_count = (blob.ref_count or 0) + 1
+    blob.orphaned_at = None
+    db.add(models.BlobRef(
+        blob_id=blob.id,
+        organization_id=organization_id,
+        owner_type=owner_type,
+        owner_id=owner_id,
+        role=role,
+    ))
+    db.flush()
+    return blob
+
+
+def store_file(
+    db: Session,
+    storage: StorageProvider,
+    organization_id: str,
+    local_path,
+    owner_type: str,
+    owner_id: str,
+    role: str,
+    suffix: str = "",
+) -> models.Blob:
+    """
+    Legt die Datei inhaltsadressiert ab und referenziert sie für den Owner.
+    Existiert der Inhalt schon, wird nicht hochgeladen. Committet nicht.
+    """
+    sha256, size = hash_file(local_path)
+    blob = _locked_blob(db, sha256)
+    if blob is None:
+        blob_id = models.uid()
+        uri = storage.save_file(blob_key(sha256, blob_id, suffix), str(local_path))
+        candidate = models.Blob(id=blob_id, sha256=sha256, size=size, storage_uri=str(uri), ref_count=0)
+        db.info.setdefault(_UPLOADS_KEY, []).append((storage, candidate))
+        try:
+            with db.begin_nested():
+                db.add(candidate)
+            blob = candidate
+        except IntegrityError:
+            # Paralleler Upload desselben Inhalts: dessen Zeile verwenden; das eigene Objekt räumt der Hook ab
+            blob = _locked_blob(db, sha256)
+    return add_ref(db, blob, organization_id, owner_type, owner_id, role)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _delete_uncommitted_uploads(session, transaction):
+    if transaction.parent is not None:
+        return  # Savepoint: entschieden wird erst am Ende der äußeren Transaktion
+    uploads = session.info.pop(_UPLOADS_KEY, None)
+    for storage, blob in uploads or ():
+        # Nach einem Rollback ist die eingefügte Zeile wieder transient, nach dem Commit persistent
+        if inspect(blob).persistent:
+            continue
+        try:
+            storage.delete_uri(blob.storage_uri)
+        except Exception:
+            pass
+
+
+def attach_asset_files(
+    db: Session,
+    storage: StorageProvider,
+    asset: models.VideoAsset,
+    video_file,
+    thumbnail_file=None,
+) -> None:
+    """Speichert Video und Thumbnail eines (noch nicht geflushten) Assets als Blobs; ohne Thumbnail zeigt es auf das Video."""
+    if asset.id is None:
+        asset.id = models.uid()
+    video = store_file(db, storage, asset.organization_id, video_file, VIDEO_ASSET, asset.id, "video", ".mp4")
+    if thumbnail_file is not None and Path(thumbnail_file).exists():
+        thumbnail = store_file(db, storage, asset.organization_id, thumbnail_file, VIDEO_ASSET, asset.id, "thumbnail", ".jpg")
+    else:
+        thumbnail = add_ref(db, video, asset.organization_id, VIDEO_ASSET, asset.id, "thumbnail")
+    asset.video_blob_id = video.id
+    asset.video_path = video.storage_uri
+    asset.thumbnail_blob_id = thumbnail.id
+    asset.thumbnail_path = thumbnail.storage_uri
+
+
+def release_refs(db: Session, owner_type: str, owner_id: str, now: Optional[datetime] = None) -> int:
+    """Entfernt alle Referenzen des Owners und zählt die Blobs atomar herunter. Returns: Anzahl Referenzen."""
+    now = now or datetime.utcnow()
+    refs = db.query(models.BlobRef).filter(
+        models.BlobRef.owner_type == owner_type,
+        models.BlobRef.owner_id == owner_id,
+    ).all()
+    for blob_id, count in Counter(ref.blob_id for ref in refs).items():
+        db.query(models.Blob).filter(models.Blob.id == blob_id).update(
+            {
+                models.Blob.ref_count: models.Blob.ref_count - count,
+                models.Blob.orphaned_at: case(
+                    (models.Blob.ref_count - count <= 0, now),
+                    else_=models.Blob.orphaned_at,
+                ),
+            },
+            synchronize_session=False,
+        )
+    for ref in refs:
+        db.delete(ref)
+    db.flush()
+    return len(refs)
+
+
+def collect_orphaned_blobs(
+    db: Session,
+    storage: StorageProvider,
+    grace: timedelta = ORPHAN_GRACE,
+    batch_size: int = 100,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Löscht unreferenzierte Blobs nach Ablauf der Karenzzeit in zwei Phasen: erst Zeilen löschen und
+    Tombstones für die Objekte committen, dann die Objekte entfernen (purge_tombstones). Scheitert
+    der Commit, bleibt alles wie es war; scheitert das Löschen im Storage, bleibt der Tombstone für
+    den nächsten Lauf. Returns: Anzahl gelöschter Blobs.
+    """
+    cutoff = (now or datetime.utcnow()) - grace
+    blobs = (
+        db.query(models.Blob)
+        .filter(models.Blob.ref_count <= 0, models.Blob.orphaned_at < cutoff)
+        .order_by(models.Blob.orphaned_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for blob in blobs:
+        db.add(models.BlobTombstone(storage_uri=blob.storage_uri))
+        db.delete(blob)
+    db.commit()
+    purge_tombstones(db, storage, batch_size)
+    return len(blobs)
+
+
+def purge_tombstones(db: Session, storage: StorageProvider, batch_size: int = 100) -> int:
+    """Entfernt die Storage-Objekte gelöschter Blobs. Returns: Anzahl entfernter Objekte."""
+    tombstones = (
+        db.query(models.BlobTombstone)
+        .order_by(models.BlobTombstone.created_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    purged = 0
+    for tombstone in tombstones:
+        try:
+            storage.delete_uri(tombstone.storage_uri)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            continue  # Tombstone bleibt, nächster Lauf versucht es erneut
+        db.delete(tombstone)
+        purged += 1
+    db.commit()
+    return purged
@@ -0,0 +1,98 @@
+"""
+Entschlüsselte Provider-Secrets mit kurzer TTL cachen und Schlüsselrotation.
+Der Cache ist bewusst nur prozesslokal (Klartext-Secrets landen nicht in Redis) und
+nach (Credential.id, Credential.version) geschlüsselt; ein geänderter Ciphertext gilt als Miss.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+from ..security import decrypt_secret, previous_keys, rotate_secret, uses_current_key
+
+settings = get_settings()
+
+
+class CredentialSecretCache:
+    """LRU mit TTL: (credential_id, version) -> (ciphertext, klartext, ablauf)."""
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: int = 1000):
+        self.ttl = ttl if ttl is not None else settings.credential_cache_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple[str, int], tuple[str, Optional[str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, credential: models.Credential) -> Optional[str]:
+        key = (credential.id, credential.version or 1)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == credential.encrypted_secret and entry[2] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+        plain = decrypt_secret(credential.encrypted_secret, settings.fernet_secret)
+        with self._lock:
+            self._entries[key] = (credential.encrypted_secret, plain, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return plain
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Globale Instanz
+_credential_cache: Optional[CredentialSecretCache] = None
+
+
+def get_credential_cache() -> CredentialSecretCache:
+    """Singleton für den Credential-Cache."""
+    global _credential_cache
+    if _credential_cache is None:
+        _credential_cache = CredentialSecretCache()
+    return _credential_cache
+
+
+def resolve_credential_secret(credential: models.Credential) -> Optional[str]:
+    """Klartext-Secret eines Credentials (None wenn nicht entschlüsselbar)."""
+    return get_credential_cache().resolve(credential)
+
+
+def rotate_encrypted_secrets(db: Session, batch_size: int = 500) -> int:
+    """
+    Verschlüsselt Credentials und OAuth-Tokens mit dem aktuellen Schlüssel neu (MultiFernet.rotate).
+    Läuft nur, wenn FERNET_PREVIOUS_SECRETS gesetzt ist. Returns: Anzahl tatsächlich geänderter Zeilen.
+    """
+    if not previous_keys():
+        return 0
+    rotated = 0
+    for model, columns in (
+        (models.Credential, ("encrypted_secret",)),
+        (models.OAuthToken, ("access_token", "refresh_token")),
+    ):
+        last_id = ""
+        while True:
+            rows = db.query(model).filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            for row in rows:
+                changed = False
+                for column in columns:
+                    value = getattr(row, column)
+                    # Schon mit dem aktuellen Schlüssel: nicht neu schreiben (und nicht zählen)
+                    if not value or uses_current_key(value, settings.fernet_secret):
+                        continue
+                    new_value = rotate_secret(value, settings.fernet_secret)
+                    if new_value:
+                        setattr(row, column, new_value)
+                        changed = True
+                rotated += changed
+            db.commit()
+            last_id = rows[-1].id
+    return rotated
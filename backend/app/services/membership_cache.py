@@ -0,0 +1,136 @@
+"""
+Rollen-Index pro User ({organization_id: role}) für die Autorisierungs-Helper.
+Prozesslokales LRU mit kurzer TTL vor Redis; Änderungen an memberships invalidieren
+nach dem Commit automatisch (ORM-Events), andere Prozesse spätestens nach der lokalen TTL.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+from ..db import on_primary
+
+settings = get_settings()
+
+
+class MembershipCache:
+    """Cache der Org-Rollen eines Users."""
+
+    def __init__(self, ttl: Optional[int] = None, local_ttl: Optional[float] = None, max_local_entries: int = 10000):
+        self.ttl = ttl if ttl is not None else settings.membership_cache_ttl
+        self.local_ttl = local_ttl if local_ttl is not None else settings.auth_cache_local_ttl
+        self.max_local_entries = max_local_entries
+        self._local: "OrderedDict[str, tuple[float, Dict[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.redis_client: Optional[redis.Redis] = None
+        self._init_redis()
+
+    def _init_redis(self):
+        """Initialisiert Redis-Client falls verfügbar."""
+        try:
+            if settings.redis_url:
+                self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+                self.redis_client.ping()
+        except Exception:
+            self.redis_client = None
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"authz:memberships:{user_id}"
+
+    def roles_for(self, db: Session, user_id: str) -> Dict[str, str]:
+        """Returns: {organization_id: role} aller Mitgliedschaften des Users."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._local.move_to_end(user_id)
+                return entry[1]
+        roles = self._from_redis(user_id)
+        if roles is None:
+            # Immer vom Primary: ein nachlaufendes Replica würde entzogene Rollen erneut cachen
+            with on_primary(db):
+                roles = dict(
+                    db.query(models.Membership.organization_id, models.Membership.role)
+                    .filter(models.Membership.user_id == user_id)
+                    .all()
+                )
+            if self.redis_client:
+                try:
+                    self.redis_client.set(self._key(user_id), json.dumps(roles), ex=self.ttl)
+                except Exception:
+                    pass
+        with self._lock:
+            self._local[user_id] = (now + self.local_ttl, roles)
+            self._local.move_to_end(user_id)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+        return roles
+
+    def _from_redis(self, user_id: str) -> Optional[Dict[str, str]]:
+        if not self.redis_client:
+            return None
+        try:
+            raw = self.redis_client.get(self._key(user_id))
+        except Exception:
+            return None
+        return json.loads(raw) if raw else None
+
+    def invalidate(self, user_ids: Iterable[str]) -> None:
+        user_ids = [user_id for user_id in user_ids if user_id]
+        if not user_ids:
+            return
+        with self._lock:
+            for user_id in user_ids:
+                self._local.pop(user_id, None)
+        if self.redis_client:
+            try:
+                self.redis_client.delete(*[self._key(user_id) for user_id in user_ids])
+            except Exception:
+                pass
+
+
+# Globale Instanz
+_membership_cache: Optional[MembershipCache] = None
+
+
+def get_membership_cache() -> MembershipCache:
+    """Singleton für den Membership-Cache."""
+    global _membership_cache
+    if _membership_cache is None:
+        _membership_cache = MembershipCache()
+    return _membership_cache
+
+
+# Request-Memo in Session.info (eine DB-Session pro Request, siehe authorization.py)
+REQUEST_MEMO_KEY = "authz_roles"
+
+# Event-getriebene Invalidierung: betroffene User sammeln, nach dem Commit verwerfen
+_PENDING_KEY = "membership_cache_users"
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_membership_changes(session, flush_context, instances):
+    changed = [obj for obj in list(session.new) + list(session.dirty) + list(session.deleted) if isinstance(obj, models.Membership)]
+    if changed:
+        session.info.setdefault(_PENDING_KEY, set()).update(obj.user_id for obj in changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    user_ids = session.info.pop(_PENDING_KEY, None)
+    if user_ids:
+        session.info.pop(REQUEST_MEMO_KEY, None)
+        get_membership_cache().invalidate(user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
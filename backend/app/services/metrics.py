@@ -0,0 +1,232 @@
+"""
+Zeitreihen-Speicher für TikTok-Metriken.
+Snapshots: eine Zeile pro Video und Sampling-Bucket (Upsert, kumulative Zähler).
+Rollups: stündliche und tägliche Aggregate pro Projekt und Plan, aus denen die
+Analytics-Endpoints lesen.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, null, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+from ..db import dialect_insert
+
+settings = get_settings()
+
+# Spalte in metric_snapshots -> Feld in der TikTok-Antwort (statistics bzw. Video-Objekt)
+STATISTICS = {
+    "views": "view_count",
+    "likes": "like_count",
+    "comments": "comment_count",
+    "shares": "share_count",
+}
+
+GRANULARITIES = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# Wie weit zurück ein Rollup-Lauf neu berechnet (deckt verspätete Snapshots ab)
+ROLLUP_WINDOWS = {
+    "hour": timedelta(hours=3),
+    "day": timedelta(days=1),
+}
+
+
+def truncate(ts: datetime, granularity: str) -> datetime:
+    if granularity == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def snapshot_bucket(ts: datetime, minutes: Optional[int] = None) -> datetime:
+    """Beginn des Sampling-Buckets (Standard: METRICS_SNAPSHOT_MINUTES)."""
+    minutes = minutes or settings.metrics_snapshot_minutes
+    floored = ts.replace(second=0, microsecond=0)
+    minute_of_day = floored.hour * 60 + floored.minute
+    start = minute_of_day - minute_of_day % minutes
+    return floored.replace(hour=start // 60, minute=start % 60)
+
+
+def _stat(video: dict, field: str) -> int:
+    stats = video.get("statistics") or {}
+    try:
+        return int(stats.get(field, video.get(field, 0)) or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def upsert_snapshots(
+    db: Session,
+    project: models.Project,
+    open_id: Optional[str],
+    videos: Iterable[dict],
+    now: Optional[datetime] = None,
+) -> int:
+    """Schreibt die Statistiken aller Videos in den aktuellen Bucket (ein Statement). Returns: Anzahl Videos."""
+    now = now or datetime.utcnow()
+    bucket = snapshot_bucket(now)
+    by_video = {}
+    for video in videos:
+        video_id = video.get("id") or video.get("video_id")
+        if video_id:
+            by_video[str(video_id)] = video
+    if not by_video:
+        return 0
+
+    # Zuordnung Video -> Asset/Plan über die indizierte tiktok_video_id
+    assets = {
+        row.tiktok_video_id: row
+        for row in db.query(models.VideoAsset.id, models.VideoAsset.plan_id, models.VideoAsset.tiktok_video_id).filter(
+            models.VideoAsset.organization_id == project.organization_id,
+            models.VideoAsset.tiktok_video_id.in_(list(by_video)),
+        )
+    }
+    rows = []
+    for video_id, video in by_video.items():
+        asset = assets.get(video_id)
+        row = {
+            "id": models.uid(),
+            "organization_id": project.organization_id,
+            "project_id": project.id,
+            "plan_id": asset.plan_id if asset else None,
+            "asset_id": asset.id if asset else None,
+            "tiktok_video_id": video_id,
+            "open_id": open_id,
+            "bucket_start": bucket,
+            "updated_at": now,
+        }
+        for column, field in STATISTICS.items():
+            row[column] = _stat(video, field)
+        rows.append(row)
+
+    stmt = dialect_insert(db)(models.MetricSnapshot).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["project_id", "tiktok_video_id", "bucket_start"],
+        set_={
+            column: stmt.excluded[column]
+            for column in (*STATISTICS, "plan_id", "asset_id", "open_id", "updated_at")
+        },
+    )
+    db.execute(stmt)
+    return len(rows)
+
+
+def truncate_sql(db: Session, column, granularity: str):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc(granularity, column)
+    fmt = "%Y-%m-%d 00:00:00" if granularity == "day" else "%Y-%m-%d %H:00:00"
+    return func.strftime(fmt, column)
+
+
+def as_datetime(value) -> datetime:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def rollup_metrics(
+    db: Session,
+    now: Optional[datetime] = None,
+    project_ids: Optional[List[str]] = None,
+    granularities: Iterable[str] = GRANULARITIES,
+) -> int:
+    """
+    Berechnet die Rollups im Zeitfenster (ROLLUP_WINDOWS) neu: pro Video der höchste Zählerstand
+    im Bucket, summiert pro Projekt und pro Plan. Returns: Anzahl geschriebener Rollup-Zeilen.
+    """
+    now = now or datetime.utcnow()
+    written = 0
+    for granularity in granularities:
+        window_start = truncate(now - ROLLUP_WINDOWS[granularity], granularity)
+        bucket = truncate_sql(db, models.MetricSnapshot.bucket_start, granularity).label("bucket")
+        per_video = (
+            select(
+                models.MetricSnapshot.organization_id,
+                models.MetricSnapshot.project_id,
+                models.MetricSnapshot.plan_id,
+                bucket,
+                *(func.max(getattr(models.MetricSnapshot, column)).label(column) for column in STATISTICS),
+            )
+            .where(models.MetricSnapshot.bucket_start >= window_start)
+            .group_by(
+                models.MetricSnapshot.organization_id,
+                models.MetricSnapshot.project_id,
+                models.MetricSnapshot.plan_id,
+                models.MetricSnapshot.tiktok_video_id,
+                bucket,
+            )
+        )
+        if project_ids:
+            per_video = per_video.where(models.MetricSnapshot.project_id.in_(project_ids))
+        per_video = per_video.subquery()
+        sums = [func.sum(per_video.c[column]).label(column) for column in STATISTICS]
+        per_plan = (
+            select(per_video.c.organization_id, per_video.c.project_id, per_video.c.plan_id, per_video.c.bucket, *sums)
+            .where(per_video.c.plan_id.isnot(None))
+            .group_by(per_video.c.organization_id, per_video.c.project_id, per_video.c.plan_id, per_video.c.bucket)
+        )
+        per_project = select(
+            per_video.c.organization_id, per_video.c.project_id, null().label("plan_id"), per_video.c.bucket, *sums
+        ).group_by(per_video.c.organization_id, per_video.c.project_id, per_video.c.bucket)
+
+        rows = []
+        for result in (*db.execute(per_project).all(), *db.execute(per_plan).all()):
+            organization_id, project_id, plan_id, bucket_value = result[:4]
+            for column, value in zip(STATISTICS, result[4:]):
+                rows.append({
+                    "id": models.uid(),
+                    "organization_id": organization_id,
+                    "project_id": project_id,
+                    "plan_id": plan_id,
+                    "granularity": granularity,
+                    "bucket_start": as_datetime(bucket_value),
+                    "metric": column,
+                    "value": int(value or 0),
+                })
+
+        cleanup = delete(models.MetricRollup).where(
+            models.MetricRollup.granularity == granularity,
+            models.MetricRollup.bucket_start >= window_start,
+        )
+        if project_ids:
+            cleanup = cleanup.where(models.MetricRollup.project_id.in_(project_ids))
+        db.execute(cleanup)
+        if rows:
+            db.execute(insert(models.MetricRollup), rows)
+        written += len(rows)
+    return written
+
+
+def list_rollups(
+    db: Session,
+    project_id: str,
+    granularity: str = "day",
+    plan_id: Optional[str] = None,
+    limit: int = 30,
+) -> List[models.MetricRollup]:
+    """Die letzten `limit` Buckets eines Projekts (plan_id=None: Projekt-Summe)."""
+    latest = (
+        select(models.MetricRollup.bucket_start)
+        .where(
+            models.MetricRollup.project_id == project_id,
+            models.MetricRollup.granularity == granularity,
+            models.MetricRollup.plan_id.is_(None) if plan_id is None else models.MetricRollup.plan_id == plan_id,
+        )
+        .distinct()
+        .order_by(models.MetricRollup.bucket_start.desc())
+        .limit(limit)
+        .subquery()
+    )
+    return (
+        db.query(models.MetricRollup)
+        .filter(
+            models.MetricRollup.project_id == project_id,
+            models.MetricRollup.granularity == granularity,
+            models.MetricRollup.plan_id.is_(None) if plan_id is None else models.MetricRollup.plan_id == plan_id,
+            models.MetricRollup.bucket_start.in_(select(latest.c.bucket_start)),
+        )
+        .order_by(models.MetricRollup.bucket_start.desc(), models.MetricRollup.metric)
+        .all()
+    )
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import tempfile
 from pathlib import Path
@@ -9,12 +10,13 @@ from sqlalchemy.orm import Session
 from .. import models
 from ..config import get_settings
 from ..providers.openrouter_client import OpenRouterClient
-from ..providers.storage import get_storage, tenant_prefix
+from ..providers.storage import get_storage
 from ..providers.tiktok_official import TikTokClient
 from ..providers.video_provider import FFmpegVideoProvider
 from ..providers.falai_video_provider import FalAIVideoProvider
 from ..services.usage import log_usage
-from ..security import decrypt_secret
+from .blob_store import attach_asset_files
+from .credential_secrets import resolve_credential_secret
 
 settings = get_settings()
 
@@ -126,7 +128,7 @@ class Orchestrator:
                 models.Credential.provider == "openrouter"  # Script-Generierung verwendet OpenRouter
             ).first()
             if credential:
-                api_key = decrypt_secret(credential.encrypted_secret, settings.fernet_secret)
+                api_key = resolve_credential_secret(credential)
         
         # Fallback: Suche nach beliebigem OpenRouter Credential in der Organisation
         if not api_key:
@@ -135,7 +137,7 @@ class Orchestrator:
                 models.Credential.provider == "openrouter"
             ).first()
             if openrouter_credential:
-                api_key = decrypt_secret(openrouter_credential.encrypted_secret, settings.fernet_secret)
+                api_key = resolve_credential_secret(openrouter_credential)
         
         # Fallback auf globale Einstellung
         if not api_key:
@@ -299,7 +301,7 @@ Antworte NUR mit gültigem JSON, keine zusätzlichen Erklärungen."""
                     models.Credential.provider == video_provider_name
                 ).first()
                 if credential:
-                    video_api_key = decrypt_secret(credential.encrypted_secret, settings.fernet_secret)
+                    video_api_key = resolve_credential_secret(credential)
             
             # Generiere Video mit Text-to-Video API (falls konfiguriert) oder FFmpeg Fallback
             if video_provider_name == "falai" and video_api_key:
@@ -320,69 +322,52 @@ Antworte NUR mit gültigem JSON, keine zusätzlichen Erklärungen."""
                 # Fallback zu FFmpeg (sollte nicht mehr verwendet werden, aber für Kompatibilität)
                 self.video.render(script_spec.script, str(video_tmp), str(thumb_tmp))
 
-            prefix = tenant_prefix(project.organization_id, project.id, plan.id if plan else "adhoc")
-            video_key = f"{prefix}/final.mp4"
-            thumb_key = f"{prefix}/thumbnail.jpg"
-            video_uri = self.storage.save_file(video_key, str(video_tmp))
-            thumb_uri = self.storage.save_file(thumb_key, str(thumb_tmp))
+            asset = models.VideoAsset(
+                organization_id=project.organization_id,
+                project_id=project.id,
+                plan_id=plan.id if plan else None,
+                status="generated",
+                transcript="",
+            )
+            # Inhaltsadressiert: identische Renderings werden nicht erneut hochgeladen
+            attach_asset_files(db, self.storage, asset, video_tmp, thumb_tmp)
             # log storage usage in MB (rough)
             try:
-                size_mb = max(1, int(video_tmp.stat().st_size / (1024 * 1024)))
+                video_blob = db.get(models.Blob, asset.video_blob_id)
+                size_mb = max(1, int(video_blob.size / (1024 * 1024)))
                 log_usage(db, project.organization_id, metric="storage_mb", amount=size_mb)
             except Exception:
                 pass
 
-        asset = models.VideoAsset(
-            organization_id=project.organization_id,
-            project_id=project.id,
-            plan_id=plan.id if plan else None,
-            status="generated",
-            video_path=str(video_uri),
-            thumbnail_path=str(thumb_uri),
-            transcript="",
-        )
         db.add(asset)
         db.commit()
         db.refresh(asset)
         return asset
 
     async def publish_now(self, asset: models.VideoAsset, access_token: str, open_id: str, caption: str = "Auto-post", use_inbox: bool = False) -> dict:
-        # ensure video is local; if stored remotely, fetch to temp
+        # ensure video is local; remote objects come from the node-local disk cache,
+        # so retries of the same publish do not download the video again
         video_path = asset.video_path
         local_path = video_path
-        tmpdir = None
-        try:
-            if not Path(video_path).exists():
-                from ..providers.storage import get_storage
-                storage = get_storage()
-                data = storage.read_bytes_uri(video_path)
-                tmpdir = tempfile.TemporaryDirectory()
-                local_path = str(Path(tmpdir.name) / "upload.mp4")
-                Path(local_path).write_bytes(data)
-            # FIX: Pass organization_id for rate limiting
-            client = TikTokClient(organization_id=asset.organization_id)
-            idem = f"pub-{asset.id}"
-            if use_inbox:
-                result = await client.upload_video_inbox(
-                    access_token=access_token,
-                    open_id=open_id,
-                    video_path=local_path,
-                    caption=caption,
-                    idempotency_key=idem,
-                )
-            else:
-                result = await client.upload_video(
-                    access_token=access_token,
-                    open_id=open_id,
-                    video_path=local_path,
-                    caption=caption,
-                    idempotency_key=idem,
-                )
-            return result
-        finally:
-            # cleanup temp if used
-            if tmpdir:
-                try:
-                    tmpdir.cleanup()
-                except Exception:
-                    pass
+        if not Path(video_path).exists():
+            local_path = str(await asyncio.to_thread(self.storage.fetch_to_local, video_path))
+        # FIX: Pass organization_id for rate limiting
+        client = TikTokClient(organization_id=asset.organization_id)
+        idem = f"pub-{asset.id}"
+        if use_inbox:
+            result = await client.upload_video_inbox(
+                access_token=access_token,
+                open_id=open_id,
+                video_path=local_path,
+                caption=caption,
+                idempotency_key=idem,
+            )
+        else:
+            result = await client.upload_video(
+                access_token=access_token,
+                open_id=open_id,
+                video_path=local_path,
+                caption=caption,
+                idempotency_key=idem,
+            )
+        return result
@@ -0,0 +1,45 @@
+"""
+Keyset-Pagination über (created_at, id), absteigend.
+Der Cursor kodiert den Sortierschlüssel der letzten Zeile einer Seite; die nächste Seite
+setzt per Tupelvergleich direkt dahinter an (kein OFFSET, kein COUNT).
+"""
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Raises: ValueError bei ungültigem Cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except Exception as exc:
+        raise ValueError("Ungültiger Cursor") from exc
+
+
+def keyset_page(query: Query, model: Any, cursor: Optional[str], limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Any], Optional[str]]:
+    """
+    Lädt eine Seite (neueste zuerst) und den Cursor der nächsten Seite.
+    Holt limit + 1 Zeilen, um ohne COUNT zu erkennen, ob es weitere gibt.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
@@ -0,0 +1,219 @@
+"""
+Progress-Bus für laufende Jobs.
+Worker publizieren leichte Fortschritts-Events (Status, Stage, Prozent, Bytes) über Redis Pub/Sub;
+der SSE-Endpoint /jobs/stream/{job_id} reicht sie an Clients weiter. In job_runs landen nur
+Statuswechsel, Stage-Meldungen innerhalb eines Status werden auf dieselbe Zeile zusammengefasst.
+Ohne Redis werden Events nur an Abonnenten im selben Prozess verteilt.
+"""
+import asyncio
+import json
+import threading
+import time
+import weakref
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+import redis
+import redis.asyncio as redis_async
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+
+settings = get_settings()
+
+TERMINAL_JOB_STATUSES = {"completed", "failed"}
+# Letztes Event bleibt für spät verbundene Clients abrufbar
+LAST_EVENT_TTL_SECONDS = 3600
+
+
+def channel_name(job_id: str) -> str:
+    return f"jobs:progress:{job_id}"
+
+
+def last_event_key(job_id: str) -> str:
+    return f"jobs:progress:last:{job_id}"
+
+
+class ProgressBus:
+    """Pub/Sub für Job-Fortschritt mit prozesslokalem Fallback."""
+
+    def __init__(self):
+        self.redis_client: Optional[redis.Redis] = None
+        self._local: Dict[str, Set[tuple]] = {}
+        self._last: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._init_redis()
+
+    def _init_redis(self):
+        """Initialisiert Redis-Client falls verfügbar."""
+        try:
+            if settings.redis_url:
+                self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+                self.redis_client.ping()
+        except Exception:
+            self.redis_client = None
+
+    def publish(
+        self,
+        job_id: str,
+        status: str,
+        stage: Optional[str] = None,
+        percent: Optional[float] = None,
+        bytes_done: Optional[int] = None,
+        bytes_total: Optional[int] = None,
+    ) -> dict:
+        """Publiziert ein Event (fire-and-forget, Fehler brechen den Job nicht ab)."""
+        event = {"job_id": job_id, "status": status, "ts": time.time()}
+        if stage is not None:
+            event["stage"] = stage
+        if percent is not None:
+            event["percent"] = round(float(percent), 1)
+        if bytes_done is not None:
+            event["bytes"] = int(bytes_done)
+        if bytes_total is not None:
+            event["bytes_total"] = int(bytes_total)
+        data = json.dumps(event)
+        if self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.set(last_event_key(job_id), data, ex=LAST_EVENT_TTL_SECONDS)
+                pipe.publish(channel_name(job_id), data)
+                pipe.execute()
+                return event
+            except Exception:
+                pass
+        with self._lock:
+            self._last[job_id] = event
+            subscribers = list(self._local.get(job_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                pass
+        return event
+
+    def last_event(self, job_id: str) -> Optional[dict]:
+        if self.redis_client:
+            try:
+                data = self.redis_client.get(last_event_key(job_id))
+                return json.loads(data) if data else None
+            except Exception:
+                pass
+        with self._lock:
+            return self._last.get(job_id)
+
+    async def subscribe(self, job_id: str, keepalive: float = 15.0) -> AsyncIterator[Optional[dict]]:
+        """
+        Liefert zuerst das letzte bekannte Event, danach neue Events bis zu einem End-Status.
+        Liefert None nach `keepalive` Sekunden ohne Event (für SSE-Kommentare).
+        """
+        if self.redis_client:
+            try:
+                client = redis_async.from_url(settings.redis_url, decode_responses=True)
+                pubsub = client.pubsub()
+                await pubsub.subscribe(channel_name(job_id))
+            except Exception:
+                client = None
+            if client is not None:
+                try:
+                    # Nach dem Abo den letzten Stand nachliefern (Events vor dem Verbinden)
+                    last = await client.get(last_event_key(job_id))
+                    if last:
+                        event = json.loads(last)
+                        yield event
+                        if event.get("status") in TERMINAL_JOB_STATUSES:
+                            return
+                    while True:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=keepalive)
+                        if message is None:
+                            yield None
+                            continue
+                        event = json.loads(message["data"])
+                        yield event
+                        if event.get("status") in TERMINAL_JOB_STATUSES:
+                            return
+                finally:
+                    await pubsub.unsubscribe(channel_name(job_id))
+                    await pubsub.aclose()
+                    await client.aclose()
+                return
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        entry = (loop, queue)
+        with self._lock:
+            self._local.setdefault(job_id, set()).add(entry)
+            last = self._last.get(job_id)
+        if last is not None:
+            queue.put_nowait(last)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event.get("status") in TERMINAL_JOB_STATUSES:
+                    return
+        finally:
+            with self._lock:
+                subscribers = self._local.get(job_id)
+                if subscribers is not None:
+                    subscribers.discard(entry)
+                    if not subscribers:
+                        self._local.pop(job_id, None)
+
+
+# Laufende job_runs-Zeile pro Job-Instanz (Stage-Meldungen werden darauf zusammengefasst)
+_open_runs: "weakref.WeakKeyDictionary[models.Job, tuple[str, models.JobRun]]" = weakref.WeakKeyDictionary()
+
+
+def record_progress(db: Session, job: models.Job, status: str, message: Optional[str] = None, **progress) -> None:
+    """
+    Publiziert den Fortschritt und persistiert nur Statuswechsel.
+    Ein Wechsel schreibt eine neue job_runs-Zeile und committet; weitere Meldungen mit gleichem
+    Status aktualisieren nur deren message und gehen mit dem nächsten Commit des Tasks mit.
+    """
+    get_progress_bus().publish(job.id, status, stage=message, **progress)
+    open_run = _open_runs.get(job)
+    if open_run is not None and open_run[0] == status:
+        if message is not None:
+            open_run[1].message = message
+        return
+    run = models.JobRun(job_id=job.id, status=status, message=message)
+    db.add(run)
+    db.commit()
+    if status in TERMINAL_JOB_STATUSES:
+        _open_runs.pop(job, None)
+    else:
+        _open_runs[job] = (status, run)
+
+
+def download_hook(job_id: str, stage: str, min_interval: float = 1.0) -> Callable[[dict], None]:
+    """yt-dlp progress_hook, der höchstens alle `min_interval` Sekunden ein Event publiziert."""
+    last_sent = [0.0]
+
+    def hook(info: dict) -> None:
+        now = time.monotonic()
+        finished = info.get("status") == "finished"
+        if not finished and now - last_sent[0] < min_interval:
+            return
+        last_sent[0] = now
+        done = info.get("downloaded_bytes")
+        total = info.get("total_bytes") or info.get("total_bytes_estimate")
+        percent = 100.0 if finished else (done * 100.0 / total if done and total else None)
+        get_progress_bus().publish(job_id, "in_progress", stage=stage, percent=percent, bytes_done=done, bytes_total=total)
+
+    return hook
+
+
+# Globale Instanz
+_progress_bus: Optional[ProgressBus] = None
+
+
+def get_progress_bus() -> ProgressBus:
+    """Singleton für den Progress-Bus."""
+    global _progress_bus
+    if _progress_bus is None:
+        _progress_bus = ProgressBus()
+    return _progress_bus
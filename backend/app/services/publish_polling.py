@@ -0,0 +1,217 @@
+"""
+Publish-Status-Polling für TikTok-Assets.
+Gepollt werden nur fällige Assets (next_poll_at <= jetzt, siehe publish_tracking).
+Assets werden nach Organisation gruppiert: Tokens werden gesammelt geladen und einmal pro Org
+entschlüsselt, Statusabfragen laufen parallel (begrenzt durch Semaphore und Rate Limiter)
+und alle Ergebnisse werden in einem Bulk-UPDATE zurückgeschrieben.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+from ..providers.tiktok_official import TikTokClient
+from ..security import decrypt_many, encrypt_secret
+from . import publish_tracking
+from .async_runtime import run_async
+from .rate_limiter import get_rate_limiter, tiktok_buckets
+
+settings = get_settings()
+
+
+class OrgPollContext:
+    """Alles, was für die Statusabfragen einer Organisation gebraucht wird (einmal pro Org aufgebaut)."""
+
+    def __init__(
+        self,
+        organization_id: str,
+        token_row: models.OAuthToken,
+        account: models.SocialAccount,
+        client: TikTokClient,
+        secrets: Optional[tuple[Optional[str], Optional[str]]] = None,
+    ):
+        self.organization_id = organization_id
+        self.token_row = token_row
+        self.open_id = account.handle
+        self.client = client
+        # secrets: bereits entschlüsselte (access, refresh), siehe _load_contexts
+        if secrets is None:
+            secrets = tuple(decrypt_many([token_row.access_token, token_row.refresh_token], settings.fernet_secret))
+        self.access, self.refresh = secrets
+        self.refreshed: Optional[dict] = None
+        # (asset_id, video_id)
+        self.assets: List[tuple[str, str]] = []
+
+    @property
+    def needs_refresh(self) -> bool:
+        expires_at = self.token_row.expires_at
+        return bool(self.refresh and expires_at and expires_at < datetime.utcnow() + timedelta(minutes=5))
+
+
+def _load_contexts(
+    db: Session,
+    by_org: Dict[str, List[tuple[str, str]]],
+    client_factory: Callable[[str], TikTokClient],
+) -> Dict[str, OrgPollContext]:
+    """Lädt die TikTok-Tokens aller Orgs in einer Query. by_org: {org_id: [(asset_id, video_id)]}"""
+    if not by_org:
+        return {}
+    rows = (
+        db.query(models.OAuthToken, models.SocialAccount)
+        .join(models.SocialAccount, models.OAuthToken.social_account_id == models.SocialAccount.id)
+        .filter(models.SocialAccount.organization_id.in_(list(by_org)), models.SocialAccount.platform == "tiktok")
+        .order_by(models.OAuthToken.created_at)
+        .all()
+    )
+    first: Dict[str, tuple[models.OAuthToken, models.SocialAccount]] = {}
+    for token_row, account in rows:
+        first.setdefault(account.organization_id, (token_row, account))
+    # Alle Tokens des Laufs in einem Batch entschlüsseln
+    plain = decrypt_many(
+        [value for token_row, _account in first.values() for value in (token_row.access_token, token_row.refresh_token)],
+        settings.fernet_secret,
+    )
+    contexts: Dict[str, OrgPollContext] = {}
+    for index, (org_id, (token_row, account)) in enumerate(first.items()):
+        secrets = (plain[2 * index], plain[2 * index + 1])
+        ctx = OrgPollContext(org_id, token_row, account, client_factory(org_id), secrets=secrets)
+        if not ctx.access:
+            continue
+        ctx.assets = by_org[org_id]
+        contexts[org_id] = ctx
+    return contexts
+
+
+async def _poll_contexts(contexts: List[OrgPollContext], concurrency: int) -> List[tuple[str, Optional[dict]]]:
+    """Refresht Tokens und fragt alle Stati parallel ab. Returns: [(asset_id, response oder None bei Fehler)]"""
+
+    async def refresh(ctx: OrgPollContext):
+        try:
+            resp = await ctx.client.refresh(ctx.refresh)
+        except Exception:
+            return
+        data = resp.get("data", {})
+        if data.get("access_token"):
+            ctx.access = data["access_token"]
+            ctx.refreshed = data
+
+    await asyncio.gather(*(refresh(ctx) for ctx in contexts if ctx.needs_refresh))
+
+    limiter = get_rate_limiter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def poll(ctx: OrgPollContext, asset_id: str, video_id: str, slot: float):
+        # Slot wird außerhalb der Semaphore abgewartet, damit gedrosselte Orgs keine Plätze blockieren
+        delay = slot - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with semaphore:
+            try:
+                resp = await ctx.client.get_video_status(ctx.access, ctx.open_id, video_id, acquire_slot=False)
+            except Exception:
+                return asset_id, None
+        return asset_id, resp
+
+    pending = []
+    for ctx in contexts:
+        # Alle Slots der Org in einem Redis-Roundtrip reservieren
+        slots = limiter.reserve_many([tiktok_buckets(ctx.organization_id, "read", ctx.open_id)] * len(ctx.assets))
+        pending.extend(poll(ctx, asset_id, video_id, slot) for (asset_id, video_id), slot in zip(ctx.assets, slots))
+    return await asyncio.gather(*pending)
+
+
+def _store_refreshed_tokens(db: Session, contexts: List[OrgPollContext]):
+    for ctx in contexts:
+        data = ctx.refreshed
+        if not data:
+            continue
+        token_row = ctx.token_row
+        token_row.access_token = encrypt_secret(data["access_token"], settings.fernet_secret)
+        if data.get("refresh_token"):
+            token_row.refresh_token = encrypt_secret(data["refresh_token"], settings.fernet_secret)
+        token_row.expires_at = datetime.utcnow() + timedelta(seconds=data.get("expires_in", 3600))
+        db.add(token_row)
+
+
+def poll_assets(
+    db: Session,
+    asset_id: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    client_factory: Optional[Callable[[str], TikTokClient]] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Pollt den Publish-Status eines Assets (asset_id) oder aller fälligen Assets (Broadcast).
+    Jedes abgefragte Asset wird anschließend über publish_tracking neu eingeplant.
+    Returns:
+        Anzahl erfolgreich abgefragter Assets
+    """
+    client_factory = client_factory or (lambda org_id: TikTokClient(organization_id=org_id))
+    now = datetime.utcnow()
+    query = db.query(
+        models.VideoAsset.id,
+        models.VideoAsset.organization_id,
+        models.VideoAsset.status,
+        models.VideoAsset.tiktok_video_id,
+        models.VideoAsset.poll_attempts,
+        models.VideoAsset.published_at,
+        models.VideoAsset.created_at,
+    )
+    if asset_id:
+        query = query.filter(models.VideoAsset.id == asset_id)
+    else:
+        # Nur fällige Zeilen (Index auf next_poll_at), älteste Fälligkeit zuerst
+        query = (
+            query.filter(models.VideoAsset.next_poll_at.isnot(None), models.VideoAsset.next_poll_at <= now)
+            .order_by(models.VideoAsset.next_poll_at)
+            .limit(batch_size or settings.publish_poll_batch_size)
+        )
+    rows = {row.id: row for row in query.all()}
+    if not rows:
+        return 0
+
+    def schedule(row, status: Optional[str]) -> dict:
+        values = publish_tracking.poll_update(status, row.poll_attempts or 0, row.published_at or row.created_at, now)
+        values.setdefault("status", row.status)
+        return {"id": row.id, **values}
+
+    updates: Dict[str, dict] = {}
+    by_org: Dict[str, List[tuple[str, str]]] = {}
+    for row in rows.values():
+        if row.tiktok_video_id:
+            by_org.setdefault(row.organization_id, []).append((row.id, row.tiktok_video_id))
+        else:
+            # Ohne video_id gibt es nichts zu pollen: Tracking beenden
+            updates[row.id] = {"id": row.id, "status": row.status, "poll_attempts": row.poll_attempts or 0, "last_polled_at": now, "next_poll_at": None}
+
+    contexts = list(_load_contexts(db, by_org, client_factory).values())
+    results = run_async(_poll_contexts, contexts, concurrency or settings.publish_poll_concurrency) if contexts else []
+
+    polled = 0
+    for result_id, resp in results:
+        if resp is None:
+            updates[result_id] = schedule(rows[result_id], None)
+            continue
+        values = schedule(rows[result_id], resp.get("data", {}).get("status", "unknown"))
+        values.update(publish_tracking.publish_response_values(resp))
+        updates[result_id] = values
+        polled += 1
+    # Orgs ohne gültigen Token: mit Backoff erneut versuchen
+    for row_id in rows:
+        if row_id not in updates:
+            updates[row_id] = schedule(rows[row_id], None)
+
+    _store_refreshed_tokens(db, contexts)
+    # Gruppiert nach Spaltenmenge, damit jedes executemany homogene Parameter hat
+    grouped: Dict[tuple, List[dict]] = {}
+    for values in updates.values():
+        grouped.setdefault(tuple(sorted(values)), []).append(values)
+    for batch in grouped.values():
+        db.execute(update(models.VideoAsset), batch)
+    db.commit()
+    return polled
@@ -0,0 +1,107 @@
+"""
+Zustandsautomat für das Publish-Status-Tracking von VideoAssets.
+Nach dem Publish wird häufig gepollt, danach mit abnehmender Frequenz;
+bei terminalen Stati (oder nach MAX_TRACKING_AGE) wird next_poll_at auf NULL gesetzt
+und das Asset fällt aus dem Poll-Index.
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+
+from .. import models
+
+# TikTok-Stati, nach denen sich nichts mehr ändert
+TERMINAL_STATUSES = {"PUBLISH_COMPLETE", "FAILED", "failed", "removed"}
+
+# Abstand bis zum nächsten Poll, nach Anzahl bisheriger Polls
+POLL_SCHEDULE = [
+    timedelta(minutes=1),
+    timedelta(minutes=2),
+    timedelta(minutes=5),
+    timedelta(minutes=10),
+    timedelta(minutes=30),
+    timedelta(hours=1),
+    timedelta(hours=3),
+    timedelta(hours=6),
+    timedelta(hours=12),
+    timedelta(hours=24),
+]
+
+# Danach wird nicht mehr gepollt, auch ohne terminalen Status
+MAX_TRACKING_AGE = timedelta(days=14)
+
+
+def poll_delay(attempts: int) -> timedelta:
+    """Wartezeit nach attempts bisherigen Polls (letzter Eintrag gilt als Obergrenze)."""
+    return POLL_SCHEDULE[min(attempts, len(POLL_SCHEDULE) - 1)]
+
+
+def next_poll_at(status: Optional[str], attempts: int, published_at: Optional[datetime], now: datetime) -> Optional[datetime]:
+    """Nächster Poll-Zeitpunkt oder None, wenn das Tracking beendet ist."""
+    if status in TERMINAL_STATUSES:
+        return None
+    if published_at and now - published_at > MAX_TRACKING_AGE:
+        return None
+    return now + poll_delay(attempts)
+
+
+def mark_published(asset: models.VideoAsset, now: Optional[datetime] = None):
+    """Startet das Tracking direkt nach dem Publish."""
+    now = now or datetime.utcnow()
+    asset.status = "published"
+    asset.published_at = now
+    asset.poll_attempts = 0
+    asset.next_poll_at = now + poll_delay(0)
+
+
+def poll_update(
+    status: Optional[str],
+    attempts: int,
+    published_at: Optional[datetime],
+    now: Optional[datetime] = None,
+) -> dict:
+    """
+    Spalten-Update nach einem Poll (für Bulk-UPDATEs).
+    status=None bedeutet: Poll fehlgeschlagen, Status bleibt, nur neu einplanen.
+    """
+    now = now or datetime.utcnow()
+    attempts += 1
+    values = {
+        "poll_attempts": attempts,
+        "last_polled_at": now,
+        "next_poll_at": next_poll_at(status, attempts, published_at, now),
+    }
+    if status is not None:
+        values["status"] = status
+    return values
+
+
+def record_status(asset: models.VideoAsset, status: str, now: Optional[datetime] = None):
+    """Übernimmt einen abgefragten Status in ein geladenes Asset (z.B. manueller Status-Check)."""
+    for key, value in poll_update(status, asset.poll_attempts or 0, asset.published_at or asset.created_at, now).items():
+        setattr(asset, key, value)
+
+
+
+def publish_response_values(resp: dict) -> dict:
+    """
+    Spalten aus einer TikTok-Antwort: Roh-Antwort als JSON plus video_id, publish_id und Status
+    in eigenen Spalten (fehlende IDs überschreiben vorhandene nicht).
+    """
+    data = resp.get("data") if isinstance(resp.get("data"), dict) else {}
+    values = {"publish_response": json.dumps(resp, default=str)}
+    video_id = data.get("video_id") or resp.get("video_id")
+    if video_id:
+        values["tiktok_video_id"] = str(video_id)
+    publish_id = data.get("publish_id") or resp.get("publish_id")
+    if publish_id:
+        values["tiktok_publish_id"] = str(publish_id)
+    if data.get("status"):
+        values["publish_status"] = data["status"]
+    return values
+
+
+def store_publish_response(asset: models.VideoAsset, resp: dict):
+    """Übernimmt eine TikTok-Antwort in ein geladenes Asset."""
+    for key, value in publish_response_values(resp).items():
+        setattr(asset, key, value)
@@ -0,0 +1,174 @@
+"""
+HTTP-Range-Streaming (RFC 9110) für Objekte aus dem StorageProvider.
+Unterstützt einen einzelnen Byte-Bereich inkl. Suffix-Ranges und If-Range; Mehrfach-Ranges
+werden mit der vollständigen Antwort (200) beantwortet. Der Inhalt wird blockweise gelesen,
+der Speicher pro Stream bleibt auf chunk_size begrenzt.
+Downloads laufen möglichst gar nicht durch Python: presigned Redirect (S3), X-Accel-Redirect
+an nginx oder FileResponse (lokal).
+"""
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
+from typing import Mapping, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Response
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+
+from ..config import get_settings
+from ..providers.storage import ObjectStat, StorageProvider
+
+settings = get_settings()
+
+
+class RangeNotSatisfiable(ValueError):
+    """Range liegt komplett außerhalb des Objekts (-> 416)."""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Returns: (start, end) inklusive, oder None wenn die volle Antwort geliefert werden soll
+    (kein/ungültiger Header, Mehrfach-Range). Raises: RangeNotSatisfiable.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        start = int(first) if first else None
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if start is None:
+        # Suffix-Range: die letzten N Bytes
+        if end is None:
+            return None
+        if end <= 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - end, 0), size - 1
+    if end is None:
+        end = size - 1
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def if_range_matches(header: Optional[str], stat: ObjectStat) -> bool:
+    """If-Range: Range nur anwenden, wenn ETag (stark) oder Last-Modified noch passen."""
+    if not header:
+        return True
+    header = header.strip()
+    if header.startswith('"'):
+        return header == stat.etag
+    if header.startswith("W/"):
+        return False
+    if stat.last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return int(stat.last_modified.timestamp()) == int(since.timestamp())
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def range_response(
+    storage: StorageProvider,
+    uri: str,
+    request_headers: Mapping[str, str],
+    media_type: str,
+    stat: Optional[ObjectStat] = None,
+) -> Response:
+    """Baut die 200/206/304/416-Antwort für `uri`. Raises: FileNotFoundError."""
+    stat = stat or storage.stat_uri(uri)
+    headers = {"Accept-Ranges": "bytes", "ETag": stat.etag}
+    if stat.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(stat.last_modified, usegmt=True)
+    if _etag_matches(request_headers.get("if-none-match"), stat.etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if stat.size > 0 and if_range_matches(request_headers.get("if-range"), stat):
+        try:
+            byte_range = parse_range(request_headers.get("range"), stat.size)
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{stat.size}"
+            return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        if stat.size == 0:
+            return Response(content=b"", media_type=media_type, headers=headers)
+        start, end, status_code = 0, stat.size - 1, 200
+    else:
+        (start, end), status_code = byte_range, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        storage.iter_range(uri, start, end, version=stat.etag),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def content_disposition(filename: str) -> str:
+    return f"attachment; filename=\"{filename}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def accel_location(storage: StorageProvider, path: Path) -> Optional[str]:
+    """Interne nginx-URI für `path`, None wenn die Datei außerhalb von storage_path liegt."""
+    base = getattr(storage, "base_path", None)
+    if base is None:
+        return None
+    try:
+        relative = path.resolve().relative_to(Path(base).resolve())
+    except ValueError:
+        return None
+    return settings.storage_accel_prefix.rstrip("/") + "/" + quote(relative.as_posix())
+
+
+def download_response(
+    storage: StorageProvider,
+    uri: str,
+    filename: str,
+    media_type: str,
+    request_headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Download ohne Bytes im API-Prozess: 302 auf presigned URL, X-Accel-Redirect oder FileResponse.
+    X-Accel-Redirect nur, wenn nginx per X-Accel-Enabled: 1 bestätigt, dass es die Antwort auflöst;
+    direkte Clients (Port 8000) bekämen sonst einen leeren Body. Nur Provider ohne beides werden
+    blockweise durchgestreamt. Raises: FileNotFoundError.
+    """
+    url = storage.presigned_download_url(uri, filename, media_type)
+    if url:
+        return RedirectResponse(url, status_code=302)
+    path = storage.local_path(uri)
+    if path is None:
+        stat = storage.stat_uri(uri)
+        return StreamingResponse(
+            storage.iter_range(uri, 0, stat.size - 1, version=stat.etag) if stat.size else iter(()),
+            media_type=media_type,
+            headers={"Content-Disposition": content_disposition(filename), "Content-Length": str(stat.size)},
+        )
+    if not path.is_file():
+        raise FileNotFoundError(uri)
+    if settings.storage_download_mode == "accel" and (request_headers or {}).get("x-accel-enabled") == "1":
+        location = accel_location(storage, path)
+        if location:
+            return Response(
+                media_type=media_type,
+                headers={"X-Accel-Redirect": location, "Content-Disposition": content_disposition(filename)},
+            )
+    return FileResponse(path, media_type=media_type, filename=filename)
@@ -2,9 +2,10 @@
 Rate Limiter für TikTok API mit Token-Bucket-Algorithmus.
 Verhindert API-Bans durch Rate-Limit-Überschreitungen.
 """
+import asyncio
 import time
-from typing import Dict, Optional
-from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from collections import OrderedDict
 from threading import Lock
 import redis
 from ..config import get_settings
@@ -53,6 +54,26 @@ class TokenBucket:
             needed = tokens - self.tokens
             return needed / self.refill_rate
 
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        Reserviert Tokens im Voraus (Kontostand darf negativ werden).
+        Spätere Reservierungen landen dadurch automatisch hinter früheren (FIFO).
+        Returns:
+            Sekunden bis der reservierte Slot erreicht ist
+        """
+        with self.lock:
+            self._refill()
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.refill_rate
+
+    def refund(self, tokens: int = 1):
+        """Gibt nicht genutzte Tokens zurück (z.B. abgebrochener Waiter)."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + tokens)
+
     def _refill(self):
         """Füllt Tokens basierend auf vergangener Zeit auf."""
         now = time.time()
@@ -61,90 +82,261 @@ class TokenBucket:
         self.last_refill = now
 
 
+class Bucket(NamedTuple):
+    """Eine Ebene der Limit-Hierarchie (z.B. App, Org, Account, Endpoint)."""
+    key: str
+    capacity: int
+    refill_rate: float
+
+
+# TikTok-Limits je Ebene: (capacity, Tokens pro Sekunde)
+TIKTOK_LIMITS: Dict[str, Dict[str, tuple[int, float]]] = {
+    "upload": {
+        "app": (600, 600 / 60.0),
+        "org": (10, 10 / 60.0),
+        "account": (6, 6 / 60.0),
+    },
+    "read": {
+        "app": (6000, 6000 / 60.0),
+        "org": (100, 100 / 60.0),
+        "account": (60, 60 / 60.0),
+    },
+}
+
+
+def tiktok_buckets(org_id: str, endpoint: str, account_id: Optional[str] = None) -> List[Bucket]:
+    """Baut die Bucket-Hierarchie App -> Org -> Account für einen TikTok-Endpoint."""
+    limits = TIKTOK_LIMITS[endpoint]
+    buckets = [
+        Bucket(f"tiktok:app:{endpoint}", *limits["app"]),
+        Bucket(f"{org_id}:{endpoint}", *limits["org"]),
+    ]
+    if account_id:
+        buckets.append(Bucket(f"{org_id}:account:{account_id}:{endpoint}", *limits["account"]))
+    return buckets
+
+
 class RateLimiter:
     """
-    Rate Limiter mit Token-Bucket pro Organisation.
+    Rate Limiter mit Token-Buckets, optional hierarchisch (mehrere Buckets pro Anfrage).
     Verwendet Redis für verteilte Umgebungen, fällt zurück auf In-Memory.
     """
 
-    def __init__(self):
+    KEY_PREFIX = "rate_limit:"
+
+    # Prüft und bucht alle Buckets atomar.
+    # KEYS: Bucket-Keys; ARGV: requested, allow_debt, dann je Bucket capacity, refill_rate.
+    # allow_debt=1: Reservierung (Kontostand darf negativ werden), 0: nur buchen wenn alle reichen.
+    # Zeit kommt vom Redis-Server (keine Clock-Skew zwischen Workern); Zahlen als String,
+    # da Redis Lua-Zahlen auf Integer kürzt. Idle Keys laufen nach vollständigem Refill ab.
+    CONSUME_SCRIPT = """
+    local requested = tonumber(ARGV[1])
+    local allow_debt = ARGV[2] == '1'
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local levels = {}
+    local wait = 0
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[1 + i * 2])
+        local rate = tonumber(ARGV[2 + i * 2])
+        local state = redis.call('HMGET', key, 'tokens', 'ts')
+        local tokens = tonumber(state[1]) or capacity
+        local ts = tonumber(state[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+        levels[i] = {tokens, capacity, rate}
+        if tokens < requested then
+            wait = math.max(wait, (requested - tokens) / rate)
+        end
+    end
+    if wait > 0 and not allow_debt then
+        return {0, tostring(wait)}
+    end
+    for i, key in ipairs(KEYS) do
+        local tokens = levels[i][1] - requested
+        redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+        redis.call('PEXPIRE', key, math.ceil((levels[i][2] - tokens) / levels[i][3] * 1000) + 1000)
+    end
+    return {1, tostring(wait)}
+    """
+
+    # Gibt Tokens an alle Buckets zurück (gedeckelt auf capacity).
+    # KEYS: Bucket-Keys; ARGV: refunded, dann je Bucket capacity, refill_rate.
+    REFUND_SCRIPT = """
+    local refunded = tonumber(ARGV[1])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[i * 2])
+        local rate = tonumber(ARGV[1 + i * 2])
+        local state = redis.call('HMGET', key, 'tokens', 'ts')
+        if state[1] then
+            local ts = tonumber(state[2]) or now
+            local tokens = math.min(capacity, tonumber(state[1]) + math.max(0, now - ts) * rate + refunded)
+            redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+            redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate * 1000) + 1000)
+        end
+    end
+    return 1
+    """
+
+    def __init__(self, max_memory_buckets: int = 10000):
         self.redis_client: Optional[redis.Redis] = None
-        self.memory_buckets: Dict[str, TokenBucket] = defaultdict(
-            lambda: TokenBucket(capacity=100, refill_rate=10.0)  # Default: 100 requests, 10/sec
-        )
+        self.max_memory_buckets = max_memory_buckets
+        # LRU: selten genutzte Buckets werden verdrängt statt unbegrenzt zu wachsen
+        self.memory_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
         self.memory_lock = Lock()
+        self._consume_script = None
+        self._refund_script = None
         self._init_redis()
 
     def _init_redis(self):
-        """Initialisiert Redis-Client falls verfügbar."""
+        """Initialisiert Redis-Client und registriert Lua-Scripts (EVALSHA mit NOSCRIPT-Fallback)."""
         try:
             if settings.redis_url:
                 self.redis_client = redis.from_url(settings.redis_url, decode_responses=False)
                 self.redis_client.ping()
+                self._consume_script = self.redis_client.register_script(self.CONSUME_SCRIPT)
+                self._refund_script = self.redis_client.register_script(self.REFUND_SCRIPT)
         except Exception:
             self.redis_client = None
 
     def _get_bucket_key(self, org_id: str, endpoint: str) -> str:
         """Generiert Redis-Key für Bucket."""
-        return f"rate_limit:{org_id}:{endpoint}"
+        return f"{self.KEY_PREFIX}{org_id}:{endpoint}"
+
+    @staticmethod
+    def _script_args(tokens: int, buckets: Sequence[Bucket], *head: str) -> list[str]:
+        args = [str(tokens), *head]
+        for bucket in buckets:
+            args.extend((str(bucket.capacity), str(bucket.refill_rate)))
+        return args
+
+    def _memory_bucket(self, bucket: Bucket) -> TokenBucket:
+        """LRU-Lookup; Aufrufer hält memory_lock."""
+        entry = self.memory_buckets.get(bucket.key)
+        if entry is None:
+            entry = TokenBucket(bucket.capacity, bucket.refill_rate)
+            self.memory_buckets[bucket.key] = entry
+            while len(self.memory_buckets) > self.max_memory_buckets:
+                self.memory_buckets.popitem(last=False)
+        else:
+            self.memory_buckets.move_to_end(bucket.key)
+        return entry
+
+    def _memory_consume(self, buckets: Sequence[Bucket], tokens: int, allow_debt: bool) -> tuple[bool, float]:
+        with self.memory_lock:
+            entries = [self._memory_bucket(bucket) for bucket in buckets]
+            wait_time = max(entry.wait_time(tokens) for entry in entries)
+            if wait_time > 0 and not allow_debt:
+                return False, wait_time
+            for entry in entries:
+                entry.reserve(tokens)
+            return True, wait_time
+
+    def _consume_buckets(self, buckets: Sequence[Bucket], tokens: int, allow_debt: bool) -> tuple[bool, float]:
+        """Bucht atomar in allen Buckets. Returns: (gebucht, wait_time)"""
+        if self.redis_client and self._consume_script:
+            try:
+                keys = [self.KEY_PREFIX + bucket.key for bucket in buckets]
+                booked, wait_time = self._consume_script(
+                    keys=keys, args=self._script_args(tokens, buckets, "1" if allow_debt else "0")
+                )
+                return booked == 1, float(wait_time)
+            except Exception:
+                # Fallback zu Memory
+                pass
+        return self._memory_consume(buckets, tokens, allow_debt)
+
+    def reserve_buckets(self, buckets: Sequence[Bucket], tokens: int = 1) -> float:
+        """
+        Reserviert Tokens in allen Buckets der Hierarchie atomar und gibt den Slot-Zeitpunkt
+        (Unix-Zeit) zurück. Der Slot richtet sich nach dem knappsten Bucket.
+        """
+        now = time.time()
+        _booked, wait_time = self._consume_buckets(buckets, tokens, allow_debt=True)
+        return now + wait_time
 
-    def _redis_consume(self, key: str, capacity: int, refill_rate: float, tokens: int = 1) -> tuple[bool, float]:
+    def reserve_many(self, requests: Sequence[Sequence[Bucket]], tokens: int = 1) -> List[float]:
         """
-        Redis-basierte Token-Bucket-Implementierung.
+        Reserviert mehrere Anfragen (je eine Bucket-Hierarchie) in einem Redis-Roundtrip (Pipeline).
         Returns:
-            (success, wait_time)
+            Slot-Zeitpunkte in Reihenfolge der Anfragen
         """
-        if not self.redis_client:
-            return False, 0.0
+        now = time.time()
+        if self.redis_client and self._consume_script:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for buckets in requests:
+                    self._consume_script(
+                        keys=[self.KEY_PREFIX + bucket.key for bucket in buckets],
+                        args=self._script_args(tokens, buckets, "1"),
+                        client=pipe,
+                    )
+                return [now + float(wait_time) for _booked, wait_time in pipe.execute()]
+            except Exception:
+                pass
+        return [now + self._memory_consume(buckets, tokens, allow_debt=True)[1] for buckets in requests]
 
-        try:
-            now = time.time()
-            bucket_key = f"{key}:tokens"
-            last_refill_key = f"{key}:last_refill"
-
-            # Lua-Script für atomare Operation
-            lua_script = """
-            local tokens_key = KEYS[1]
-            local last_refill_key = KEYS[2]
-            local capacity = tonumber(ARGV[1])
-            local refill_rate = tonumber(ARGV[2])
-            local requested = tonumber(ARGV[3])
-            local now = tonumber(ARGV[4])
-
-            local tokens = tonumber(redis.call('GET', tokens_key) or capacity)
-            local last_refill = tonumber(redis.call('GET', last_refill_key) or now)
-
-            local elapsed = now - last_refill
-            tokens = math.min(capacity, tokens + elapsed * refill_rate)
-
-            if tokens >= requested then
-                tokens = tokens - requested
-                redis.call('SET', tokens_key, tokens)
-                redis.call('SET', last_refill_key, now)
-                return {1, 0.0}
-            else
-                local needed = requested - tokens
-                local wait_time = needed / refill_rate
-                return {0, wait_time}
-            end
-            """
-
-            result = self.redis_client.eval(
-                lua_script,
-                2,
-                bucket_key,
-                last_refill_key,
-                str(capacity),
-                str(refill_rate),
-                str(tokens),
-                str(now),
-            )
-            success = result[0] == 1
-            wait_time = result[1] if not success else 0.0
-            return success, wait_time
-        except Exception:
-            # Fallback zu Memory
-            return False, 0.0
+    def release_buckets(self, buckets: Sequence[Bucket], tokens: int = 1):
+        """Gibt eine nicht genutzte Reservierung an alle Buckets zurück."""
+        if self.redis_client and self._refund_script:
+            try:
+                self._refund_script(
+                    keys=[self.KEY_PREFIX + bucket.key for bucket in buckets],
+                    args=self._script_args(tokens, buckets),
+                )
+                return
+            except Exception:
+                pass
+        with self.memory_lock:
+            for bucket in buckets:
+                self._memory_bucket(bucket).refund(tokens)
+
+    async def acquire_buckets(self, buckets: Sequence[Bucket], tokens: int = 1, max_wait: Optional[float] = None) -> float:
+        """
+        Reserviert einen Slot über alle Buckets und wartet mit asyncio.sleep,
+        ohne den Event-Loop zu blockieren. Reihenfolge der Aufrufe = Reihenfolge der Slots.
+        Bei Abbruch (CancelledError) oder Überschreitung von max_wait wird die Reservierung zurückgegeben.
+        Returns:
+            Reservierter Slot-Zeitpunkt (Unix-Zeit)
+        """
+        slot = self.reserve_buckets(buckets, tokens)
+        delay = slot - time.time()
+        if max_wait is not None and delay > max_wait:
+            self.release_buckets(buckets, tokens)
+            raise TimeoutError(f"Rate limit für {buckets[-1].key}: Slot erst in {delay:.1f}s frei")
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.release_buckets(buckets, tokens)
+                raise
+        return slot
+
+    # Einzel-Bucket-API (org_id + endpoint)
+
+    def reserve(self, org_id: str, endpoint: str, tokens: int = 1, capacity: int = 100, refill_rate: float = 10.0) -> float:
+        """
+        Reserviert Tokens und gibt den Slot-Zeitpunkt (Unix-Zeit) zurück, ab dem der Aufrufer starten darf.
+        Blockiert nie; Aufrufer können bis zum Slot warten oder Arbeit dorthin einplanen.
+        """
+        return self.reserve_buckets([Bucket(f"{org_id}:{endpoint}", capacity, refill_rate)], tokens)
+
+    def release(self, org_id: str, endpoint: str, tokens: int = 1, capacity: int = 100, refill_rate: float = 10.0):
+        """Gibt eine nicht genutzte Reservierung zurück."""
+        self.release_buckets([Bucket(f"{org_id}:{endpoint}", capacity, refill_rate)], tokens)
+
+    async def acquire(
+        self,
+        org_id: str,
+        endpoint: str,
+        tokens: int = 1,
+        capacity: int = 100,
+        refill_rate: float = 10.0,
+        max_wait: Optional[float] = None,
+    ) -> float:
+        """Async-Variante von wait_if_needed für einen einzelnen Bucket (siehe acquire_buckets)."""
+        return await self.acquire_buckets([Bucket(f"{org_id}:{endpoint}", capacity, refill_rate)], tokens, max_wait)
 
     def consume(self, org_id: str, endpoint: str, tokens: int = 1, capacity: int = 100, refill_rate: float = 10.0) -> tuple[bool, float]:
         """
@@ -152,35 +344,17 @@ class RateLimiter:
         Returns:
             (success, wait_time_seconds)
         """
-        if self.redis_client:
-            key = self._get_bucket_key(org_id, endpoint)
-            success, wait_time = self._redis_consume(key, capacity, refill_rate, tokens)
-            if success:
-                return True, 0.0
-            return False, wait_time
-
-        # Memory-Fallback
-        with self.memory_lock:
-            bucket_key = f"{org_id}:{endpoint}"
-            if bucket_key not in self.memory_buckets:
-                self.memory_buckets[bucket_key] = TokenBucket(capacity, refill_rate)
-            bucket = self.memory_buckets[bucket_key]
-            if bucket.consume(tokens):
-                return True, 0.0
-            wait_time = bucket.wait_time(tokens)
-            return False, wait_time
+        success, wait_time = self._consume_buckets([Bucket(f"{org_id}:{endpoint}", capacity, refill_rate)], tokens, allow_debt=False)
+        return success, 0.0 if success else wait_time
 
     def wait_if_needed(self, org_id: str, endpoint: str, tokens: int = 1, capacity: int = 100, refill_rate: float = 10.0):
         """
         Wartet falls nötig, bis Tokens verfügbar sind.
-        Blockiert bis Tokens verfügbar sind.
+        Blockiert den aufrufenden Thread; in async-Code stattdessen acquire() verwenden.
         """
-        while True:
-            success, wait_time = self.consume(org_id, endpoint, tokens, capacity, refill_rate)
-            if success:
-                return
-            if wait_time > 0:
-                time.sleep(min(wait_time, 60.0))  # Max 60 Sekunden warten
+        delay = self.reserve(org_id, endpoint, tokens, capacity, refill_rate) - time.time()
+        if delay > 0:
+            time.sleep(delay)
 
 
 # Globale Instanz
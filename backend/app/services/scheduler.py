@@ -0,0 +1,98 @@
+"""
+Mengenbasierter Scheduler für fällige Plan-Slots.
+Eine Anti-Join-Query findet alle fälligen Pläne ohne Asset und ohne aktiven Job,
+ein einzelnes INSERT ... ON CONFLICT legt alle Jobs an (inaktive Jobs mit gleichem
+Idempotency-Key werden wiederbelebt).
+"""
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, exists, literal, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..db import dialect_insert
+
+JOB_TYPE = "generate_assets"
+ACTIVE_JOB_STATUSES = ("pending", "in_progress")
+# Zeilen pro INSERT (Postgres erlaubt max. 65535 Bind-Parameter pro Statement)
+INSERT_BATCH_SIZE = 1000
+
+
+def _idempotency_key(plan_id_column):
+    return literal("gen:") + plan_id_column
+
+
+def find_due_plans(db: Session, today: Optional[date] = None) -> List[tuple[str, str, str]]:
+    """
+    Fällige Pläne (heute/morgen, approved, nicht gelockt, Autopilot an) ohne Asset und ohne aktiven Job.
+    Returns:
+        [(plan_id, project_id, organization_id)]
+    """
+    today = today or datetime.utcnow().date()
+    tomorrow = today + timedelta(days=1)
+    has_asset = exists().where(models.VideoAsset.plan_id == models.Plan.id)
+    has_active_job = exists().where(
+        and_(
+            models.Job.organization_id == models.Project.organization_id,
+            models.Job.idempotency_key == _idempotency_key(models.Plan.id),
+            models.Job.type == JOB_TYPE,
+            models.Job.status.in_(ACTIVE_JOB_STATUSES),
+        )
+    )
+    stmt = (
+        select(models.Plan.id, models.Plan.project_id, models.Project.organization_id)
+        .join(models.Project, models.Project.id == models.Plan.project_id)
+        .where(
+            models.Project.autopilot_enabled.is_(True),
+            models.Plan.slot_date >= today,
+            models.Plan.slot_date <= tomorrow,
+            models.Plan.approved.is_(True),
+            models.Plan.locked.is_(False),
+            ~has_asset,
+            ~has_active_job,
+        )
+    )
+    return [tuple(row) for row in db.execute(stmt).all()]
+
+
+def create_generation_jobs(db: Session, due: List[tuple[str, str, str]]) -> List[tuple[str, str, str]]:
+    """
+    Legt für alle fälligen Pläne Jobs in einem Statement an. Existiert bereits ein nicht aktiver Job
+    mit demselben Key (failed/completed), wird er auf pending zurückgesetzt; aktive Jobs bleiben unberührt.
+    Returns:
+        [(job_id, project_id, plan_id)] der tatsächlich angelegten/wiederbelebten Jobs
+    """
+    if not due:
+        return []
+    insert = dialect_insert(db)
+    now = datetime.utcnow()
+    created: List[tuple[str, str, str]] = []
+    for start in range(0, len(due), INSERT_BATCH_SIZE):
+        rows = [
+            {
+                "id": models.uid(),
+                "organization_id": organization_id,
+                "project_id": project_id,
+                "type": JOB_TYPE,
+                "status": "pending",
+                "idempotency_key": f"gen:{plan_id}",
+                "payload": plan_id,
+                "created_at": now,
+            }
+            for plan_id, project_id, organization_id in due[start:start + INSERT_BATCH_SIZE]
+        ]
+        stmt = insert(models.Job).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Job.organization_id, models.Job.idempotency_key, models.Job.type],
+            index_where=models.Job.idempotency_key.isnot(None),
+            set_={
+                "status": "pending",
+                "project_id": stmt.excluded.project_id,
+                "payload": stmt.excluded.payload,
+                "created_at": stmt.excluded.created_at,
+            },
+            where=models.Job.status.notin_(ACTIVE_JOB_STATUSES),
+        ).returning(models.Job.id, models.Job.project_id, models.Job.payload)
+        created.extend((job_id, project_id, plan_id) for job_id, project_id, plan_id in db.execute(stmt).all())
+    return created
@@ -1,6 +1,8 @@
-from datetime import datetime, timedelta
+from typing import Dict
 from sqlalchemy.orm import Session
 from .. import models
+from .usage_counters import get_usage_counters
+from .usage_writer import get_usage_writer
 
 DEFAULT_LIMITS = {
     "video_generation": 120,
@@ -15,36 +17,48 @@ class QuotaExceeded(Exception):
     pass
 
 
-def log_usage(db: Session, organization_id: str, metric: str, amount: int = 1):
-    entry = models.UsageLedger(organization_id=organization_id, metric=metric, amount=amount)
-    db.add(entry)
-    db.commit()
-    return entry
+def log_usage(db: Session, organization_id: str, metric: str, amount: int = 1, dedup_key: str | None = None) -> str:
+    """
+    Erfasst Usage ohne eigenen Commit: das Event wird gepuffert und gebündelt geschrieben
+    (services/usage_writer.py), der Monatszähler sofort erhöht. Returns: dedup_key
+    """
+    key = get_usage_writer().record(organization_id, metric, amount, dedup_key=dedup_key)
+    # Nur vom Aufrufer vergebene Keys können wiederholt werden; generierte brauchen keinen Marker
+    get_usage_counters().increment(organization_id, metric, amount, dedup_key=dedup_key)
+    return key
+
+
+def _active_jobs(db: Session, organization_id: str) -> int:
+    return (
+        db.query(models.Job)
+        .filter(models.Job.organization_id == organization_id, models.Job.status.in_(["pending", "in_progress"]))
+        .count()
+    )
+
+
+def enforce_quotas(db: Session, organization_id: str, limits: Dict[str, int | None]):
+    """
+    Prüft mehrere Quotas auf einmal (Monatszähler in einem Redis-Roundtrip).
+    concurrent_jobs ist kein Monatszähler und wird weiterhin über aktive Jobs gezählt.
+    """
+    resolved = {
+        metric: limit or DEFAULT_LIMITS.get(metric, DEFAULT_LIMITS["video_generation"])
+        for metric, limit in limits.items()
+    }
+    counted = [metric for metric in resolved if metric != "concurrent_jobs"]
+    counters = get_usage_counters()
+    totals = counters.totals(db, organization_id, counted)
+    if not counters.redis_client:
+        # Ledger-Fallback: noch gepufferte Events mitzählen
+        for metric, pending in get_usage_writer().pending_totals(organization_id, counted).items():
+            totals[metric] = totals.get(metric, 0) + pending
+    if "concurrent_jobs" in resolved:
+        totals["concurrent_jobs"] = _active_jobs(db, organization_id)
+    for metric, limit in resolved.items():
+        total = totals.get(metric, 0)
+        if total >= limit:
+            raise QuotaExceeded(f"Quota exceeded for {metric}: {total}/{limit}")
 
 
 def enforce_quota(db: Session, organization_id: str, metric: str, limit: int | None = None):
-    limit = limit or DEFAULT_LIMITS.get(metric, DEFAULT_LIMITS["video_generation"])
-    start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    # concurrency check special-case
-    if metric == "concurrent_jobs":
-        active = (
-            db.query(models.Job)
-            .filter(models.Job.organization_id == organization_id, models.Job.status.in_(["pending", "in_progress"]))
-            .count()
-        )
-        total = active
-    else:
-        # FIX: Use sum(amount) instead of count() to correctly enforce quotas
-        from sqlalchemy import func
-        result = (
-            db.query(func.sum(models.UsageLedger.amount))
-            .filter(
-                models.UsageLedger.organization_id == organization_id,
-                models.UsageLedger.metric == metric,
-                models.UsageLedger.created_at >= start,
-            )
-            .scalar()
-        )
-        total = result if result is not None else 0
-    if total >= limit:
-        raise QuotaExceeded(f"Quota exceeded for {metric}: {total}/{limit}")
+    enforce_quotas(db, organization_id, {metric: limit})
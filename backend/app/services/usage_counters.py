@@ -0,0 +1,188 @@
+"""
+Monatliche Usage-Zähler in Redis für O(1)-Quota-Checks.
+usage_ledger bleibt die Quelle der Wahrheit: log_usage schreibt den Ledger und erhöht
+danach den Zähler; ein periodischer Reconcile-Lauf gleicht die Zähler mit den Ledger-Summen ab.
+Ohne Redis (oder bei kaltem Zähler) wird aus dem Ledger summiert.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+import redis
+from redis.exceptions import LockError
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .. import models
+from .usage_writer import FLUSH_LOCK_KEY, FLUSH_LOCK_TIMEOUT
+from ..config import get_settings
+
+settings = get_settings()
+
+# Zähler überleben den Monat um einige Tage (Reconcile/Reporting), danach verfallen sie
+COUNTER_TTL_SECONDS = 40 * 24 * 3600
+# Gezählte dedup_keys: ein wiederholtes log_usage erhöht den Zähler nicht erneut (der Ledger dedupliziert ohnehin)
+DEDUP_MARKER_TTL_SECONDS = 24 * 3600
+# INCRBY nur auf vorhandenem Key, sonst würde ein kalter Zähler bei `amount` statt der Ledger-Summe starten.
+# Optional KEYS[2]: Marker des dedup_key, per SET NX im selben Skript (nil = schon gezählt)
+INCR_EXISTING_SCRIPT = """
+if KEYS[2] and not redis.call('SET', KEYS[2], 1, 'NX', 'EX', ARGV[2]) then return nil end
+if redis.call('EXISTS', KEYS[1]) == 1 then return redis.call('INCRBY', KEYS[1], ARGV[1]) end
+return nil
+"""
+
+
+def period_start(now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.utcnow()
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def period_key(now: Optional[datetime] = None) -> str:
+    return period_start(now).strftime("%Y%m")
+
+
+class UsageCounters:
+    """Redis-Zähler pro Org, Metrik und Monat."""
+
+    def __init__(self):
+        self.redis_client: Optional[redis.Redis] = None
+        self._init_redis()
+
+    def _init_redis(self):
+        """Initialisiert Redis-Client falls verfügbar."""
+        try:
+            if settings.redis_url:
+                self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+                self.redis_client.ping()
+        except Exception:
+            self.redis_client = None
+
+    @staticmethod
+    def _key(organization_id: str, metric: str, period: str) -> str:
+        return f"usage:{organization_id}:{metric}:{period}"
+
+    def increment(
+        self,
+        organization_id: str,
+        metric: str,
+        amount: int = 1,
+        now: Optional[datetime] = None,
+        dedup_key: Optional[str] = None,
+    ):
+        """
+        Erhöht den Zähler atomar (nur wenn er bereits existiert; kalte Zähler werden beim Lesen aus dem Ledger befüllt).
+        Mit dedup_key höchstens einmal pro Key, wie im Ledger.
+        """
+        if not self.redis_client:
+            return
+        key = self._key(organization_id, metric, period_key(now))
+        try:
+            if dedup_key:
+                self.redis_client.eval(INCR_EXISTING_SCRIPT, 2, key, f"usage-dedup:{dedup_key}", int(amount), DEDUP_MARKER_TTL_SECONDS)
+            else:
+                self.redis_client.eval(INCR_EXISTING_SCRIPT, 1, key, int(amount))
+        except Exception:
+            pass
+
+    def _ledger_totals(self, db: Session, organization_id: str, metrics: Iterable[str], now: Optional[datetime]) -> Dict[str, int]:
+        metrics = list(metrics)
+        rows = (
+            db.query(models.UsageLedger.metric, func.sum(models.UsageLedger.amount))
+            .filter(
+                models.UsageLedger.organization_id == organization_id,
+                models.UsageLedger.metric.in_(metrics),
+                models.UsageLedger.created_at >= period_start(now),
+            )
+            .group_by(models.UsageLedger.metric)
+            .all()
+        )
+        totals = {metric: 0 for metric in metrics}
+        totals.update({metric: int(total or 0) for metric, total in rows})
+        return totals
+
+    def totals(self, db: Session, organization_id: str, metrics: Iterable[str], now: Optional[datetime] = None) -> Dict[str, int]:
+        """Aktuelle Monatssummen mehrerer Metriken in einem Redis-Roundtrip (MGET)."""
+        metrics = list(metrics)
+        if not metrics:
+            return {}
+        if not self.redis_client:
+            return self._ledger_totals(db, organization_id, metrics, now)
+        period = period_key(now)
+        keys = [self._key(organization_id, metric, period) for metric in metrics]
+        try:
+            values = self.redis_client.mget(keys)
+        except Exception:
+            return self._ledger_totals(db, organization_id, metrics, now)
+        totals = {metric: int(value) for metric, value in zip(metrics, values) if value is not None}
+        cold = [metric for metric in metrics if metric not in totals]
+        if cold:
+            # Kalte Zähler einmalig aus dem Ledger befüllen (SET NX: parallele Befüllung gewinnt nicht doppelt)
+            seeded = self._ledger_totals(db, organization_id, cold, now)
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for metric, total in seeded.items():
+                    pipe.set(self._key(organization_id, metric, period), total, ex=COUNTER_TTL_SECONDS, nx=True)
+                pipe.execute()
+            except Exception:
+                pass
+            totals.update(seeded)
+        return totals
+
+    def reconcile(
+        self,
+        db: Session,
+        now: Optional[datetime] = None,
+        pending: Optional[Callable[[], Set[Tuple[str, str]]]] = None,
+    ) -> int:
+        """
+        Gleicht die vorhandenen Zähler des laufenden Monats mit den Ledger-Summen ab (eine GROUP-BY-Query).
+        Kein SET: Snapshot vor der Query, danach atomar Zähler += Ledger - Snapshot, damit INCRBYs
+        zwischen Snapshot und Abgleich erhalten bleiben. Kalte Zähler befüllt totals().
+        `pending` liefert (org, metric) mit noch nicht geschriebenen Events; deren Zähler sind dem
+        Ledger voraus und bleiben unverändert. Snapshot, pending und Query laufen unter dem Flush-Lock:
+        kein Event kann dazwischen in den Ledger wandern (sonst zählte es Ledger und INCRBY doppelt).
+        Returns: Anzahl korrigierter Zähler (0, wenn der Lock nicht zu bekommen war).
+        """
+        if not self.redis_client:
+            return 0
+        period = period_key(now)
+        try:
+            with self.redis_client.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT, blocking_timeout=FLUSH_LOCK_TIMEOUT):
+                keys = list(self.redis_client.scan_iter(match=self._key("*", "*", period), count=1000))
+                if not keys:
+                    return 0
+                snapshot = {key: value for key, value in zip(keys, self.redis_client.mget(keys)) if value is not None}
+                # Nach dem Snapshot: der Stream wächst unter dem Lock nur, ein Event aus der Lücke
+                # Snapshot/pending (INCRBY evtl. schon im Snapshot) wird so ebenfalls übersprungen
+                skip = {self._key(organization_id, metric, period) for organization_id, metric in (pending() if pending else ())}
+                rows = (
+                    db.query(models.UsageLedger.organization_id, models.UsageLedger.metric, func.sum(models.UsageLedger.amount))
+                    .filter(models.UsageLedger.created_at >= period_start(now))
+                    .group_by(models.UsageLedger.organization_id, models.UsageLedger.metric)
+                    .all()
+                )
+        except LockError:
+            return 0  # Flush läuft gerade, nächster Lauf gleicht ab
+        ledger = {self._key(organization_id, metric, period): int(total or 0) for organization_id, metric, total in rows}
+        pipe = self.redis_client.pipeline(transaction=False)
+        corrected = 0
+        for key, value in snapshot.items():
+            if key in skip:
+                continue
+            diff = ledger.get(key, 0) - int(value)
+            if diff:
+                pipe.eval(INCR_EXISTING_SCRIPT, 1, key, diff)
+                corrected += 1
+        pipe.execute()
+        return corrected
+
+
+# Globale Instanz
+_usage_counters: Optional[UsageCounters] = None
+
+
+def get_usage_counters() -> UsageCounters:
+    """Singleton für die Usage-Zähler."""
+    global _usage_counters
+    if _usage_counters is None:
+        _usage_counters = UsageCounters()
+    return _usage_counters
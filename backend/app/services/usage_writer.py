@@ -0,0 +1,320 @@
+"""
+Gepufferter Writer für usage_ledger.
+log_usage legt nur noch ein Event ab (Redis-Stream, sonst In-Memory-Puffer); Events werden
+gesammelt per Multi-Row-INSERT (Postgres: COPY in eine Temp-Tabelle) geschrieben.
+Jedes Event trägt einen dedup_key, Duplikate werden per ON CONFLICT DO NOTHING verworfen,
+daher ist Wiederholen nach Fehlern sicher (at-least-once). Im selben Commit werden die neu
+eingefügten Mengen auf usage_monthly addiert.
+"""
+import atexit
+import csv
+import io
+import threading
+import uuid
+from collections import deque
+from datetime import date, datetime
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import redis
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+from ..db import SessionLocal, dialect_insert
+
+settings = get_settings()
+
+STREAM_KEY = "usage:ledger"
+CONSUMER_GROUP = "usage-writer"
+# Geschrieben wird nur unter diesem Lock; UsageCounters.reconcile hält ihn zwischen Snapshot und Ledger-Query
+FLUSH_LOCK_KEY = "usage:ledger:flush-lock"
+FLUSH_LOCK_TIMEOUT = 120
+COLUMNS = ("id", "organization_id", "metric", "amount", "dedup_key", "created_at")
+
+
+def _event(organization_id: str, metric: str, amount: int, dedup_key: Optional[str], created_at: Optional[datetime]) -> Dict[str, str]:
+    return {
+        "organization_id": organization_id,
+        "metric": metric,
+        "amount": str(int(amount)),
+        "dedup_key": dedup_key or uuid.uuid4().hex,
+        "created_at": (created_at or datetime.utcnow()).isoformat(),
+    }
+
+
+def _rows(events: Iterable[Dict[str, str]]) -> List[dict]:
+    rows = {}
+    for event in events:
+        # Duplikate innerhalb eines Batches vorab entfernen (ON CONFLICT greift nur gegen bestehende Zeilen)
+        rows[event["dedup_key"]] = {
+            "id": models.uid(),
+            "organization_id": event["organization_id"],
+            "metric": event["metric"],
+            "amount": int(event["amount"]),
+            "dedup_key": event["dedup_key"],
+            "created_at": datetime.fromisoformat(event["created_at"]),
+        }
+    return list(rows.values())
+
+
+def write_batch(db: Session, events: Iterable[Dict[str, str]]) -> int:
+    """
+    Schreibt Events in einem Rutsch (idempotent über dedup_key) und addiert die tatsächlich
+    eingefügten Mengen auf usage_monthly. Returns: Anzahl neu eingefügter Zeilen.
+    """
+    rows = _rows(events)
+    if not rows:
+        return 0
+    if db.get_bind().dialect.name == "postgresql":
+        inserted = _copy_batch(db, rows)
+    else:
+        stmt = dialect_insert(db)(models.UsageLedger).values(rows)
+        stmt = stmt.on_conflict_do_nothing(index_elements=["dedup_key"]).returning(
+            models.UsageLedger.organization_id,
+            models.UsageLedger.metric,
+            models.UsageLedger.amount,
+            models.UsageLedger.created_at,
+        )
+        inserted = db.execute(stmt).all()
+    _apply_monthly(db, inserted)
+    return len(inserted)
+
+
+def _apply_monthly(db: Session, inserted: Iterable[tuple]):
+    """Addiert eingefügte Ledger-Zeilen (org, metric, amount, created_at) auf die Monats-Rollups."""
+    sums: Dict[tuple, int] = {}
+    for organization_id, metric, amount, created_at in inserted:
+        period = date(created_at.year, created_at.month, 1)
+        key = (organization_id, metric, period)
+        sums[key] = sums.get(key, 0) + int(amount or 0)
+    if not sums:
+        return
+    now = datetime.utcnow()
+    stmt = dialect_insert(db)(models.UsageMonthly).values([
+        {"id": models.uid(), "organization_id": organization_id, "metric": metric, "period": period, "amount": amount, "updated_at": now}
+        for (organization_id, metric, period), amount in sums.items()
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["organization_id", "metric", "period"],
+        set_={"amount": models.UsageMonthly.amount + stmt.excluded.amount, "updated_at": stmt.excluded.updated_at},
+    ))
+
+
+def _copy_batch(db: Session, rows: List[dict]) -> List[tuple]:
+    """COPY in eine Temp-Tabelle, dann INSERT ... SELECT mit ON CONFLICT DO NOTHING. Returns: eingefügte Zeilen."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column] for column in COLUMNS])
+    buffer.seek(0)
+    columns = ", ".join(COLUMNS)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS usage_ledger_stage "
+            "(LIKE usage_ledger INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        cursor.copy_expert(f"COPY usage_ledger_stage ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute(
+            f"INSERT INTO usage_ledger ({columns}) SELECT {columns} FROM usage_ledger_stage "
+            "ON CONFLICT (dedup_key) DO NOTHING "
+            "RETURNING organization_id, metric, amount, created_at"
+        )
+        inserted = cursor.fetchall()
+        # ON COMMIT DELETE ROWS leert erst beim Commit: weitere Batches derselben Transaktion
+        # (flush_memory) würden sonst alle vorherigen erneut einfügen
+        cursor.execute("TRUNCATE usage_ledger_stage")
+        return inserted
+    finally:
+        cursor.close()
+
+
+class UsageLedgerWriter:
+    """Puffert Usage-Events und schreibt sie gebündelt in usage_ledger."""
+
+    def __init__(self, batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.batch_size = batch_size or settings.usage_flush_batch_size
+        self.flush_interval = flush_interval or settings.usage_flush_interval
+        self.redis_client: Optional[redis.Redis] = None
+        self.consumer = f"{uuid.uuid4().hex[:8]}"
+        self._buffer: Deque[Dict[str, str]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._init_redis()
+
+    def _init_redis(self):
+        """Initialisiert Redis-Client und Consumer-Group falls verfügbar."""
+        try:
+            if settings.redis_url:
+                self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+                self.redis_client.ping()
+                try:
+                    self.redis_client.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id="0", mkstream=True)
+                except redis.ResponseError:
+                    pass  # Gruppe existiert bereits
+        except Exception:
+            self.redis_client = None
+
+    def record(
+        self,
+        organization_id: str,
+        metric: str,
+        amount: int = 1,
+        dedup_key: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+    ) -> str:
+        """Legt ein Usage-Event ab (kein DB-Commit). Returns: dedup_key"""
+        event = _event(organization_id, metric, amount, dedup_key, created_at)
+        if self.redis_client:
+            try:
+                self.redis_client.xadd(STREAM_KEY, event)
+                return event["dedup_key"]
+            except Exception:
+                pass
+        with self._lock:
+            self._buffer.append(event)
+            full = len(self._buffer) >= self.batch_size
+        self._ensure_flusher()
+        if full:
+            self._wakeup.set()
+        return event["dedup_key"]
+
+    def pending_totals(self, organization_id: str, metrics: Iterable[str]) -> Dict[str, int]:
+        """Noch nicht geschriebene Mengen aus dem In-Memory-Puffer (für Quota-Checks ohne Redis)."""
+        wanted = set(metrics)
+        totals: Dict[str, int] = {}
+        with self._lock:
+            for event in self._buffer:
+                if event["organization_id"] == organization_id and event["metric"] in wanted:
+                    totals[event["metric"]] = totals.get(event["metric"], 0) + int(event["amount"])
+        return totals
+
+    def pending_keys(self) -> Set[Tuple[str, str]]:
+        """(org, metric) aller noch nicht geschriebenen Events (Stream inkl. unbestätigter, Puffer)."""
+        keys: Set[Tuple[str, str]] = set()
+        if self.redis_client:
+            # Einträge werden erst nach dem Commit gelöscht, XRANGE sieht also auch gelesene, ungeschriebene Events
+            start = "-"
+            while True:
+                messages = self.redis_client.xrange(STREAM_KEY, min=start, count=self.batch_size)
+                keys.update((fields["organization_id"], fields["metric"]) for _id, fields in messages if fields)
+                if len(messages) < self.batch_size:
+                    break
+                start = f"({messages[-1][0]}"
+        with self._lock:
+            keys.update((event["organization_id"], event["metric"]) for event in self._buffer)
+        return keys
+
+    def _ensure_flusher(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="usage-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush_memory()
+            except Exception:
+                pass  # Events bleiben im Puffer, nächster Versuch im nächsten Intervall
+
+    def flush_memory(self, db: Optional[Session] = None) -> int:
+        """Schreibt den In-Memory-Puffer. Bei Fehlern werden die Events zurückgelegt."""
+        with self._flush_lock:
+            with self._lock:
+                events = list(self._buffer)
+            if not events:
+                return 0
+            owned = db is None
+            db = db or SessionLocal()
+            try:
+                for start in range(0, len(events), self.batch_size):
+                    write_batch(db, events[start:start + self.batch_size])
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                if owned:
+                    db.close()
+            with self._lock:
+                # Nur die geschriebenen Events entfernen; inzwischen neu hinzugekommene bleiben
+                for _ in range(len(events)):
+                    self._buffer.popleft()
+            return len(events)
+
+    def flush_stream(self, db: Session, min_idle_ms: int = 60000, max_batches: Optional[int] = None) -> int:
+        """
+        Liest Events aus dem Redis-Stream (Consumer-Group), schreibt sie und bestätigt sie erst nach dem Commit.
+        Batch für Batch, höchstens max_batches pro Lauf: Speicher und unbestätigte Events bleiben bei einem
+        Rückstau auf eine Batchgröße begrenzt. Nicht bestätigte Events abgestürzter Consumer werden nach
+        min_idle_ms übernommen.
+        """
+        if not self.redis_client:
+            return 0
+        written = 0
+        claimed = []
+        try:
+            _cursor, claimed, *_ = self.redis_client.xautoclaim(
+                STREAM_KEY, CONSUMER_GROUP, self.consumer, min_idle_time=min_idle_ms, start_id="0-0", count=self.batch_size
+            )
+        except redis.ResponseError:
+            pass  # XAUTOCLAIM erst ab Redis 6.2
+        for _ in range(max_batches or settings.usage_flush_max_batches):
+            if claimed:
+                messages, claimed = claimed, []
+            else:
+                response = self.redis_client.xreadgroup(CONSUMER_GROUP, self.consumer, {STREAM_KEY: ">"}, count=self.batch_size)
+                messages = response[0][1] if response else []
+                if not messages:
+                    break
+            with self.redis_client.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT, blocking_timeout=FLUSH_LOCK_TIMEOUT):
+                write_batch(db, [fields for _id, fields in messages if fields])
+                db.commit()
+                ids = [message_id for message_id, _fields in messages]
+                self.redis_client.xack(STREAM_KEY, CONSUMER_GROUP, *ids)
+                self.redis_client.xdel(STREAM_KEY, *ids)
+            written += len(messages)
+        return written
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """Schreibt Ausstehendes: Stream (bis usage_flush_max_batches) und Puffer."""
+        written = 0
+        if self.redis_client:
+            owned = db is None
+            session = db or SessionLocal()
+            try:
+                written += self.flush_stream(session)
+            finally:
+                if owned:
+                    session.close()
+        return written + self.flush_memory(db)
+
+
+# Globale Instanz
+_writer: Optional[UsageLedgerWriter] = None
+
+
+def get_usage_writer() -> UsageLedgerWriter:
+    """Singleton für den Ledger-Writer."""
+    global _writer
+    if _writer is None:
+        _writer = UsageLedgerWriter()
+        # Puffer beim Beenden des Prozesses noch schreiben
+        atexit.register(_flush_at_exit)
+    return _writer
+
+
+def _flush_at_exit():
+    if _writer is not None:
+        try:
+            _writer.flush_memory()
+        except Exception:
+            pass
@@ -1,17 +1,22 @@
 from celery import shared_task
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-import anyio
 import json
 from .db import SessionLocal
 from . import models
 from .services.orchestrator import Orchestrator
+from .services.async_runtime import run_async
+from .services import publish_polling, publish_tracking
+from .services import metrics as metrics_service
+from .services import progress as progress_service
+from .providers.http_client import get_http_registry, timeout_profile
 from .providers.tiktok_official import TikTokClient
 from .providers.openrouter_client import OpenRouterClient
 from .providers.falai_client import FalAIClient
 from .providers.voice_translation_client import VoiceTranslationClient
 from .providers.storage import get_storage, tenant_prefix
-from .security import decrypt_secret, encrypt_secret
+from .services.blob_store import attach_asset_files
+from .security import decrypt_many, decrypt_secret, encrypt_secret
 from .config import get_settings
 
 settings = get_settings()
@@ -21,10 +26,23 @@ def _db() -> Session:
     return SessionLocal()
 
 
-def _job_run(db: Session, job: models.Job, status: str, message: str | None = None):
-    run = models.JobRun(job_id=job.id, status=status, message=message)
-    db.add(run)
-    db.commit()
+def _job_run(db: Session, job: models.Job, status: str, message: str | None = None, **progress):
+    progress_service.record_progress(db, job, status, message, **progress)
+
+
+def _render_thumbnail(video_path, thumb_path):
+    """Erstes Frame als JPEG; None wenn ffmpeg fehlt oder scheitert (Asset nutzt dann das Video)."""
+    import subprocess
+
+    ffmpeg_path = get_settings().ffmpeg_path
+    if not ffmpeg_path:
+        return None
+    try:
+        cmd = [ffmpeg_path, "-i", str(video_path), "-frames:v", "1", "-y", str(thumb_path)]
+        subprocess.run(cmd, check=True, capture_output=True, timeout=10)
+        return thumb_path
+    except Exception:
+        return None
 
 
 @shared_task(bind=True, name="tasks.generate_assets")
@@ -41,7 +59,7 @@ def generate_assets_task(self, job_id: str, project_id: str, plan_id: str):
         _job_run(db, job, "in_progress")
         db.commit()
         
-        asset = anyio.run(orchestrator.generate_assets, db, project, plan)
+        asset = run_async(orchestrator.generate_assets, db, project, plan)
         
         # update plan status for visibility in calendar
         plan.status = "assets_generated"
@@ -106,7 +124,7 @@ def publish_now_task(self, job_id: str, asset_id: str, access_token: str, open_i
             refresh = decrypt_secret(token_row.refresh_token, settings.fernet_secret)
             if refresh:
                 client = TikTokClient(organization_id=org_id)
-                resp = anyio.run(client.refresh, refresh)
+                resp = run_async(client.refresh, refresh)
                 new_access = resp.get("data", {}).get("access_token")
                 new_refresh = resp.get("data", {}).get("refresh_token", refresh)
                 if new_access:
@@ -127,9 +145,9 @@ def publish_now_task(self, job_id: str, asset_id: str, access_token: str, open_i
         _job_run(db, job, "in_progress")
         db.commit()
         
-        result = anyio.run(orchestrator.publish_now, asset, access_token, open_id, use_inbox=use_inbox)
-        asset.status = "published"
-        asset.publish_response = str(result)
+        result = run_async(orchestrator.publish_now, asset, access_token, open_id, use_inbox=use_inbox)
+        publish_tracking.mark_published(asset)
+        publish_tracking.store_publish_response(asset, result)
         db.add(asset)
         # keep plan in sync
         if asset.plan_id:
@@ -189,19 +207,11 @@ def fetch_metrics_task(self, job_id: str, project_id: str):
         if not access:
             raise RuntimeError("Missing access token")
         client = TikTokClient(organization_id=project.organization_id)
-        resp = anyio.run(client.get_metrics, access, account.handle)
+        resp = run_async(client.get_metrics, access, account.handle)
         videos = resp.get("data", {}).get("videos", [])
-        for v in videos:
-            stats = v.get("statistics", {}) or {}
-            metric = models.Metric(
-                organization_id=project.organization_id,
-                project_id=project_id,
-                plan_id=None,
-                metric="views",
-                value=stats.get("view_count", 0),
-                open_id=account.handle,
-            )
-            db.add(metric)
+        # Ein Snapshot pro Video und Bucket (Upsert), danach Rollups des Projekts aktualisieren
+        metrics_service.upsert_snapshots(db, project, account.handle, videos)
+        metrics_service.rollup_metrics(db, project_ids=[project.id])
         job.status = "completed"
         db.add(job)
         _job_run(db, job, "completed", message=f"videos={len(videos)}")
@@ -225,6 +235,79 @@ def fetch_metrics_task(self, job_id: str, project_id: str):
             db.close()
 
 
+@shared_task(name="tasks.rollup_metrics")
+def rollup_metrics_task():
+    """Periodischer Task: stündliche und tägliche Metrik-Rollups im aktuellen Zeitfenster neu berechnen."""
+    db = _db()
+    try:
+        written = metrics_service.rollup_metrics(db)
+        db.commit()
+        return f"rollups={written}"
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@shared_task(name="tasks.reconcile_usage_counters")
+def reconcile_usage_counters_task():
+    """Periodischer Task: Redis-Usage-Zähler mit den Ledger-Summen des laufenden Monats abgleichen."""
+    from .services.usage_counters import get_usage_counters
+    from .services.usage_writer import get_usage_writer
+
+    writer = get_usage_writer()
+    db = _db()
+    try:
+        # Ausstehende Events zuerst schreiben; was danach noch aussteht, überspringt reconcile
+        writer.flush(db)
+        return f"counters={get_usage_counters().reconcile(db, pending=writer.pending_keys)}"
+    finally:
+        db.close()
+
+
+@shared_task(name="tasks.flush_usage_ledger")
+def flush_usage_ledger_task():
+    """Periodischer Task: gepufferte Usage-Events (Redis-Stream) gebündelt in usage_ledger schreiben."""
+    from .services.usage_writer import get_usage_writer
+
+    db = _db()
+    try:
+        return f"written={get_usage_writer().flush(db)}"
+    finally:
+        db.close()
+
+
+@shared_task(name="tasks.rotate_encrypted_secrets")
+def rotate_encrypted_secrets_task():
+    """Manueller Task nach Schlüsselwechsel: Secrets mit dem aktuellen Fernet-Schlüssel neu verschlüsseln."""
+    from .services.credential_secrets import rotate_encrypted_secrets
+
+    db = _db()
+    try:
+        return f"rotated={rotate_encrypted_secrets(db)}"
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@shared_task(name="tasks.collect_orphaned_blobs")
+def collect_orphaned_blobs_task():
+    """Periodischer Task: Blobs ohne Referenzen nach Ablauf der Karenzzeit löschen."""
+    from .services.blob_store import collect_orphaned_blobs
+
+    db = _db()
+    try:
+        return f"deleted={collect_orphaned_blobs(db, get_storage())}"
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
 @shared_task(name="tasks.enqueue_due_plans")
 def enqueue_due_plans():
     """
@@ -233,76 +316,20 @@ def enqueue_due_plans():
     """
     db = _db()
     try:
-        from datetime import datetime, timedelta, date
-        from .services.idempotency import IdempotencyService
-        from .celery_app import celery
-        
-        # Finde Pläne die in den nächsten 24 Stunden fällig sind und noch keine Assets haben
-        now = datetime.utcnow()
-        tomorrow = (now + timedelta(days=1)).date()
-        today = now.date()
-        
-        # Finde alle Projekte mit aktiviertem Autopilot
-        projects = db.query(models.Project).filter(models.Project.autopilot_enabled == True).all()
-        
-        enqueued = 0
-        for project in projects:
-            # Finde Pläne die heute oder morgen fällig sind, approved sind, aber noch keine Assets haben
-            plans = (
-                db.query(models.Plan)
-                .filter(
-                    models.Plan.project_id == project.id,
-                    models.Plan.slot_date >= today,
-                    models.Plan.slot_date <= tomorrow,
-                    models.Plan.approved == True,
-                    models.Plan.locked == False,
-                )
-                .all()
-            )
-            
-            for plan in plans:
-                # Prüfe ob bereits Asset existiert
-                existing_asset = (
-                    db.query(models.VideoAsset)
-                    .filter(models.VideoAsset.plan_id == plan.id)
-                    .first()
-                )
-                
-                if existing_asset:
-                    continue  # Bereits generiert
-                
-                # Prüfe ob bereits Job existiert
-                idem = f"gen:{plan.id}"
-                existing_job = (
-                    db.query(models.Job)
-                    .filter(
-                        models.Job.organization_id == project.organization_id,
-                        models.Job.idempotency_key == idem,
-                        models.Job.type == "generate_assets",
-                        models.Job.status.in_(["pending", "in_progress"]),
-                    )
-                    .first()
-                )
-                
-                if existing_job:
-                    continue  # Bereits gequeued
-                
-                # Erstelle Job
-                job, is_new = IdempotencyService.check_and_create_job(
-                    db=db,
-                    organization_id=project.organization_id,
-                    project_id=project.id,
-                    job_type="generate_assets",
-                    idempotency_key=idem,
-                    payload=str(plan.id),
-                )
-                
-                if is_new:
-                    celery.send_task("tasks.generate_assets", args=[job.id, project.id, plan.id])
-                    enqueued += 1
-        
+        from celery import group
+        from .services import scheduler
+
+        # Anti-Join + ein Bulk-INSERT; DB-Verbindung wird vor dem Publizieren freigegeben
+        created = scheduler.create_generation_jobs(db, scheduler.find_due_plans(db))
         db.commit()
-        return f"enqueued={enqueued}"
+        db.close()
+        db = None
+        if created:
+            group(
+                generate_assets_task.s(job_id, project_id, plan_id)
+                for job_id, project_id, plan_id in created
+            ).apply_async()
+        return f"enqueued={len(created)}"
     except Exception as exc:
         if db:
             db.rollback()
@@ -317,86 +344,8 @@ def enqueue_due_plans():
 def poll_publish_status(self, asset_id: str):
     db = _db()
     try:
-        assets: list[models.VideoAsset]
-        if asset_id == "__broadcast__":
-            assets = db.query(models.VideoAsset).filter(models.VideoAsset.status.in_(["published", "pending", "processing"])).all()
-        else:
-            asset = db.query(models.VideoAsset).filter(models.VideoAsset.id == asset_id).first()
-            assets = [asset] if asset else []
-        if not assets:
-            return "missing asset"
-        updated = 0
-        for asset in assets:
-            project = db.query(models.Project).filter(models.Project.id == asset.project_id).first()
-            if not project:
-                continue
-            tokens = (
-                db.query(models.OAuthToken, models.SocialAccount)
-                .join(models.SocialAccount, models.OAuthToken.social_account_id == models.SocialAccount.id)
-                .filter(models.SocialAccount.organization_id == project.organization_id, models.SocialAccount.platform == "tiktok")
-                .first()
-            )
-            if not tokens:
-                continue
-            token_row, account = tokens
-            access = decrypt_secret(token_row.access_token, settings.fernet_secret)
-            refresh = decrypt_secret(token_row.refresh_token, settings.fernet_secret)
-            if not access:
-                continue
-            client = TikTokClient(organization_id=project.organization_id)
-            # refresh if needed
-            if token_row.expires_at and token_row.expires_at < datetime.utcnow() + timedelta(minutes=5):
-                if refresh:
-                    resp = anyio.run(client.refresh, refresh)
-                    new_access = resp.get("data", {}).get("access_token")
-                    new_refresh = resp.get("data", {}).get("refresh_token", refresh)
-                    expires_in = resp.get("data", {}).get("expires_in", 3600)  # Default 1 hour
-                    if new_access:
-                        access = new_access
-                        token_row.access_token = encrypt_secret(new_access, settings.fernet_secret)
-                        if new_refresh:
-                            token_row.refresh_token = encrypt_secret(new_refresh, settings.fernet_secret)
-                        # FIX: Update expires_at after refresh
-                        token_row.expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
-                        db.add(token_row)
-                        db.commit()
-            video_id = None
-            if asset.publish_response:
-                try:
-                    import json
-                    import ast
-                    # FIX: Proper JSON parsing - handle both JSON strings and Python dict strings
-                    response_str = asset.publish_response
-                    # Try JSON first
-                    parsed = None
-                    try:
-                        parsed = json.loads(response_str)
-                    except json.JSONDecodeError:
-                        # If JSON fails, try eval (for Python dict strings like "{'data': {...}}")
-                        try:
-                            parsed = ast.literal_eval(response_str)
-                        except (ValueError, SyntaxError):
-                            # Last resort: try to extract video_id with regex
-                            import re
-                            match = re.search(r'"video_id"\s*:\s*"([^"]+)"', response_str)
-                            if match:
-                                video_id = match.group(1)
-                                parsed = {}
-                            else:
-                                parsed = None
-                    if parsed:
-                        video_id = parsed.get("data", {}).get("video_id") or parsed.get("video_id")
-                except Exception:
-                    pass
-            if not video_id:
-                continue
-            resp = anyio.run(client.get_video_status, access, account.handle, video_id)
-            asset.publish_response = str(resp)
-            status_val = resp.get("data", {}).get("status", "unknown")
-            asset.status = status_val
-            db.add(asset)
-            updated += 1
-        db.commit()
+        # "__broadcast__": alle fälligen Assets (next_poll_at), gruppiert nach Org und parallel abgefragt
+        updated = publish_polling.poll_assets(db, None if asset_id == "__broadcast__" else asset_id)
         return f"updated={updated}"
     except Exception as exc:
         # Exponential backoff: 2^retry_count * 60 seconds, max 600 seconds
@@ -429,16 +378,17 @@ def refresh_expiring_tokens(self):
         
         refreshed = 0
         failed = 0
-        for token_row, account in tokens:
+        # Alle Refresh-Tokens in einem Batch entschlüsseln
+        refresh_tokens = decrypt_many([token_row.refresh_token for token_row, _account in tokens], settings.fernet_secret)
+        for (token_row, account), refresh_token in zip(tokens, refresh_tokens):
             try:
-                refresh_token = decrypt_secret(token_row.refresh_token, settings.fernet_secret)
                 if not refresh_token:
                     failed += 1
                     continue
                 
                 # FIX: Pass organization_id for rate limiting
                 client = TikTokClient(organization_id=account.organization_id)
-                resp = anyio.run(client.refresh, refresh_token)
+                resp = run_async(client.refresh, refresh_token)
                 new_access = resp.get("data", {}).get("access_token")
                 new_refresh = resp.get("data", {}).get("refresh_token", refresh_token)
                 
@@ -496,11 +446,9 @@ def youtube_transcribe_task(self, job_id: str, payload_json: str):
         org_id = job.organization_id
         
         _job_run(db, job, "in_progress", message=f"Starte Transcription von {url}")
-        db.commit()
         
         # 1. YouTube Video herunterladen und Audio extrahieren
         _job_run(db, job, "in_progress", message="Lade YouTube-Video herunter und extrahiere Audio")
-        db.commit()
         
         temp_dir = tempfile.TemporaryDirectory()
         audio_path = Path(temp_dir.name) / "audio.mp3"
@@ -516,6 +464,7 @@ def youtube_transcribe_task(self, job_id: str, payload_json: str):
             'noplaylist': True,
             'quiet': True,
             'no_warnings': True,
+            'progress_hooks': [progress_service.download_hook(job.id, "Lade YouTube-Video herunter und extrahiere Audio")],
         }
         
         try:
@@ -534,7 +483,6 @@ def youtube_transcribe_task(self, job_id: str, payload_json: str):
         
         # 2. Transkribieren mit ausgewähltem Provider/Modell
         _job_run(db, job, "in_progress", message="Transkribiere Audio")
-        db.commit()
         
         transcript_text = ""
         if provider == "openrouter":
@@ -555,7 +503,7 @@ def youtube_transcribe_task(self, job_id: str, payload_json: str):
                 audio_url = storage.signed_url(audio_uri)
                 
                 # Transkribiere
-                result = anyio.run(client.transcribe, audio_url, model_id, target_language)
+                result = run_async(client.transcribe, audio_url, model_id, target_language)
                 transcript_text = result.get("text", "") or result.get("transcription", "")
             except Exception as e:
                 raise RuntimeError(f"Fehler bei Fal.ai Transcription: {e}")
@@ -564,7 +512,6 @@ def youtube_transcribe_task(self, job_id: str, payload_json: str):
         
         # 3. Video herunterladen (für VideoAsset)
         _job_run(db, job, "in_progress", message="Lade Video für Library")
-        db.commit()
         
         video_path = Path(temp_dir.name) / "video.mp4"
         ydl_video_opts = {
@@ -573,6 +520,7 @@ def youtube_transcribe_task(self, job_id: str, payload_json: str):
             'noplaylist': True,
             'quiet': True,
             'no_warnings': True,
+            'progress_hooks': [progress_service.download_hook(job.id, "Lade Video für Library")],
         }
         
         try:
@@ -591,47 +539,21 @@ def youtube_transcribe_task(self, job_id: str, payload_json: str):
         
         # 4. Video auf Server speichern
         _job_run(db, job, "in_progress", message="Speichere Video auf Server")
-        db.commit()
-        
-        prefix = tenant_prefix(org_id, None, f"youtube_transcribe_{job.id}")
-        video_key = f"{prefix}/video.mp4"
-        thumb_key = f"{prefix}/thumbnail.jpg"
-        
-        video_uri = storage.save_file(video_key, str(video_path))
-        
-        # Generiere Thumbnail
-        try:
-            from ..config import get_settings
-            settings = get_settings()
-            ffmpeg_path = settings.ffmpeg_path
-            if ffmpeg_path:
-                import subprocess
-                thumb_path = Path(temp_dir.name) / "thumbnail.jpg"
-                cmd = [
-                    ffmpeg_path,
-                    "-i", str(video_path),
-                    "-frames:v", "1",
-                    "-y",
-                    str(thumb_path)
-                ]
-                subprocess.run(cmd, check=True, capture_output=True, timeout=10)
-                thumb_uri = storage.save_file(thumb_key, str(thumb_path))
-            else:
-                thumb_uri = video_uri  # Fallback
-        except Exception:
-            thumb_uri = video_uri  # Fallback
         
+        # Thumbnail vor dem Speichern erzeugen (lokaler Storage verschiebt die Quelldatei)
+        thumb_path = _render_thumbnail(video_path, Path(temp_dir.name) / "thumbnail.jpg")
+
         # 5. VideoAsset erstellen und in Library speichern
         asset = models.VideoAsset(
             organization_id=org_id,
             project_id=None,  # Transcription hat kein Projekt
             plan_id=None,
             status="transcribed",
-            video_path=str(video_uri),
-            thumbnail_path=str(thumb_uri),
             transcript=transcript_text,
             original_language=target_language if target_language != "auto" else None
         )
+        # Inhaltsadressiert: wiederholte Importe derselben URL laden nichts erneut hoch
+        attach_asset_files(db, storage, asset, video_path, thumb_path)
         db.add(asset)
         db.commit()
         db.refresh(asset)
@@ -677,7 +599,6 @@ def youtube_translate_task(self, job_id: str, payload_json: str):
     import yt_dlp
     import tempfile
     from pathlib import Path
-    import httpx
     import asyncio
     
     db = _db()
@@ -701,11 +622,9 @@ def youtube_translate_task(self, job_id: str, payload_json: str):
         org_id = job.organization_id
         
         _job_run(db, job, "in_progress", message=f"Starte Video-Übersetzung von {url}")
-        db.commit()
         
         # 1. YouTube Video herunterladen
         _job_run(db, job, "in_progress", message="Lade YouTube-Video herunter")
-        db.commit()
         
         temp_dir = tempfile.TemporaryDirectory()
         video_path = Path(temp_dir.name) / "video.mp4"
@@ -716,6 +635,7 @@ def youtube_translate_task(self, job_id: str, payload_json: str):
             'noplaylist': True,
             'quiet': True,
             'no_warnings': True,
+            'progress_hooks': [progress_service.download_hook(job.id, "Lade YouTube-Video herunter")],
         }
         
         try:
@@ -735,11 +655,9 @@ def youtube_translate_task(self, job_id: str, payload_json: str):
         # 2. Video auf temporären Server hochladen (für Voice Cloning API)
         # Oder verwende direkten Upload zu Voice Cloning Provider
         _job_run(db, job, "in_progress", message="Bereite Video für Voice Cloning vor")
-        db.commit()
         
         # 3. Voice Cloning Provider aufrufen
         _job_run(db, job, "in_progress", message=f"Starte Voice Cloning mit {voice_cloning_provider}")
-        db.commit()
         
         # Erstelle Voice Translation Client
         client = VoiceTranslationClient(api_key=api_key, provider=voice_cloning_provider)
@@ -757,72 +675,46 @@ def youtube_translate_task(self, job_id: str, payload_json: str):
                 model_id=voice_cloning_model_id
             )
         
-        result = anyio.run(translate)
+        result = run_async(translate)
         
         if not result.get("video_url"):
             raise RuntimeError("Keine Video-URL von Voice Cloning Provider erhalten")
         
         # 4. Übersetztes Video herunterladen
         _job_run(db, job, "in_progress", message="Lade übersetztes Video herunter")
-        db.commit()
         
         translated_video_path = Path(temp_dir.name) / "translated_video.mp4"
         
         async def download_video():
-            async with httpx.AsyncClient(timeout=300.0) as http_client:
-                response = await http_client.get(result["video_url"])
+            video_url = result["video_url"]
+            http_client = get_http_registry().client_for(video_url)
+            async with http_client.stream("GET", video_url, timeout=timeout_profile("download")) as response:
                 response.raise_for_status()
                 with open(translated_video_path, "wb") as f:
-                    f.write(response.content)
+                    async for chunk in response.aiter_bytes():
+                        f.write(chunk)
         
-        anyio.run(download_video)
+        run_async(download_video)
         
         # 5. Video auf Server speichern
         _job_run(db, job, "in_progress", message="Speichere übersetztes Video auf Server")
-        db.commit()
-        
-        prefix = tenant_prefix(org_id, None, f"youtube_translate_{job.id}")
-        video_key = f"{prefix}/translated_video.mp4"
-        thumb_key = f"{prefix}/thumbnail.jpg"
-        
-        video_uri = storage.save_file(video_key, str(translated_video_path))
-        
-        # Generiere Thumbnail
-        try:
-            from ..config import get_settings
-            settings = get_settings()
-            ffmpeg_path = settings.ffmpeg_path
-            if ffmpeg_path:
-                import subprocess
-                thumb_path = Path(temp_dir.name) / "thumbnail.jpg"
-                cmd = [
-                    ffmpeg_path,
-                    "-i", str(translated_video_path),
-                    "-frames:v", "1",
-                    "-y",
-                    str(thumb_path)
-                ]
-                subprocess.run(cmd, check=True, capture_output=True, timeout=10)
-                thumb_uri = storage.save_file(thumb_key, str(thumb_path))
-            else:
-                thumb_uri = video_uri  # Fallback
-        except Exception:
-            thumb_uri = video_uri  # Fallback
         
+        # Thumbnail vor dem Speichern erzeugen (lokaler Storage verschiebt die Quelldatei)
+        thumb_path = _render_thumbnail(translated_video_path, Path(temp_dir.name) / "thumbnail.jpg")
+
         # 6. VideoAsset erstellen und in Library speichern
         asset = models.VideoAsset(
             organization_id=org_id,
             project_id=None,  # YouTube-Übersetzung hat kein Projekt
             plan_id=None,
             status="translated",
-            video_path=str(video_uri),
-            thumbnail_path=str(thumb_uri),
             transcript="",  # Kann später mit Transcription gefüllt werden
             original_language=source_language or "auto",
             translated_language=target_language,
             voice_clone_model_id=voice_cloning_model_id,
             translation_provider=voice_cloning_provider
         )
+        attach_asset_files(db, storage, asset, translated_video_path, thumb_path)
         db.add(asset)
         db.commit()
         db.refresh(asset)
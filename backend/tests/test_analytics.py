@@ -0,0 +1,49 @@
+import math
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app import models  # type: ignore
+from app.services import analytics, metrics  # type: ignore
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    points = [{"t": i, "value": math.sin(i / 10.0) * 100} for i in range(1000)]
+    points[500]["value"] = 10_000
+    sampled = analytics.lttb(points, 50)
+    assert len(sampled) == 50
+    assert sampled[0] is points[0] and sampled[-1] is points[-1]
+    assert points[500] in sampled
+    assert [p["t"] for p in sampled] == sorted(p["t"] for p in sampled)
+    assert analytics.lttb(points[:10], 50) == points[:10]
+
+
+def test_aggregate_series_deltas_and_growth(db):
+    org = models.Organization(name="Org")
+    db.add(org)
+    db.flush()
+    project = models.Project(organization_id=org.id, name="P")
+    db.add(project)
+    db.commit()
+
+    start = datetime(2026, 3, 1)
+    for day, views in enumerate([100, 150, 300]):
+        metrics.upsert_snapshots(db, project, "open", [{"id": "v1", "statistics": {"view_count": views}}], now=start + timedelta(days=day, hours=12))
+    # Rollup-Fenster deckt nur den laufenden Tag ab: pro Tag einen Lauf simulieren
+    for day in range(3):
+        metrics.rollup_metrics(db, now=start + timedelta(days=day, hours=23), granularities=["day"])
+    db.commit()
+
+    series = analytics.aggregate_series(db, project.id, "views", start, start + timedelta(days=3))
+    assert len(series) == 1
+    points = series[0]["points"]
+    assert [p["value"] for p in points] == [100, 150, 300]
+    assert [p["delta"] for p in points] == [None, 50, 150]
+    assert points[2]["growth"] == 1.0
+    assert series[0]["change"] == 200
+
+    by_video = analytics.aggregate_series(db, project.id, "views", start, start + timedelta(days=3), group_by="video")
+    assert by_video[0]["key"] == "v1" and by_video[0]["latest"] == 300
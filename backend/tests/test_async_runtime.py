@@ -0,0 +1,42 @@
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.services.async_runtime import AsyncRuntime  # type: ignore
+
+
+def test_runtime_reuses_loop_across_calls():
+    runtime = AsyncRuntime()
+
+    async def current_loop(value):
+        await asyncio.sleep(0)
+        return asyncio.get_running_loop(), value
+
+    try:
+        loop1, v1 = runtime.run(current_loop, 1)
+        loop2, v2 = runtime.run(current_loop, value=2)
+        assert (v1, v2) == (1, 2)
+        assert loop1 is loop2
+    finally:
+        runtime.stop()
+    assert not runtime.running
+
+
+def test_runtime_propagates_exceptions():
+    runtime = AsyncRuntime()
+
+    async def boom():
+        raise ValueError("boom")
+
+    try:
+        try:
+            runtime.run(boom)
+        except ValueError as exc:
+            assert str(exc) == "boom"
+        else:
+            raise AssertionError("expected ValueError")
+    finally:
+        runtime.stop()
@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app import auth, models  # type: ignore
+from app.db import Base, RoutingSession  # type: ignore
+from app.services.auth_cache import AuthCache  # type: ignore
+
+
+def test_cached_session_skips_queries_until_revoked(db, monkeypatch):
+    cache = AuthCache(local_ttl=60)
+    cache.redis_client = None
+    monkeypatch.setattr(auth, "get_auth_cache", lambda: cache)
+    user = models.User(email="a@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    session, _refresh = auth.create_session(db, user, None, None)
+    token = auth.create_access_token(user.id, session.id)
+    db.expunge_all()
+
+    auth.get_current_session(token, db)
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        cached_session, cached_user = auth.get_current_session(token, db)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert statements == []
+    assert cached_user.id == user.id and cached_user.email == "a@example.com"
+
+    # Logout über die gecachte Session: widerruft in der DB und im Cache
+    auth.revoke_session(db, cached_session)
+    with pytest.raises(HTTPException):
+        auth.get_current_session(token, db)
+
+
+def test_replica_request_does_not_recache_revoked_session(monkeypatch):
+    cache = AuthCache(local_ttl=60)
+    cache.redis_client = None
+    monkeypatch.setattr(auth, "get_auth_cache", lambda: cache)
+    primary = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    replica = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    for bind in (primary, replica):
+        Base.metadata.create_all(bind=bind)
+    with sessionmaker(bind=primary, future=True)() as setup:
+        user = models.User(email="a@example.com", hashed_password="x")
+        setup.add(user)
+        setup.commit()
+        session, _refresh = auth.create_session(setup, user, None, None)
+        token = auth.create_access_token(user.id, session.id)
+        # Replica-Stand vor dem Widerruf
+        with sessionmaker(bind=replica, future=True)() as lagging:
+            lagging.merge(user)
+            lagging.merge(session)
+            lagging.commit()
+        auth.revoke_session(setup, session)
+
+    session_class = type("ReplicaSession", (RoutingSession,), {"replica_bind": replica})
+    request_db = sessionmaker(bind=primary, class_=session_class, future=True)()
+    request_db.info["replica"] = True
+    with pytest.raises(HTTPException):
+        auth.get_current_session(token, request_db)
+    assert cache.get(session.id) is None
+    request_db.close()
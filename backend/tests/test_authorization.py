@@ -0,0 +1,77 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app import authorization, models  # type: ignore
+from app.db import Base, RoutingSession  # type: ignore
+from app.services import membership_cache  # type: ignore
+
+
+def test_membership_cache_memo_batch_and_invalidation(db, monkeypatch):
+    cache = membership_cache.MembershipCache(local_ttl=60)
+    cache.redis_client = None
+    monkeypatch.setattr(membership_cache, "_membership_cache", cache)
+
+    user = models.User(email="a@example.com", hashed_password="x")
+    org, other = models.Organization(name="Org"), models.Organization(name="Other")
+    db.add_all([user, org, other])
+    db.commit()
+    db.add(models.Membership(user_id=user.id, organization_id=org.id, role="member"))
+    project = models.Project(organization_id=org.id, name="P")
+    foreign = models.Project(organization_id=other.id, name="F")
+    db.add_all([project, foreign])
+    db.commit()
+    plan = models.Plan(organization_id=org.id, project_id=project.id, slot_date=date(2026, 10, 1), slot_index=1)
+    db.add(plan)
+    db.commit()
+
+    authorization.assert_plan_member(db, user, plan.id)
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        # Wiederholte Kette Plan -> Projekt -> Mitgliedschaft: Identity-Map und Rollen-Memo
+        authorization.assert_plan_member(db, user, plan.id)
+        authorization.assert_project_member(db, user, project.id)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert statements == []
+
+    assert set(authorization.accessible_projects(db, user, [project.id, foreign.id])) == {project.id}
+    with pytest.raises(HTTPException):
+        authorization.assert_projects_member(db, user, [project.id, foreign.id])
+    with pytest.raises(HTTPException):
+        authorization.assert_org_member(db, user, org.id, roles=["owner"])
+
+    # Neue Mitgliedschaft invalidiert Cache und Request-Memo nach dem Commit
+    db.add(models.Membership(user_id=user.id, organization_id=other.id, role="owner"))
+    db.commit()
+    assert authorization.assert_org_member(db, user, other.id, roles=["owner"]) == "owner"
+
+
+def test_role_index_is_loaded_from_primary_on_replica_requests():
+    primary = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    replica = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    for bind in (primary, replica):
+        Base.metadata.create_all(bind=bind)
+    # Replica hängt hinterher: dort existiert die bereits entfernte Mitgliedschaft noch
+    with sessionmaker(bind=replica, future=True)() as lagging:
+        lagging.add(models.Membership(user_id="u1", organization_id="org", role="admin"))
+        lagging.commit()
+    session_class = type("ReplicaSession", (RoutingSession,), {"replica_bind": replica})
+    session = sessionmaker(bind=primary, class_=session_class, future=True)()
+    session.info["replica"] = True
+
+    cache = membership_cache.MembershipCache(local_ttl=60)
+    cache.redis_client = None
+    assert cache.roles_for(session, "u1") == {}
+    assert session.info["replica"] is True
+    session.close()
@@ -0,0 +1,104 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app import models  # type: ignore
+from app.providers.storage import LocalStorage  # type: ignore
+from app.services.blob_store import VIDEO_ASSET, attach_asset_files, collect_orphaned_blobs, purge_tombstones, release_refs  # type: ignore
+
+
+class CountingStorage(LocalStorage):
+    def __init__(self, base_path):
+        super().__init__(base_path)
+        self.uploads = 0
+
+    def save_file(self, key, local_path):
+        self.uploads += 1
+        return super().save_file(key, local_path)
+
+
+def _asset(db, storage, org, tmp_path, name, content):
+    video = tmp_path / f"{name}.mp4"
+    video.write_bytes(content)
+    asset = models.VideoAsset(organization_id=org.id, status="generated", transcript="")
+    attach_asset_files(db, storage, asset, video)
+    db.add(asset)
+    db.commit()
+    return asset
+
+
+def test_identical_content_is_stored_once_and_collected_after_last_release(db, tmp_path):
+    orgs = [models.Organization(name="A"), models.Organization(name="B")]
+    db.add_all(orgs)
+    db.commit()
+    storage = CountingStorage(str(tmp_path / "storage"))
+
+    first = _asset(db, storage, orgs[0], tmp_path, "first", b"same video")
+    second = _asset(db, storage, orgs[1], tmp_path, "second", b"same video")
+
+    assert storage.uploads == 1
+    assert first.video_blob_id == second.video_blob_id == second.thumbnail_blob_id
+    blob = db.get(models.Blob, first.video_blob_id)
+    assert blob.ref_count == 4  # Video + Thumbnail-Fallback je Asset
+    assert Path(first.video_path).read_bytes() == b"same video"
+
+    release_refs(db, VIDEO_ASSET, first.id)
+    db.commit()
+    db.refresh(blob)
+    assert (blob.ref_count, blob.orphaned_at) == (2, None)
+
+    release_refs(db, VIDEO_ASSET, second.id)
+    db.commit()
+    db.refresh(blob)
+    assert blob.ref_count == 0 and blob.orphaned_at is not None
+
+    # Innerhalb der Karenzzeit bleibt der Blob erhalten
+    assert collect_orphaned_blobs(db, storage) == 0
+    assert collect_orphaned_blobs(db, storage, now=datetime.utcnow() + timedelta(hours=2)) == 1
+    assert not Path(first.video_path).exists()
+    assert db.query(models.Blob).count() == 0
+
+
+def test_rolled_back_upload_is_removed_from_storage(db, tmp_path):
+    org = models.Organization(name="A")
+    db.add(org)
+    db.commit()
+    storage = CountingStorage(str(tmp_path / "storage"))
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"never committed")
+
+    asset = models.VideoAsset(organization_id=org.id, status="generated", transcript="")
+    attach_asset_files(db, storage, asset, video)
+    uploaded = Path(asset.video_path)
+    assert uploaded.exists()
+    db.rollback()
+    assert not uploaded.exists()
+
+
+class FailingDeleteStorage(LocalStorage):
+    def delete_uri(self, uri):
+        raise ConnectionError("storage unavailable")
+
+
+def test_collection_commits_rows_before_touching_storage(db, tmp_path):
+    org = models.Organization(name="A")
+    db.add(org)
+    db.commit()
+    storage = LocalStorage(str(tmp_path / "storage"))
+    asset = _asset(db, storage, org, tmp_path, "video", b"content")
+    release_refs(db, VIDEO_ASSET, asset.id)
+    db.commit()
+    later = datetime.utcnow() + timedelta(hours=2)
+
+    # Storage nicht erreichbar: Zeile ist weg, der Tombstone merkt sich das Objekt
+    assert collect_orphaned_blobs(db, FailingDeleteStorage(str(tmp_path / "storage")), now=later) == 1
+    assert db.query(models.Blob).count() == 0
+    assert Path(asset.video_path).exists()
+    assert db.query(models.BlobTombstone).count() == 1
+
+    assert purge_tombstones(db, storage) == 1
+    assert not Path(asset.video_path).exists()
+    assert db.query(models.BlobTombstone).count() == 0
@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app import db as db_module, models  # type: ignore
+from app.db import Base, RoutingSession  # type: ignore
+
+
+def test_engine_options_per_role(monkeypatch):
+    url = "postgresql+psycopg2://u:p@db/x"
+    assert db_module.engine_options(url, "worker")["pool_size"] == 2
+    assert db_module.engine_options(url, "beat")["max_overflow"] == 0
+    monkeypatch.setattr(db_module.settings, "db_pool_size", 7)
+    assert db_module.engine_options(url, "api")["pool_size"] == 7
+    monkeypatch.setattr(db_module.settings, "db_pgbouncer", True)
+    options = db_module.engine_options(url, "api")
+    assert options["poolclass"] is NullPool and "pool_size" not in options
+
+
+def test_routing_session_reads_replica_and_writes_primary():
+    primary = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    replica = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=primary)
+    Base.metadata.create_all(bind=replica)
+    session_class = type("ReplicaSession", (RoutingSession,), {"replica_bind": replica})
+    Session = sessionmaker(bind=primary, class_=session_class, future=True)
+
+    with Session() as setup:
+        setup.info["replica"] = False
+        setup.add(models.Organization(id="org-primary", name="Primary"))
+        setup.commit()
+
+    session = Session()
+    session.info["replica"] = True
+    # Noch nicht repliziert: das Replica kennt die Org nicht
+    assert session.get(models.Organization, "org-primary") is None
+    session.add(models.Organization(id="org-2", name="Write"))
+    session.commit()
+    with Session() as check:
+        assert check.get(models.Organization, "org-2") is not None
+    session.close()
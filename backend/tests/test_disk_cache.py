@@ -0,0 +1,50 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.providers.disk_cache import DiskCache  # type: ignore
+
+
+def test_concurrent_readers_share_one_download(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache"), max_bytes=10_000)
+    downloads = []
+
+    def fetch(target: Path) -> None:
+        downloads.append(target)
+        time.sleep(0.05)
+        target.write_bytes(b"v" * 100)
+
+    paths = []
+    threads = [threading.Thread(target=lambda: paths.append(cache.fill("s3://b/k", '"e1"', fetch))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(downloads) == 1
+    assert len(set(paths)) == 1 and paths[0].read_bytes() == b"v" * 100
+    assert cache.get("s3://b/k", '"e2"') is None  # neue Version -> Miss
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["entries"]) == (1, 4, 1)
+
+
+def test_eviction_drops_least_recently_used_entries(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache"), max_bytes=250, min_age=0)
+    for name in ("a", "b"):
+        cache.fill(name, "v", lambda target: target.write_bytes(b"x" * 100))
+    # b zuletzt geschrieben, danach wird a gelesen
+    for age, name in ((60, "a"), (30, "b")):
+        stamp = time.time() - age
+        os.utime(cache.path_for(name, "v"), (stamp, stamp))
+    assert cache.get("a", "v") is not None
+
+    cache.fill("c", "v", lambda target: target.write_bytes(b"x" * 100))
+
+    assert cache.get("b", "v") is None
+    assert cache.get("a", "v") is not None and cache.get("c", "v") is not None
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,25 @@
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.providers.http_client import HttpClientRegistry  # type: ignore
+
+
+def test_client_reused_per_origin():
+    registry = HttpClientRegistry()
+
+    async def scenario():
+        a = registry.client_for("https://api.example.com/v1/a")
+        b = registry.client_for("https://API.example.com/v2/b")
+        c = registry.client_for("https://other.example.com/")
+        assert a is b
+        assert a is not c
+        await registry.aclose()
+        assert a.is_closed and c.is_closed
+        assert registry.client_for("https://api.example.com/") is not a
+        await registry.aclose()
+
+    asyncio.run(scenario())
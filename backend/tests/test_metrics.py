@@ -0,0 +1,48 @@
+import sys
+from datetime import datetime, date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app import models  # type: ignore
+from app.services import metrics  # type: ignore
+
+
+def test_snapshots_upsert_and_rollup(db):
+    org = models.Organization(name="Org")
+    db.add(org)
+    db.flush()
+    project = models.Project(organization_id=org.id, name="P")
+    db.add(project)
+    db.flush()
+    plan = models.Plan(organization_id=org.id, project_id=project.id, slot_date=date(2026, 3, 1), slot_index=0)
+    db.add(plan)
+    db.flush()
+    db.add(models.VideoAsset(organization_id=org.id, plan_id=plan.id, video_path="v", thumbnail_path="t", tiktok_video_id="v1"))
+    db.commit()
+
+    def stats(views, likes):
+        return {"statistics": {"view_count": views, "like_count": likes, "comment_count": 1, "share_count": 0}}
+
+    t1 = datetime(2026, 3, 1, 10, 5)
+    t2 = datetime(2026, 3, 1, 10, 40)
+    metrics.upsert_snapshots(db, project, "open", [{"id": "v1", **stats(10, 1)}, {"id": "v2", **stats(5, 0)}], now=t1)
+    # Gleicher Bucket: Upsert statt neuer Zeile
+    metrics.upsert_snapshots(db, project, "open", [{"id": "v1", **stats(30, 4)}, {"id": "v2", **stats(7, 1)}], now=t2)
+    db.commit()
+    assert db.query(models.MetricSnapshot).count() == 2
+    snapshot = db.query(models.MetricSnapshot).filter_by(tiktok_video_id="v1").one()
+    assert (snapshot.views, snapshot.likes, snapshot.plan_id) == (30, 4, plan.id)
+
+    metrics.rollup_metrics(db, now=datetime(2026, 3, 1, 11, 0))
+    # Erneuter Lauf ersetzt das Fenster statt zu duplizieren
+    metrics.rollup_metrics(db, now=datetime(2026, 3, 1, 11, 0))
+    db.commit()
+
+    day = {r.metric: r.value for r in metrics.list_rollups(db, project.id, "day")}
+    assert day == {"views": 37, "likes": 5, "comments": 2, "shares": 0}
+    hour = metrics.list_rollups(db, project.id, "hour")
+    assert {r.bucket_start for r in hour} == {datetime(2026, 3, 1, 10, 0)}
+    per_plan = {r.metric: r.value for r in metrics.list_rollups(db, project.id, "day", plan_id=plan.id)}
+    assert per_plan["views"] == 30
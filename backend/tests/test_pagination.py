@@ -0,0 +1,44 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import and_, or_
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app import models  # type: ignore
+from app.services.pagination import keyset_page  # type: ignore
+
+
+def test_keyset_pages_cover_project_and_org_rows_once(db):
+    org = models.Organization(name="Org")
+    other = models.Organization(name="Other")
+    db.add_all([org, other])
+    db.commit()
+    project = models.Project(organization_id=org.id, name="P")
+    db.add(project)
+    db.commit()
+    base = datetime(2026, 1, 1)
+    for i in range(7):
+        # Gleiche Zeitstempel paarweise: der Tiebreaker über id muss greifen
+        created = base + timedelta(minutes=i // 2)
+        db.add(models.Job(organization_id=org.id, project_id=project.id if i % 3 else None, type="t", created_at=created))
+    db.add(models.Job(organization_id=other.id, type="t", created_at=base))
+    db.commit()
+
+    query = db.query(models.Job).filter(
+        or_(
+            models.Job.project_id == project.id,
+            and_(models.Job.organization_id == org.id, models.Job.project_id.is_(None)),
+        )
+    )
+    seen, cursor = [], None
+    while True:
+        page, cursor = keyset_page(query, models.Job, cursor, limit=3)
+        seen.extend(page)
+        if not cursor:
+            break
+    assert len(seen) == 7 == len({job.id for job in seen})
+    keys = [(job.created_at, job.id) for job in seen]
+    assert keys == sorted(keys, reverse=True)
@@ -0,0 +1,49 @@
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app import models  # type: ignore
+from app.services import progress  # type: ignore
+
+
+def test_record_progress_persists_only_transitions(db, monkeypatch):
+    bus = progress.ProgressBus()
+    bus.redis_client = None
+    monkeypatch.setattr(progress, "get_progress_bus", lambda: bus)
+    org = models.Organization(name="Org")
+    db.add(org)
+    db.commit()
+    job = models.Job(organization_id=org.id, type="youtube_transcribe")
+    db.add(job)
+    db.commit()
+
+    progress.record_progress(db, job, "in_progress", "Starte")
+    progress.record_progress(db, job, "in_progress", "Lade herunter", percent=40)
+    progress.record_progress(db, job, "in_progress", "Transkribiere")
+    progress.record_progress(db, job, "completed", "fertig")
+
+    runs = db.query(models.JobRun).order_by(models.JobRun.created_at).all()
+    assert [(run.status, run.message) for run in runs] == [("in_progress", "Transkribiere"), ("completed", "fertig")]
+    assert bus.last_event(job.id)["status"] == "completed"
+
+
+def test_subscribe_receives_events_until_terminal():
+    bus = progress.ProgressBus()
+    bus.redis_client = None
+
+    async def consume():
+        received = []
+        bus.publish("job-1", "in_progress", stage="Download")
+        async for event in bus.subscribe("job-1", keepalive=0.05):
+            if event is None:
+                # Keepalive: nächstes Event aus einem anderen Thread publizieren
+                await asyncio.to_thread(bus.publish, "job-1", "completed", stage="fertig")
+                continue
+            received.append((event["status"], event.get("stage")))
+        return received
+
+    assert asyncio.run(consume()) == [("in_progress", "Download"), ("completed", "fertig")]
+    assert bus._local == {}
@@ -0,0 +1,79 @@
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app import models  # type: ignore
+from app.config import get_settings  # type: ignore
+from app.security import encrypt_secret  # type: ignore
+from app.services import publish_polling, publish_tracking  # type: ignore
+
+
+class FakeTikTok:
+    def __init__(self, org_id: str, calls: list):
+        self.org_id = org_id
+        self.calls = calls
+
+    async def get_video_status(self, access_token, open_id, video_id, acquire_slot=True):
+        self.calls.append((self.org_id, access_token, video_id))
+        return {"data": {"status": "PUBLISH_COMPLETE"}}
+
+
+def test_broadcast_groups_by_org_and_bulk_updates(db, monkeypatch):
+    monkeypatch.setattr(publish_polling.get_rate_limiter(), "redis_client", None)
+    secret = get_settings().fernet_secret
+    assets = []
+    for n in range(2):
+        org = models.Organization(name=f"Org{n}")
+        db.add(org)
+        db.flush()
+        account = models.SocialAccount(organization_id=org.id, platform="tiktok", handle=f"open-{n}")
+        db.add(account)
+        db.flush()
+        db.add(models.OAuthToken(social_account_id=account.id, access_token=encrypt_secret(f"token-{n}", secret)))
+        for i in range(3):
+            asset = models.VideoAsset(organization_id=org.id, video_path="v", thumbnail_path="t")
+            publish_tracking.mark_published(asset, now=datetime.utcnow() - timedelta(minutes=5))
+            publish_tracking.store_publish_response(asset, {"data": {"video_id": f"v{n}{i}", "publish_id": f"p{n}{i}"}})
+            assets.append(asset)
+        db.add_all(assets[-3:])
+    db.commit()
+
+    calls: list = []
+    clients: list = []
+
+    def factory(org_id):
+        clients.append(org_id)
+        return FakeTikTok(org_id, calls)
+
+    updated = publish_polling.poll_assets(db, client_factory=factory)
+
+    assert updated == 6
+    assert len(clients) == 2
+    assert sorted(video_id for _org, _token, video_id in calls) == ["v00", "v01", "v02", "v10", "v11", "v12"]
+    assert {token for _org, token, _video in calls} == {"token-0", "token-1"}
+    db.expire_all()
+    rows = db.query(models.VideoAsset).all()
+    assert {a.status for a in rows} == {"PUBLISH_COMPLETE"}
+    assert {a.publish_status for a in rows} == {"PUBLISH_COMPLETE"}
+    # IDs aus dem Publish bleiben erhalten, Roh-Antwort ist JSON
+    assert db.query(models.VideoAsset).filter(models.VideoAsset.tiktok_video_id == "v11").one().tiktok_publish_id == "p11"
+    assert all(json.loads(a.publish_response)["data"]["status"] == "PUBLISH_COMPLETE" for a in rows)
+    # Terminaler Status: Assets fallen aus dem Poll-Set
+    assert all(a.next_poll_at is None and a.poll_attempts == 1 for a in rows)
+    assert publish_polling.poll_assets(db, client_factory=factory) == 0
+
+
+def test_poll_schedule_backs_off_and_stops():
+    published = datetime(2026, 1, 1)
+    first = publish_tracking.poll_update("PROCESSING_UPLOAD", 0, published, published + timedelta(minutes=1))
+    later = publish_tracking.poll_update("SEND_TO_USER_INBOX", 8, published, published + timedelta(days=2))
+    assert first["next_poll_at"] - (published + timedelta(minutes=1)) == timedelta(minutes=2)
+    assert later["next_poll_at"] - (published + timedelta(days=2)) == timedelta(hours=24)
+    assert publish_tracking.poll_update("SEND_TO_USER_INBOX", 9, published, published + timedelta(days=15))["next_poll_at"] is None
+    # Fehlgeschlagener Poll: Status bleibt, nur neu eingeplant
+    failed = publish_tracking.poll_update(None, 2, published, published)
+    assert "status" not in failed and failed["poll_attempts"] == 3
@@ -0,0 +1,132 @@
+"""
+EXPLAIN-Regressionstest: realistische Datenmengen seeden, die Queries der Hot-Paths
+(Router und Tasks) mitschneiden und prüfen, dass keine davon eine Tabelle komplett scannt.
+"""
+import re
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import event, insert, text
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from fastapi import HTTPException, Response  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+from app import auth, models  # type: ignore  # noqa: E402
+from app.routers import jobs as jobs_router  # type: ignore  # noqa: E402
+from app.routers import plans as plans_router  # type: ignore  # noqa: E402
+from app.routers import usage as usage_router  # type: ignore  # noqa: E402
+from app.routers import video as video_router  # type: ignore  # noqa: E402
+from app.services import scheduler  # type: ignore  # noqa: E402
+from app.services.usage_counters import UsageCounters  # type: ignore  # noqa: E402
+
+HOT_TABLES = {
+    "plans", "jobs", "job_runs", "video_assets", "usage_ledger", "usage_monthly",
+    "sessions", "memberships", "projects", "credentials", "password_resets",
+}
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX \w+)?$")
+
+ORGS = 20
+PROJECTS_PER_ORG = 3
+ROWS_PER_PROJECT = 60
+
+
+def _seed(db):
+    now = datetime(2026, 10, 1)
+    orgs = [{"id": f"org-{o}", "name": f"Org {o}"} for o in range(ORGS)]
+    users = [{"id": f"user-{o}", "email": f"u{o}@example.com", "hashed_password": "x"} for o in range(ORGS)]
+    memberships = [{"id": f"m-{o}", "user_id": f"user-{o}", "organization_id": f"org-{o}", "role": "owner"} for o in range(ORGS)]
+    projects, plans, jobs, runs, assets, ledger = [], [], [], [], [], []
+    for o in range(ORGS):
+        org_id = f"org-{o}"
+        for p in range(PROJECTS_PER_ORG):
+            project_id = f"proj-{o}-{p}"
+            projects.append({"id": project_id, "organization_id": org_id, "name": project_id, "autopilot_enabled": p == 0})
+            for i in range(ROWS_PER_PROJECT):
+                created = now - timedelta(minutes=i)
+                plan_id = f"plan-{o}-{p}-{i}"
+                plans.append({
+                    "id": plan_id, "organization_id": org_id, "project_id": project_id,
+                    "slot_date": date(2026, 10, 1) + timedelta(days=i // 3), "slot_index": i % 3 + 1,
+                    "approved": i % 2 == 0, "locked": False, "status": "scheduled", "created_at": created,
+                })
+                # Ein Teil der Jobs/Assets ist org-level (ohne Projekt)
+                job_project = project_id if i % 4 else None
+                jobs.append({
+                    "id": f"job-{o}-{p}-{i}", "organization_id": org_id, "project_id": job_project, "type": "generate_assets",
+                    "status": ["pending", "completed", "failed"][i % 3], "created_at": created,
+                })
+                runs.append({"id": f"run-{o}-{p}-{i}", "job_id": f"job-{o}-{p}-{i}", "status": "completed", "created_at": created})
+                assets.append({
+                    "id": f"asset-{o}-{p}-{i}", "organization_id": org_id, "project_id": job_project,
+                    "plan_id": plan_id if i % 5 else None, "status": "generated", "video_path": "v", "thumbnail_path": "t",
+                    "created_at": created,
+                })
+                ledger.append({
+                    "id": f"led-{o}-{p}-{i}", "organization_id": org_id, "metric": ["video_generation", "publish_now"][i % 2],
+                    "amount": 1, "created_at": created,
+                })
+    for model, rows in [
+        (models.Organization, orgs), (models.User, users), (models.Membership, memberships),
+        (models.Project, projects), (models.Plan, plans), (models.Job, jobs), (models.JobRun, runs),
+        (models.VideoAsset, assets), (models.UsageLedger, ledger),
+    ]:
+        db.execute(insert(model), rows)
+    db.commit()
+    db.execute(text("ANALYZE"))
+    return db.get(models.User, "user-0")
+
+
+def _exercise_hot_paths(db, user):
+    project_id = "proj-0-0"
+    page = jobs_router.list_jobs(project_id, cursor=None, limit=20, db=db, user=user)
+    jobs_router.list_jobs(project_id, cursor=page["next_cursor"], limit=20, db=db, user=user)
+    active = jobs_router.list_jobs(project_id, cursor=None, limit=20, active=True, db=db, user=user)
+    assert active["jobs"] and all(job.status == "pending" for job in active["jobs"])
+    jobs_router.list_jobs_for_projects(["proj-0-0", "proj-0-1"], cursor=None, limit=20, db=db, user=user)
+    jobs_router.job_detail("job-0-0-1", db=db, user=user)
+    video_router.list_assets(project_id, Response(), cursor=None, limit=20, db=db, user=user)
+    calendar_page = Response()
+    window = plans_router.get_calendar(project_id, calendar_page, cursor=None, days=7, db=db, user=user)
+    assert len(window) == 7 and calendar_page.headers["x-next-cursor"] == "2026-10-08"
+    plans_router.get_calendar(project_id, Response(), cursor=date(2026, 10, 8), days=7, db=db, user=user)
+    plans_router.get_day_plans(project_id, date(2026, 10, 2), db=db, user=user)
+    scheduler.find_due_plans(db, date(2026, 10, 3))
+    counters = UsageCounters()
+    counters.redis_client = None
+    counters.totals(db, "org-0", ["video_generation", "publish_now"], now=datetime(2026, 10, 2))
+    usage_router.usage_snapshot("org-0", Request({"type": "http", "headers": []}), Response(), db=db, user=user)
+    try:
+        auth.validate_refresh(db, "unknown-refresh-token")
+    except HTTPException:
+        pass
+
+
+def test_hot_queries_use_indexes(db):
+    user = _seed(db)
+    connection = db.connection()
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        _exercise_hot_paths(db, user)
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+
+    assert len(captured) > 10
+    offenders = []
+    raw = connection.connection.driver_connection
+    for statement, parameters in captured:
+        plan = raw.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        for row in plan:
+            match = FULL_SCAN.match(row[-1])
+            if match and match.group(1) in HOT_TABLES:
+                offenders.append(f"{row[-1]} <- {' '.join(statement.split())[:200]}")
+    assert not offenders, "\n".join(offenders)
@@ -0,0 +1,130 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.providers import storage as storage_module  # type: ignore
+from app.providers.disk_cache import DiskCache  # type: ignore
+from app.providers.storage import LocalStorage, S3Storage  # type: ignore
+from app.services import range_streaming  # type: ignore
+from app.services.range_streaming import RangeNotSatisfiable, download_response, parse_range, range_response  # type: ignore
+
+
+def test_parse_range_variants():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    # Mehrfach-Range und Syntaxfehler -> volle Antwort
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("bytes=abc", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=-0", 100)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=100-", 100)
+
+
+def _body(response) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(collect())
+
+
+def test_range_response_streams_partial_content_in_chunks(tmp_path):
+    path = tmp_path / "video.mp4"
+    data = bytes(range(256)) * 40
+    path.write_bytes(data)
+    storage = LocalStorage(str(tmp_path))
+    storage.chunk_size = 1000
+
+    assert list(map(len, storage.iter_range(str(path), 100, 2599))) == [1000, 1000, 500]
+
+    response = range_response(storage, str(path), {"range": "bytes=100-2599"}, "video/mp4")
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-2599/{len(data)}"
+    assert response.headers["content-length"] == "2500"
+    assert _body(response) == data[100:2600]
+
+    etag = response.headers["etag"]
+    stale = range_response(storage, str(path), {"range": "bytes=0-9", "if-range": '"stale"'}, "video/mp4")
+    assert stale.status_code == 200
+    assert _body(stale) == data
+    fresh = range_response(storage, str(path), {"range": "bytes=0-9", "if-range": etag}, "video/mp4")
+    assert fresh.status_code == 206
+
+    assert range_response(storage, str(path), {"if-none-match": etag}, "video/mp4").status_code == 304
+    unsatisfiable = range_response(storage, str(path), {"range": f"bytes={len(data)}-"}, "video/mp4")
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(data)}"
+
+
+def test_download_response_never_reads_the_file_into_python(tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path))
+    uri = storage.save_bytes("org/a b.mp4", b"x" * 10)
+
+    response = download_response(storage, uri, "video.mp4", "video/mp4")
+    assert response.__class__.__name__ == "FileResponse"
+    assert 'filename="video.mp4"' in response.headers["content-disposition"]
+
+    monkeypatch.setattr(range_streaming.settings, "storage_download_mode", "accel")
+    # Direkter Zugriff ohne nginx: kein X-Accel-Redirect, sonst bliebe der Body leer
+    assert download_response(storage, uri, "video.mp4", "video/mp4").__class__.__name__ == "FileResponse"
+    response = download_response(storage, uri, "video.mp4", "video/mp4", {"x-accel-enabled": "1"})
+    assert response.headers["x-accel-redirect"] == "/protected-storage/org/a%20b.mp4"
+    assert response.body == b""
+
+    class Presigning(LocalStorage):
+        def presigned_download_url(self, uri, filename, media_type, expires=None):
+            return f"https://bucket.example/{filename}?sig=1"
+
+    response = download_response(Presigning(str(tmp_path)), uri, "video.mp4", "video/mp4")
+    assert response.status_code == 302
+    assert response.headers["location"] == "https://bucket.example/video.mp4?sig=1"
+
+
+class FakeS3Body:
+    def __init__(self, data):
+        self.data = data
+
+    def iter_chunks(self, chunk_size):
+        for start in range(0, len(self.data), chunk_size):
+            yield self.data[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeS3Client:
+    def __init__(self, data):
+        self.data = data
+        self.heads = 0
+
+    def head_object(self, Bucket, Key):
+        self.heads += 1
+        return {"ContentLength": len(self.data), "ETag": '"v1"'}
+
+    def get_object(self, Bucket, Key, Range):
+        start, end = map(int, Range[len("bytes="):].split("-"))
+        return {"Body": FakeS3Body(self.data[start:end + 1])}
+
+    def download_file(self, bucket, key, target, Config=None):
+        Path(target).write_bytes(self.data)
+
+
+def test_s3_range_response_stats_the_object_once(tmp_path, monkeypatch):
+    data = bytes(range(256)) * 4
+    client = FakeS3Client(data)
+    monkeypatch.setattr(storage_module, "_s3_client", client)
+    monkeypatch.setattr(storage_module, "get_disk_cache", lambda: DiskCache(str(tmp_path), 1 << 20))
+    storage = S3Storage.__new__(S3Storage)
+    storage.transfer_config = None
+
+    response = range_response(storage, "s3://b/k.mp4", {"range": "bytes=10-99"}, "video/mp4")
+    assert _body(response) == data[10:100]
+    assert client.heads == 1
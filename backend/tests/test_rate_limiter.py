@@ -0,0 +1,87 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.services.rate_limiter import Bucket, RateLimiter  # type: ignore
+
+
+def _memory_limiter() -> RateLimiter:
+    limiter = RateLimiter()
+    limiter.redis_client = None
+    return limiter
+
+
+def test_throttled_org_does_not_serialize_other_orgs():
+    limiter = _memory_limiter()
+    finished: dict[str, float] = {}
+
+    async def worker(org_id: str, calls: int, capacity: int, refill_rate: float):
+        for _ in range(calls):
+            await limiter.acquire(org_id, "upload", capacity=capacity, refill_rate=refill_rate)
+        finished[org_id] = time.perf_counter()
+
+    async def scenario():
+        start = time.perf_counter()
+        # org-slow: 1 Token, danach 5/s -> 3 weitere Calls brauchen ~0.6s
+        await asyncio.gather(
+            worker("org-slow", 4, capacity=1, refill_rate=5.0),
+            *(worker(f"org-{i}", 20, capacity=100, refill_rate=100.0) for i in range(10)),
+        )
+        return start
+
+    start = asyncio.run(scenario())
+    slow = finished.pop("org-slow") - start
+    fast = max(finished.values()) - start
+    timings = f"throttled org: {slow:.3f}s, slowest unthrottled org: {fast:.3f}s"
+    assert slow >= 0.5, timings
+    assert fast < 0.1, timings
+
+
+def test_slots_are_fifo_and_cancel_refunds():
+    limiter = _memory_limiter()
+
+    async def scenario():
+        first = await limiter.acquire("org", "read", capacity=1, refill_rate=10.0)
+        waiter = asyncio.create_task(limiter.acquire("org", "read", capacity=1, refill_rate=10.0))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+        # Reservierung des abgebrochenen Waiters wurde zurückgegeben
+        second = limiter.reserve("org", "read", capacity=1, refill_rate=10.0)
+        third = limiter.reserve("org", "read", capacity=1, refill_rate=10.0)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first <= second < third
+    assert second - first < 0.15
+    assert abs((third - second) - 0.1) < 0.02
+
+
+def test_hierarchy_is_limited_by_tightest_bucket_and_lru_bounded():
+    limiter = _memory_limiter()
+    limiter.max_memory_buckets = 4
+    buckets = [
+        Bucket("app:upload", 100, 100.0),
+        Bucket("org-1:upload", 2, 10.0),
+        Bucket("org-1:account:a:upload", 1, 10.0),
+    ]
+
+    now = time.time()
+    slots = limiter.reserve_many([buckets, buckets])
+    # Account-Bucket (1 Token, 10/s) bestimmt den zweiten Slot
+    assert slots[0] - now < 0.01
+    assert abs((slots[1] - now) - 0.1) < 0.02
+    # Reservierung wurde in allen Ebenen gebucht
+    assert limiter.memory_buckets["org-1:upload"].tokens < 0.1
+
+    for i in range(10):
+        limiter.reserve(f"org-{i}", "read")
+    assert len(limiter.memory_buckets) == 4
+    assert "app:upload" not in limiter.memory_buckets
@@ -0,0 +1,122 @@
+import base64
+import hashlib
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from botocore.exceptions import ClientError
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.providers.s3_multipart import MIN_PART_SIZE, MultipartUpload, UploadStateStore  # type: ignore
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def _store(redis_client):
+    store = UploadStateStore()
+    store.redis_client = redis_client
+    return store
+
+
+class FakeS3:
+    """Minimaler Multipart-Server im Speicher; fail_parts schlagen beim ersten Versuch fehl."""
+
+    def __init__(self, fail_parts=()):
+        self.uploads = {}
+        self.objects = {}
+        self.fail_parts = set(fail_parts)
+        self.part_calls = []
+        self._lock = threading.Lock()
+
+    def create_multipart_upload(self, Bucket, Key, ChecksumAlgorithm):
+        upload_id = f"u{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, ChecksumSHA256):
+        assert base64.b64encode(hashlib.sha256(Body).digest()).decode() == ChecksumSHA256
+        with self._lock:
+            self.part_calls.append(PartNumber)
+            if PartNumber in self.fail_parts:
+                self.fail_parts.discard(PartNumber)
+                raise ConnectionError("connection reset")
+            self.uploads[UploadId][PartNumber] = (Body, ChecksumSHA256)
+        return {"ETag": f'"etag-{PartNumber}"'}
+
+    def get_paginator(self, name):
+        fake = self
+
+        class Paginator:
+            def paginate(self, Bucket, Key, UploadId):
+                if UploadId not in fake.uploads:
+                    raise ClientError({"Error": {"Code": "NoSuchUpload"}}, "ListParts")
+                parts = [
+                    {"PartNumber": n, "ETag": f'"etag-{n}"', "Size": len(body), "ChecksumSHA256": checksum}
+                    for n, (body, checksum) in sorted(fake.uploads[UploadId].items())
+                ]
+                yield {"Parts": parts}
+
+        return Paginator()
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        stored = self.uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        assert numbers == sorted(stored)
+        self.objects[Key] = b"".join(stored[n][0] for n in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+
+
+def _video(tmp_path):
+    path = tmp_path / "video.mp4"
+    data = bytes(range(256)) * (MIN_PART_SIZE * 3 // 256 + 100)
+    path.write_bytes(data)
+    return path, data
+
+
+def test_multipart_upload_resumes_missing_parts_only(tmp_path):
+    path, data = _video(tmp_path)
+    client = FakeS3(fail_parts={2})
+    store = _store(FakeRedis())
+
+    with pytest.raises(ConnectionError):
+        MultipartUpload(client, "b", "k", str(path), part_size=MIN_PART_SIZE, concurrency=1, state_store=store).run()
+    assert len(store.redis_client.data) == 1
+
+    # Retry mit neuer temporärer Kopie: Status hängt am Inhalt, nicht am Pfad
+    copy = tmp_path / "retry" / "video.mp4"
+    copy.parent.mkdir()
+    copy.write_bytes(data)
+    stored = set(next(iter(client.uploads.values())))
+    assert 1 in stored and 2 not in stored
+    client.part_calls.clear()
+    MultipartUpload(client, "b", "k", str(copy), part_size=MIN_PART_SIZE, concurrency=4, state_store=store).run()
+    # Teile, die S3 schon hat, werden nicht erneut übertragen
+    assert sorted(client.part_calls) == sorted({1, 2, 3, 4} - stored)
+    assert client.objects["k"] == data
+    assert store.redis_client.data == {}
+
+
+def test_multipart_upload_aborts_without_durable_state(tmp_path):
+    path, _data = _video(tmp_path)
+    client = FakeS3(fail_parts={2})
+
+    with pytest.raises(ConnectionError):
+        MultipartUpload(client, "b", "k", str(path), part_size=MIN_PART_SIZE, concurrency=1, state_store=_store(None)).run()
+    assert client.uploads == {}
@@ -0,0 +1,63 @@
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app import models  # type: ignore
+from app.services import scheduler  # type: ignore
+
+
+def _plan(db, project, slot_date, **kwargs):
+    plan = models.Plan(
+        organization_id=project.organization_id,
+        project_id=project.id,
+        slot_date=slot_date,
+        slot_index=0,
+        approved=kwargs.pop("approved", True),
+        locked=kwargs.pop("locked", False),
+    )
+    db.add(plan)
+    db.flush()
+    return plan
+
+
+def test_due_plans_bulk_created_and_revived(db):
+    today = date(2026, 3, 1)
+    org = models.Organization(name="Org")
+    db.add(org)
+    db.flush()
+    project = models.Project(organization_id=org.id, name="P", autopilot_enabled=True)
+    db.add(project)
+    db.flush()
+
+    due = _plan(db, project, today)
+    failed_before = _plan(db, project, today + timedelta(days=1))
+    running = _plan(db, project, today)
+    with_asset = _plan(db, project, today)
+    _plan(db, project, today + timedelta(days=3))
+    _plan(db, project, today, approved=False)
+    _plan(db, project, today, locked=True)
+
+    db.add(models.VideoAsset(organization_id=org.id, plan_id=with_asset.id, video_path="v", thumbnail_path="t"))
+    db.add(models.Job(organization_id=org.id, type="generate_assets", status="in_progress", idempotency_key=f"gen:{running.id}"))
+    old_job = models.Job(organization_id=org.id, type="generate_assets", status="failed", idempotency_key=f"gen:{failed_before.id}")
+    db.add(old_job)
+    db.commit()
+
+    found = scheduler.find_due_plans(db, today=today)
+    assert {plan_id for plan_id, _project, _org in found} == {due.id, failed_before.id}
+
+    created = scheduler.create_generation_jobs(db, found)
+    db.commit()
+    assert {plan_id for _job, _project, plan_id in created} == {due.id, failed_before.id}
+    # Bestehender fehlgeschlagener Job wurde wiederbelebt statt dupliziert
+    db.refresh(old_job)
+    assert old_job.status == "pending"
+    assert db.query(models.Job).filter(models.Job.idempotency_key == f"gen:{failed_before.id}").count() == 1
+
+    # Zweiter Lauf findet nichts mehr
+    assert scheduler.find_due_plans(db, today=today) == []
+    # Aktive Jobs werden auch bei erneutem Insert nicht angefasst
+    assert scheduler.create_generation_jobs(db, [(running.id, project.id, org.id)]) == []
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+from cryptography.fernet import Fernet
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app import models, security  # type: ignore
+from app.config import get_settings  # type: ignore
+from app.services.credential_secrets import CredentialSecretCache, rotate_encrypted_secrets  # type: ignore
+
+
+def test_rotation_bulk_decrypt_and_credential_cache(monkeypatch):
+    old_key, new_key = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+    assert security.get_fernet(new_key) is security.get_fernet(new_key)
+    token = security.encrypt_secret("sk-live", old_key)
+
+    # Nach dem Schlüsselwechsel bleibt der alte Ciphertext lesbar und lässt sich rotieren
+    monkeypatch.setattr(get_settings(), "fernet_previous_secrets", old_key)
+    assert security.decrypt_secret(token, new_key) == "sk-live"
+    rotated = security.rotate_secret(token, new_key)
+    monkeypatch.setattr(get_settings(), "fernet_previous_secrets", "")
+    assert security.decrypt_secret(rotated, new_key) == "sk-live"
+    assert security.decrypt_secret(token, new_key) is None
+    assert security.decrypt_many([rotated, None, rotated, "kaputt"], new_key) == ["sk-live", None, "sk-live", None]
+
+    monkeypatch.setattr(get_settings(), "fernet_secret", new_key)
+    cache = CredentialSecretCache(ttl=60)
+    credential = models.Credential(id="cred-1", version=1, encrypted_secret=rotated)
+    assert cache.resolve(credential) == "sk-live"
+    # Neuer Ciphertext bei gleicher Version ist ein Miss
+    credential.encrypted_secret = security.encrypt_secret("sk-next", new_key)
+    assert cache.resolve(credential) == "sk-next"
+
+
+def test_rotation_counts_only_rewritten_rows(db, monkeypatch):
+    old_key, new_key = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+    org = models.Organization(name="Org")
+    db.add(org)
+    db.flush()
+    stale = models.Credential(organization_id=org.id, provider="p", name="alt", encrypted_secret=security.encrypt_secret("a", old_key))
+    current = models.Credential(organization_id=org.id, provider="p", name="neu", encrypted_secret=security.encrypt_secret("b", new_key))
+    unreadable = models.Credential(organization_id=org.id, provider="p", name="kaputt", encrypted_secret="kaputt")
+    db.add_all([stale, current, unreadable])
+    db.commit()
+    untouched = current.encrypted_secret
+
+    monkeypatch.setattr(get_settings(), "fernet_secret", new_key)
+    monkeypatch.setattr(get_settings(), "fernet_previous_secrets", old_key)
+    assert rotate_encrypted_secrets(db) == 1
+    assert current.encrypted_secret == untouched
+    assert security.uses_current_key(stale.encrypted_secret, new_key)
+    assert rotate_encrypted_secrets(db) == 0
@@ -0,0 +1,255 @@
+import fnmatch
+from contextlib import contextmanager
+import sys
+from pathlib import Path
+
+import pytest
+import redis
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app import models  # type: ignore
+from app.services import usage  # type: ignore
+from app.services.usage_counters import UsageCounters  # type: ignore
+from app.services.usage_writer import FLUSH_LOCK_KEY, UsageLedgerWriter  # type: ignore
+
+
+class FakeRedis:
+    """Minimaler Redis-Ersatz für die von UsageCounters genutzten Befehle."""
+
+    def __init__(self):
+        self.data = {}
+        self.mget_calls = 0
+        self.markers = set()
+        self.locks = set()
+
+    def eval(self, script, numkeys, *args):
+        keys, argv = args[:numkeys], args[numkeys:]
+        if numkeys > 1:
+            if keys[1] in self.markers:
+                return None
+            self.markers.add(keys[1])
+        if keys[0] in self.data:
+            self.data[keys[0]] += int(argv[0])
+            return self.data[keys[0]]
+        return None
+
+    @contextmanager
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        assert name not in self.locks
+        self.locks.add(name)
+        try:
+            yield
+        finally:
+            self.locks.discard(name)
+
+    def scan_iter(self, match, count=None):
+        return [key for key in self.data if fnmatch.fnmatchcase(key, match)]
+
+    def mget(self, keys):
+        self.mget_calls += 1
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = int(value)
+        return True
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def execute(self):
+        return []
+
+
+def test_counters_seed_increment_and_reconcile(db, monkeypatch):
+    counters = UsageCounters()
+    counters.redis_client = FakeRedis()
+    writer = UsageLedgerWriter(flush_interval=3600)
+    writer.redis_client = None
+    monkeypatch.setattr(usage, "get_usage_counters", lambda: counters)
+    monkeypatch.setattr(usage, "get_usage_writer", lambda: writer)
+
+    org = models.Organization(name="Org")
+    db.add(org)
+    db.commit()
+    usage.log_usage(db, org.id, "video_generation", 2)
+    writer.flush_memory(db)
+
+    # Kalter Zähler wird aus dem Ledger befüllt, danach nur noch aus Redis gelesen
+    assert counters.totals(db, org.id, ["video_generation", "publish_now"]) == {"video_generation": 2, "publish_now": 0}
+    usage.log_usage(db, org.id, "video_generation", 3)
+    writer.flush_memory(db)
+    db.query(models.UsageLedger).delete()
+    db.commit()
+    assert counters.totals(db, org.id, ["video_generation"]) == {"video_generation": 5}
+    with pytest.raises(usage.QuotaExceeded):
+        usage.enforce_quotas(db, org.id, {"publish_now": 10, "video_generation": 5})
+
+    # Reconcile korrigiert Drift gegen den Ledger
+    db.add(models.UsageLedger(organization_id=org.id, metric="video_generation", amount=1))
+    db.commit()
+    counters.reconcile(db)
+    assert counters.totals(db, org.id, ["video_generation"]) == {"video_generation": 1}
+
+    # INCRBY zwischen Snapshot und Abgleich geht nicht verloren
+    db.add(models.UsageLedger(organization_id=org.id, metric="video_generation", amount=4))
+    db.commit()
+    original_query = db.query
+
+    def query_with_concurrent_increment(*args):
+        # Ledger-Query unter dem Flush-Lock: dazwischen kann kein Event geschrieben werden
+        assert FLUSH_LOCK_KEY in counters.redis_client.locks
+        counters.increment(org.id, "video_generation", 7)
+        db.query = original_query
+        return original_query(*args)
+
+    db.query = query_with_concurrent_increment
+    counters.reconcile(db)
+    assert counters.totals(db, org.id, ["video_generation"]) == {"video_generation": 12}
+
+
+def test_buffered_writer_dedups_and_batches(db):
+    writer = UsageLedgerWriter(flush_interval=3600)
+    writer.redis_client = None
+    org = models.Organization(name="Org")
+    db.add(org)
+    db.commit()
+
+    writer.record(org.id, "publish_now", 1, dedup_key="pub-1")
+    writer.record(org.id, "publish_now", 1, dedup_key="pub-1")
+    writer.record(org.id, "storage_mb", 40)
+    assert writer.pending_totals(org.id, ["publish_now", "storage_mb"]) == {"publish_now": 2, "storage_mb": 40}
+    assert db.query(models.UsageLedger).count() == 0
+
+    assert writer.flush_memory(db) == 3
+    # Erneute Zustellung desselben Events (at-least-once) erzeugt keine zweite Zeile
+    writer.record(org.id, "publish_now", 1, dedup_key="pub-1")
+    writer.flush_memory(db)
+    assert db.query(models.UsageLedger).count() == 2
+    assert writer.pending_totals(org.id, ["publish_now"]) == {}
+
+    # Monats-Rollup zählt jedes Event genau einmal
+    monthly = {row.metric: row.amount for row in db.query(models.UsageMonthly).all()}
+    assert monthly == {"publish_now": 1, "storage_mb": 40}
+
+
+def test_usage_snapshot_etag(db, monkeypatch):
+    from starlette.requests import Request
+    from fastapi import Response
+    from app.routers import usage as usage_router  # type: ignore
+
+    monkeypatch.setattr(usage_router, "assert_org_member", lambda *args: None)
+    writer = UsageLedgerWriter(flush_interval=3600)
+    writer.redis_client = None
+    org = models.Organization(name="Org")
+    db.add(org)
+    db.commit()
+    writer.record(org.id, "storage_mb", 40)
+    writer.record(org.id, "storage_mb", 2)
+    writer.flush_memory(db)
+
+    response = Response()
+    body = usage_router.usage_snapshot(org.id, Request({"type": "http", "headers": []}), response, db=db, user=None)
+    assert body["usage"] == {"storage_mb": 42, "concurrent_jobs": 0}
+    etag = response.headers["etag"]
+    cached = usage_router.usage_snapshot(
+        org.id, Request({"type": "http", "headers": [(b"if-none-match", etag.encode())]}), Response(), db=db, user=None
+    )
+    assert cached.status_code == 304
+
+
+def test_reconcile_keeps_counters_with_unwritten_events(db, monkeypatch):
+    counters = UsageCounters()
+    counters.redis_client = FakeRedis()
+    writer = UsageLedgerWriter(flush_interval=3600)
+    writer.redis_client = None
+    monkeypatch.setattr(usage, "get_usage_counters", lambda: counters)
+    monkeypatch.setattr(usage, "get_usage_writer", lambda: writer)
+
+    org = models.Organization(name="Org")
+    db.add(org)
+    db.commit()
+    usage.log_usage(db, org.id, "video_generation", 2)
+    writer.flush_memory(db)
+    assert counters.totals(db, org.id, ["video_generation"]) == {"video_generation": 2}
+
+    # Event liegt noch im Puffer: Zähler ist dem Ledger voraus und darf nicht zurückgesetzt werden
+    usage.log_usage(db, org.id, "video_generation", 3)
+    assert counters.reconcile(db, pending=writer.pending_keys) == 0
+    assert counters.totals(db, org.id, ["video_generation"]) == {"video_generation": 5}
+
+    writer.flush_memory(db)
+    assert writer.pending_keys() == set()
+    assert counters.reconcile(db, pending=writer.pending_keys) == 0
+    assert counters.totals(db, org.id, ["video_generation"]) == {"video_generation": 5}
+
+
+def test_retried_log_usage_counts_once(db, monkeypatch):
+    counters = UsageCounters()
+    counters.redis_client = FakeRedis()
+    writer = UsageLedgerWriter(flush_interval=3600)
+    writer.redis_client = None
+    monkeypatch.setattr(usage, "get_usage_counters", lambda: counters)
+    monkeypatch.setattr(usage, "get_usage_writer", lambda: writer)
+
+    org = models.Organization(name="Org")
+    db.add(org)
+    db.commit()
+    assert counters.totals(db, org.id, ["publish_now"]) == {"publish_now": 0}
+    # Retry desselben Publish: Ledger dedupliziert, der Zähler ebenfalls
+    usage.log_usage(db, org.id, "publish_now", 1, dedup_key="publish:asset-1")
+    usage.log_usage(db, org.id, "publish_now", 1, dedup_key="publish:asset-1")
+    writer.flush_memory(db)
+    assert db.query(models.UsageLedger).count() == 1
+    assert counters.totals(db, org.id, ["publish_now"]) == {"publish_now": 1}
+    assert counters.reconcile(db, pending=writer.pending_keys) == 0
+
+
+class FakeStream:
+    """Redis-Stream mit Consumer-Group: liefert Batches und merkt sich, was unbestätigt ist."""
+
+    def __init__(self, events):
+        self.entries = [(f"{i}-0", event) for i, event in enumerate(events, start=1)]
+        self.unacked = set()
+        self.max_unacked = 0
+
+    def xautoclaim(self, *args, **kwargs):
+        raise redis.ResponseError("unknown command")
+
+    def xreadgroup(self, group, consumer, streams, count):
+        batch = [entry for entry in self.entries if entry[0] not in self.unacked][:count]
+        self.unacked.update(message_id for message_id, _fields in batch)
+        self.max_unacked = max(self.max_unacked, len(self.unacked))
+        return [("usage:ledger", batch)] if batch else []
+
+    def xack(self, stream, group, *ids):
+        self.unacked.difference_update(ids)
+
+    def xdel(self, stream, *ids):
+        self.entries = [entry for entry in self.entries if entry[0] not in ids]
+
+    @contextmanager
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        yield
+
+
+def test_flush_stream_writes_and_acks_batch_by_batch(db):
+    org = models.Organization(name="Org")
+    db.add(org)
+    db.commit()
+    events = [
+        {"organization_id": org.id, "metric": "video_generation", "amount": "1", "dedup_key": f"k{i}", "created_at": "2026-10-01T00:00:00"}
+        for i in range(7)
+    ]
+    writer = UsageLedgerWriter(batch_size=2, flush_interval=3600)
+    writer.redis_client = FakeStream(events)
+
+    assert writer.flush_stream(db, max_batches=3) == 6
+    # Nie mehr als ein Batch gleichzeitig unbestätigt, Rest bleibt für den nächsten Lauf
+    assert writer.redis_client.max_unacked == 2
+    assert len(writer.redis_client.entries) == 1
+    assert writer.flush_stream(db, max_batches=3) == 1
+    assert db.query(models.UsageLedger).count() == 7
@@ -153,6 +153,15 @@ api.interceptors.response.use(
   }
 );
 
+// Aktualisierte Jobs ersetzen bekannte, neue kommen dazu; bereits nachgeladene ältere Seiten bleiben erhalten
+const mergeJobs = (prev: Job[], fresh: Job[]): Job[] => {
+  const byId = new Map(prev.map((job) => [job.id, job]));
+  for (const job of fresh) byId.set(job.id, job);
+  return Array.from(byId.values()).sort(
+    (a, b) => new Date(b.created_at).getTime() - new Date(a.created_at).getTime() || b.id.localeCompare(a.id)
+  );
+};
+
 function App() {
   const [email, setEmail] = useState(localStorage.getItem("last_email") || "demo@codex.dev");
   const [password, setPassword] = useState("");
@@ -163,9 +172,11 @@ function App() {
   const [projects, setProjects] = useState<Project[]>([]);
   const [projectId, setProjectId] = useState(localStorage.getItem("last_project_id") || "");
   const [calendar, setCalendar] = useState<CalendarSlot[]>([]);
+  const [calendarCursor, setCalendarCursor] = useState<string | null>(null);
   const [metrics, setMetrics] = useState<Metric[]>([]);
   const [credentials, setCredentials] = useState<Credential[]>([]);
   const [jobs, setJobs] = useState<Job[]>([]);
+  const [jobsCursor, setJobsCursor] = useState<string | null>(null);
   const [jobStatusPolling, setJobStatusPolling] = useState<boolean>(false);
   const [queueFilter, setQueueFilter] = useState<"all" | "processing" | "queued" | "completed" | "failed">("all");
   const [libraryFilter, setLibraryFilter] = useState<"all" | "generated" | "transcribed" | "translated" | "published">("all");
@@ -179,6 +190,7 @@ function App() {
   const [voiceCloningModels, setVoiceCloningModels] = useState<Array<{id: string; name: string; provider: string; description?: string; cost_per_minute?: number; supported_languages?: string[]}>>([]);
   const [loadingVoiceModels, setLoadingVoiceModels] = useState<boolean>(false);
   const [assets, setAssets] = useState<VideoAsset[]>([]);
+  const [assetsCursor, setAssetsCursor] = useState<string | null>(null);
   const [usage, setUsage] = useState<UsageSnapshot>({});
   const [status, setStatus] = useState<string>("");
   const [activeView, setActiveView] = useState<
@@ -375,13 +387,52 @@ function App() {
     }
   };
 
+  const loadMoreAssets = async () => {
+    if (!projectId || !assetsCursor) return;
+    const resp = await api.get(`/video/assets/project/${projectId}`, { headers, params: { cursor: assetsCursor } });
+    setAssets((prev) => [...prev, ...(resp.data || [])]);
+    setAssetsCursor(resp.headers["x-next-cursor"] || null);
+  };
+
+  // Kalender kommt in Tagesfenstern; Start ist der aktuelle Monat, spätere Fenster per "Weitere Tage laden"
+  const currentMonthStart = () => {
+    const now = new Date();
+    return `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, "0")}-01`;
+  };
+
+  const loadMoreCalendar = async () => {
+    if (!projectId || !calendarCursor) return;
+    const resp = await api.get(`/plans/calendar/${projectId}`, { headers, params: { cursor: calendarCursor } });
+    setCalendar((prev) => [...prev, ...(resp.data || [])]);
+    setCalendarCursor(resp.headers["x-next-cursor"] || null);
+  };
+
+  const loadMoreJobs = async () => {
+    if (!projectId || !jobsCursor) return;
+    const resp = await api.get(`/jobs/${projectId}`, { headers, params: { cursor: jobsCursor } });
+    setJobs((prev) => mergeJobs(prev, resp.data.jobs || []));
+    setJobsCursor(resp.data.next_cursor || null);
+  };
+
+  // Alle laufenden Jobs (über alle Seiten), auch wenn sie älter als die erste Seite sind
+  const loadActiveJobs = async (pid: string): Promise<Job[]> => {
+    const active: Job[] = [];
+    let cursor: string | null = null;
+    do {
+      const resp = await api.get(`/jobs/${pid}`, { headers, params: { active: true, ...(cursor ? { cursor } : {}) } });
+      active.push(...(resp.data.jobs || []));
+      cursor = resp.data.next_cursor || null;
+    } while (cursor);
+    return active;
+  };
+
   const refreshData = async (pid: string, oid: string, authToken?: string) => {
     if (!pid || !oid) return;
     try {
       const tokenToUse = authToken || token;
       const authHeaders = tokenToUse ? { Authorization: `Bearer ${tokenToUse}` } : {};
     const [cal, metricsResp, creds, jobsResp, assetsResp, usageResp] = await Promise.all([
-        api.get(`/plans/calendar/${pid}`, { headers: authHeaders }),
+        api.get(`/plans/calendar/${pid}`, { headers: authHeaders, params: { cursor: currentMonthStart() } }),
         api.get(`/analytics/metrics/${pid}`, { headers: authHeaders }),
         api.get(`/credentials/${oid}`, { headers: authHeaders }),
         api.get(`/jobs/${pid}`, { headers: authHeaders }),
@@ -400,6 +451,7 @@ function App() {
         .sort((a, b) => a.dateObj.getTime() - b.dateObj.getTime());
       
       setCalendar(sortedCalendar);
+      setCalendarCursor(cal.headers["x-next-cursor"] || null);
     setMetrics(metricsResp.data.metrics || []);
       
       // FIX: Scrolle automatisch zu heute nach dem Laden
@@ -413,7 +465,9 @@ function App() {
       }, 100);
     setCredentials(creds.data);
     setJobs(jobsResp.data.jobs || []);
+    setJobsCursor(jobsResp.data.next_cursor || null);
     setAssets(assetsResp.data || []);
+    setAssetsCursor(assetsResp.headers["x-next-cursor"] || null);
     setUsage(usageResp.data.usage || {});
     const proj = projects.find((p) => p.id === pid);
     if (proj && typeof proj.autopilot_enabled !== "undefined") {
@@ -486,14 +540,14 @@ function App() {
     
     const interval = setInterval(async () => {
       try {
-        const jobsResp = await api.get(`/jobs/${projectId}`, { headers });
-        const currentJobs = jobsResp.data.jobs || [];
-        setJobs(currentJobs);
+        // Neueste Seite plus alle laufenden Jobs: ältere, noch laufende Jobs fallen nicht heraus
+        const [jobsResp, activeJobs] = await Promise.all([
+          api.get(`/jobs/${projectId}`, { headers }),
+          loadActiveJobs(projectId),
+        ]);
+        setJobs((prev) => mergeJobs(prev, [...(jobsResp.data.jobs || []), ...activeJobs]));
         
         // Prüfe ob alle Jobs abgeschlossen sind
-        const activeJobs = currentJobs.filter((j: Job) => 
-          j.status === "pending" || j.status === "in_progress"
-        );
         if (activeJobs.length === 0) {
           stopJobStatusPolling();
           // Lade auch Assets neu
@@ -612,8 +666,14 @@ function App() {
   const generateAllVideos = async () => {
     if (!projectId) return;
     try {
-      const resp = await api.get(`/plans/calendar/${projectId}`, { headers });
-      const calendarSlots = resp.data;
+      // Alle Fenster ab dem ersten Plan, nicht nur die geladenen
+      const calendarSlots: CalendarSlot[] = [];
+      let cursor: string | null = null;
+      do {
+        const resp = await api.get(`/plans/calendar/${projectId}`, { headers, params: cursor ? { cursor } : {} });
+        calendarSlots.push(...(resp.data || []));
+        cursor = resp.headers["x-next-cursor"] || null;
+      } while (cursor);
       let count = 0;
       for (const slot of calendarSlots) {
         for (const plan of slot.slots) {
@@ -929,7 +989,7 @@ function App() {
       if (projectId) {
         try {
           const jobsResp = await api.get(`/jobs/${projectId}`, { headers });
-          setJobs(jobsResp.data.jobs || []);
+          setJobs((prev) => mergeJobs(prev, jobsResp.data.jobs || []));
           // Starte Polling, falls noch nicht aktiv
           if (!jobStatusPolling) {
             startJobStatusPolling();
@@ -986,7 +1046,7 @@ function App() {
       if (projectId) {
         try {
           const jobsResp = await api.get(`/jobs/${projectId}`, { headers });
-          setJobs(jobsResp.data.jobs || []);
+          setJobs((prev) => mergeJobs(prev, jobsResp.data.jobs || []));
           // Starte Polling, falls noch nicht aktiv
           if (!jobStatusPolling) {
             startJobStatusPolling();
@@ -1446,6 +1506,11 @@ function App() {
                     >
                       Alle Videos erstellen
                     </button>
+                    {calendarCursor && (
+                      <button onClick={loadMoreCalendar} className="px-3 py-1 bg-slate-700 rounded text-sm">
+                        Weitere Tage laden
+                      </button>
+                    )}
                       </>
                   )}
                 </div>
@@ -1847,6 +1912,11 @@ function App() {
               <button className="px-3 py-1 bg-slate-700 rounded text-sm" onClick={() => refreshData(projectId, orgId)}>
                 Reload
               </button>
+              {assetsCursor && (
+                <button className="px-3 py-1 bg-slate-700 rounded text-sm" onClick={loadMoreAssets}>
+                  Mehr laden
+                </button>
+              )}
             </div>
           </div>
           
@@ -1918,18 +1988,26 @@ function App() {
                         className="px-3 py-1.5 bg-emerald-600 rounded hover:bg-emerald-700 transition-colors" 
                         onClick={async () => {
                           try {
-                            const resp = await api.get(`/video/download/${asset.id}`, {
-                              responseType: 'blob',
-                              headers
-                            });
-                            const url = window.URL.createObjectURL(new Blob([resp.data]));
+                            // Direkt-Link (S3 presigned): Browser lädt ohne Umweg über die API
+                            const linkResp = await api.get(`/video/download/${asset.id}/link`, { headers });
+                            const directUrl = linkResp.data?.url;
                             const link = document.createElement('a');
-                            link.href = url;
+                            let url: string | null = null;
+                            if (directUrl) {
+                              link.href = directUrl;
+                            } else {
+                              const resp = await api.get(`/video/download/${asset.id}`, {
+                                responseType: 'blob',
+                                headers
+                              });
+                              url = window.URL.createObjectURL(new Blob([resp.data]));
+                              link.href = url;
+                            }
                             link.download = `video-${asset.id}.mp4`;
                             document.body.appendChild(link);
                             link.click();
                             document.body.removeChild(link);
-                            window.URL.revokeObjectURL(url);
+                            if (url) window.URL.revokeObjectURL(url);
                             setStatus("Video wird heruntergeladen...");
                           } catch (e: any) {
                             console.error("Download error:", e);
@@ -2107,6 +2185,14 @@ function App() {
                 >
                   Aktualisieren
                 </button>
+                {jobsCursor && (
+                  <button
+                    onClick={loadMoreJobs}
+                    className="px-3 py-1.5 bg-slate-800 hover:bg-slate-700 rounded text-sm transition-colors"
+                  >
+                    Ältere Jobs laden
+                  </button>
+                )}
                 {jobStatusPolling && (
                   <button
                     onClick={stopJobStatusPolling}
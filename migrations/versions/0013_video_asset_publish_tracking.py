@@ -0,0 +1,53 @@
+"""add publish tracking schedule to video_assets
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('video_assets', sa.Column('published_at', sa.DateTime(), nullable=True))
+    op.add_column('video_assets', sa.Column('next_poll_at', sa.DateTime(), nullable=True))
+    op.add_column('video_assets', sa.Column('last_polled_at', sa.DateTime(), nullable=True))
+    op.add_column('video_assets', sa.Column('poll_attempts', sa.Integer(), nullable=False, server_default='0'))
+    # Partieller Index: nur Assets, die noch getrackt werden
+    op.create_index(
+        'ix_video_assets_next_poll_at',
+        'video_assets',
+        ['next_poll_at'],
+        postgresql_where=sa.text('next_poll_at IS NOT NULL'),
+    )
+
+    # Bestehende Assets aus dem bisherigen Poll-Set übernehmen: jüngere werden sofort
+    # einmal gepollt und danach nach Zeitplan, ältere (> 14 Tage) nicht mehr.
+    connection = op.get_bind()
+    connection.execute(sa.text("""
+        UPDATE video_assets
+        SET published_at = created_at
+        WHERE status IN ('published', 'pending', 'processing')
+    """))
+    connection.execute(sa.text("""
+        UPDATE video_assets
+        SET next_poll_at = CURRENT_TIMESTAMP
+        WHERE status IN ('published', 'pending', 'processing')
+        AND created_at > CURRENT_TIMESTAMP - INTERVAL '14 days'
+    """))
+
+
+def downgrade():
+    op.drop_index('ix_video_assets_next_poll_at', table_name='video_assets')
+    op.drop_column('video_assets', 'poll_attempts')
+    op.drop_column('video_assets', 'last_polled_at')
+    op.drop_column('video_assets', 'next_poll_at')
+    op.drop_column('video_assets', 'published_at')
@@ -0,0 +1,105 @@
+"""store tiktok ids and publish status in dedicated columns
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+import ast
+import json
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def _parse(raw):
+    """
+    Returns: (Daten, strukturiert). Alte Einträge sind teils JSON, teils str(dict) (Python-Repr);
+    bei allem anderen wird nur die video_id per Regex gesucht (strukturiert=False, Rohtext bleibt).
+    """
+    try:
+        parsed = json.loads(raw)
+    except json.JSONDecodeError:
+        try:
+            parsed = ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            match = re.search(r"""["']video_id["']\s*:\s*["']([^"']+)["']""", raw)
+            return ({"video_id": match.group(1)}, False) if match else (None, False)
+    return (parsed, True) if isinstance(parsed, dict) else (None, False)
+
+
+def upgrade():
+    op.add_column('video_assets', sa.Column('tiktok_video_id', sa.String(255), nullable=True))
+    op.add_column('video_assets', sa.Column('tiktok_publish_id', sa.String(255), nullable=True))
+    op.add_column('video_assets', sa.Column('publish_status', sa.String(50), nullable=True))
+    op.create_index('ix_video_assets_tiktok_video_id', 'video_assets', ['tiktok_video_id'])
+    op.create_index('ix_video_assets_tiktok_publish_id', 'video_assets', ['tiktok_publish_id'])
+    op.create_index('ix_video_assets_publish_status', 'video_assets', ['publish_status'])
+
+    # Backfill: IDs/Status extrahieren; parsebare Roh-Antworten als JSON neu schreiben, sonst unverändert lassen
+    connection = op.get_bind()
+    video_assets = sa.table(
+        'video_assets',
+        sa.column('id', sa.String),
+        sa.column('publish_response', sa.Text),
+        sa.column('tiktok_video_id', sa.String),
+        sa.column('tiktok_publish_id', sa.String),
+        sa.column('publish_status', sa.String),
+    )
+    last_id = ''
+    while True:
+        rows = connection.execute(
+            sa.select(video_assets.c.id, video_assets.c.publish_response)
+            .where(video_assets.c.publish_response.isnot(None), video_assets.c.id > last_id)
+            .order_by(video_assets.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = []
+        for row in rows:
+            parsed, structured = _parse(row.publish_response)
+            if parsed is None:
+                continue
+            data = parsed.get('data') if isinstance(parsed.get('data'), dict) else {}
+            video_id = data.get('video_id') or parsed.get('video_id')
+            publish_id = data.get('publish_id') or parsed.get('publish_id')
+            updates.append({
+                'b_id': row.id,
+                'publish_response': json.dumps(parsed, default=str) if structured else row.publish_response,
+                'tiktok_video_id': str(video_id) if video_id else None,
+                'tiktok_publish_id': str(publish_id) if publish_id else None,
+                'publish_status': data.get('status'),
+            })
+        if updates:
+            connection.execute(
+                video_assets.update()
+                .where(video_assets.c.id == sa.bindparam('b_id'))
+                .values(
+                    publish_response=sa.bindparam('publish_response'),
+                    tiktok_video_id=sa.bindparam('tiktok_video_id'),
+                    tiktok_publish_id=sa.bindparam('tiktok_publish_id'),
+                    publish_status=sa.bindparam('publish_status'),
+                ),
+                updates,
+            )
+
+
+def downgrade():
+    op.drop_index('ix_video_assets_publish_status', table_name='video_assets')
+    op.drop_index('ix_video_assets_tiktok_publish_id', table_name='video_assets')
+    op.drop_index('ix_video_assets_tiktok_video_id', table_name='video_assets')
+    op.drop_column('video_assets', 'publish_status')
+    op.drop_column('video_assets', 'tiktok_publish_id')
+    op.drop_column('video_assets', 'tiktok_video_id')
@@ -0,0 +1,57 @@
+"""metric snapshots and rollups
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'metric_snapshots',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('organization_id', sa.String(36), sa.ForeignKey('organizations.id'), nullable=False),
+        sa.Column('project_id', sa.String(36), sa.ForeignKey('projects.id'), nullable=False),
+        sa.Column('plan_id', sa.String(36), sa.ForeignKey('plans.id'), nullable=True),
+        sa.Column('asset_id', sa.String(36), sa.ForeignKey('video_assets.id'), nullable=True),
+        sa.Column('tiktok_video_id', sa.String(255), nullable=False),
+        sa.Column('open_id', sa.String(255), nullable=True),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('views', sa.BigInteger(), nullable=True),
+        sa.Column('likes', sa.BigInteger(), nullable=True),
+        sa.Column('comments', sa.BigInteger(), nullable=True),
+        sa.Column('shares', sa.BigInteger(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('project_id', 'tiktok_video_id', 'bucket_start', name='uq_metric_snapshots_video_bucket'),
+    )
+    op.create_index('ix_metric_snapshots_bucket', 'metric_snapshots', ['bucket_start'])
+
+    op.create_table(
+        'metric_rollups',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('organization_id', sa.String(36), sa.ForeignKey('organizations.id'), nullable=False),
+        sa.Column('project_id', sa.String(36), sa.ForeignKey('projects.id'), nullable=False),
+        sa.Column('plan_id', sa.String(36), sa.ForeignKey('plans.id'), nullable=True),
+        sa.Column('granularity', sa.String(10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('metric', sa.String(100), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=True),
+    )
+    op.create_index('ix_metric_rollups_project_bucket', 'metric_rollups', ['project_id', 'granularity', 'bucket_start'])
+
+
+def downgrade():
+    op.drop_index('ix_metric_rollups_project_bucket', table_name='metric_rollups')
+    op.drop_table('metric_rollups')
+    op.drop_index('ix_metric_snapshots_bucket', table_name='metric_snapshots')
+    op.drop_table('metric_snapshots')
@@ -0,0 +1,26 @@
+"""add dedup_key to usage_ledger for buffered writes
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0016'
+down_revision = '0015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('usage_ledger', sa.Column('dedup_key', sa.String(64), nullable=True))
+    op.create_unique_constraint('uq_usage_ledger_dedup_key', 'usage_ledger', ['dedup_key'])
+
+
+def downgrade():
+    op.drop_constraint('uq_usage_ledger_dedup_key', 'usage_ledger', type_='unique')
+    op.drop_column('usage_ledger', 'dedup_key')
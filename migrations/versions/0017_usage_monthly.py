@@ -0,0 +1,41 @@
+"""usage_monthly rollup table
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0017'
+down_revision = '0016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'usage_monthly',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('organization_id', sa.String(36), sa.ForeignKey('organizations.id'), nullable=False),
+        sa.Column('metric', sa.String(100), nullable=False),
+        sa.Column('period', sa.Date(), nullable=False),
+        sa.Column('amount', sa.BigInteger(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('organization_id', 'metric', 'period', name='uq_usage_monthly_org_metric_period'),
+    )
+    # Backfill aus dem bestehenden Ledger
+    op.execute("""
+        INSERT INTO usage_monthly (id, organization_id, metric, period, amount, updated_at)
+        SELECT gen_random_uuid()::text, organization_id, metric, date_trunc('month', created_at)::date,
+               SUM(amount), now()
+        FROM usage_ledger
+        GROUP BY organization_id, metric, date_trunc('month', created_at)::date
+    """)
+
+
+def downgrade():
+    op.drop_table('usage_monthly')
@@ -0,0 +1,60 @@
+"""secondary indexes for hot query paths
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0018'
+down_revision = '0017'
+branch_labels = None
+depends_on = None
+
+# (Name, Tabelle, Spalten, Partial-Bedingung); Gegenstück in models.py __table_args__
+INDEXES = [
+    ('ix_users_verification_token', 'users', ['verification_token'], 'verification_token IS NOT NULL'),
+    ('ix_memberships_organization_id', 'memberships', ['organization_id'], None),
+    ('ix_projects_organization_id', 'projects', ['organization_id'], None),
+    ('ix_plans_project_slot', 'plans', ['project_id', 'slot_date', 'slot_index'], None),
+    ('ix_plans_due_slot_date', 'plans', ['slot_date'], 'approved IS true AND locked IS false'),
+    ('ix_usage_ledger_org_metric_created', 'usage_ledger', ['organization_id', 'metric', 'created_at'], None),
+    ('ix_usage_ledger_created_at', 'usage_ledger', ['created_at'], None),
+    ('ix_credentials_org_provider', 'credentials', ['organization_id', 'provider'], None),
+    ('ix_video_assets_plan_id', 'video_assets', ['plan_id'], None),
+    ('ix_video_assets_project_created', 'video_assets', ['project_id', 'created_at', 'id'], None),
+    ('ix_video_assets_org_created', 'video_assets', ['organization_id', 'created_at', 'id'], 'project_id IS NULL'),
+    ('ix_jobs_org_status', 'jobs', ['organization_id', 'status'], None),
+    ('ix_jobs_project_created', 'jobs', ['project_id', 'created_at', 'id'], None),
+    ('ix_jobs_org_created', 'jobs', ['organization_id', 'created_at', 'id'], 'project_id IS NULL'),
+    ('ix_job_runs_job_created', 'job_runs', ['job_id', 'created_at'], None),
+    ('ix_social_accounts_org_platform', 'social_accounts', ['organization_id', 'platform'], None),
+    ('ix_oauth_tokens_social_account_id', 'oauth_tokens', ['social_account_id'], None),
+    ('ix_sessions_refresh_token_hash', 'sessions', ['refresh_token_hash'], None),
+    ('ix_sessions_user_id', 'sessions', ['user_id'], None),
+    ('ix_password_resets_token_hash', 'password_resets', ['token_hash'], None),
+]
+
+
+def upgrade():
+    # CONCURRENTLY: keine Schreibsperre auf großen Tabellen, muss außerhalb der Transaktion laufen
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _columns, _where in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
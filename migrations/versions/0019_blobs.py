@@ -0,0 +1,59 @@
+"""content-addressed blobs and blob references
+
+Revision ID: 0019
+Revises: 0018
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0019'
+down_revision = '0018'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'blobs',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('sha256', sa.String(64), nullable=False, unique=True),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('storage_uri', sa.String(500), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('orphaned_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        'ix_blobs_orphaned_at', 'blobs', ['orphaned_at'],
+        postgresql_where=sa.text('orphaned_at IS NOT NULL'),
+    )
+    op.create_table(
+        'blob_refs',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('blob_id', sa.String(36), sa.ForeignKey('blobs.id'), nullable=False),
+        sa.Column('organization_id', sa.String(36), sa.ForeignKey('organizations.id'), nullable=False),
+        sa.Column('owner_type', sa.String(50), nullable=False),
+        sa.Column('owner_id', sa.String(36), nullable=False),
+        sa.Column('role', sa.String(50), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_blob_refs_owner', 'blob_refs', ['owner_type', 'owner_id'])
+    op.create_index('ix_blob_refs_blob_id', 'blob_refs', ['blob_id'])
+    op.create_index('ix_blob_refs_org', 'blob_refs', ['organization_id'])
+    op.add_column('video_assets', sa.Column('video_blob_id', sa.String(36), sa.ForeignKey('blobs.id'), nullable=True))
+    op.add_column('video_assets', sa.Column('thumbnail_blob_id', sa.String(36), sa.ForeignKey('blobs.id'), nullable=True))
+
+
+def downgrade():
+    op.drop_column('video_assets', 'thumbnail_blob_id')
+    op.drop_column('video_assets', 'video_blob_id')
+    op.drop_index('ix_blob_refs_org', table_name='blob_refs')
+    op.drop_index('ix_blob_refs_blob_id', table_name='blob_refs')
+    op.drop_index('ix_blob_refs_owner', table_name='blob_refs')
+    op.drop_table('blob_refs')
+    op.drop_index('ix_blobs_orphaned_at', table_name='blobs')
+    op.drop_table('blobs')
@@ -0,0 +1,38 @@
+"""backfill and require created_at on jobs and video_assets
+
+Revision ID: 0020
+Revises: 0019
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0020'
+down_revision = '0019'
+branch_labels = None
+depends_on = None
+
+TABLES = ['jobs', 'video_assets']
+# Altbestand ohne Zeitstempel sortiert (wie früher mit datetime.min) ans Ende der Listen
+LEGACY_CREATED_AT = datetime(1970, 1, 1)
+
+
+def upgrade():
+    # Keyset-Pagination vergleicht (created_at, id): NULL-Zeilen wären nie erreichbar
+    for table in TABLES:
+        op.execute(
+            sa.text(f"UPDATE {table} SET created_at = :legacy WHERE created_at IS NULL").bindparams(
+                legacy=LEGACY_CREATED_AT
+            )
+        )
+        op.alter_column(table, 'created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for table in TABLES:
+        op.alter_column(table, 'created_at', existing_type=sa.DateTime(), nullable=True)
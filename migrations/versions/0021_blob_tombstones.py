@@ -0,0 +1,31 @@
+"""tombstones for storage objects of collected blobs
+
+Revision ID: 0021
+Revises: 0020
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0021'
+down_revision = '0020'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'blob_tombstones',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('storage_uri', sa.String(500), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_blob_tombstones_created_at', 'blob_tombstones', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_blob_tombstones_created_at', table_name='blob_tombstones')
+    op.drop_table('blob_tombstones')
@@ -0,0 +1,62 @@
+"""
+Micro-Benchmark: Durchsatz der Secret-Entschlüsselung.
+Vergleicht Fernet pro Aufruf neu bauen (altes Verhalten), gecachte Cipher, decrypt_many
+und den Credential-Cache. Aufruf: python scripts/bench_decrypt.py [anzahl]
+"""
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "backend"))
+
+from cryptography.fernet import Fernet  # noqa: E402
+
+from app import models  # type: ignore  # noqa: E402
+from app import security  # type: ignore  # noqa: E402
+from app.config import get_settings  # type: ignore  # noqa: E402
+from app.services.credential_secrets import CredentialSecretCache  # type: ignore  # noqa: E402
+
+
+def _bench(label: str, count: int, func) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {count / elapsed:>12,.0f} ops/s  ({elapsed * 1000:.1f} ms)")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    settings = get_settings()
+    key = settings.fernet_secret or Fernet.generate_key().decode()
+    settings.fernet_secret = key
+    # Realistisch: viele Assets teilen sich wenige Org-Tokens
+    tokens = [security.encrypt_secret(f"token-{i % 50}", key) for i in range(50)]
+    workload = [tokens[i % len(tokens)] for i in range(count)]
+
+    def uncached():
+        for token in workload:
+            security.get_fernet.__wrapped__(key).decrypt(token.encode())
+
+    def cached():
+        for token in workload:
+            security.decrypt_secret(token, key)
+
+    def bulk():
+        security.decrypt_many(workload, key)
+
+    cache = CredentialSecretCache(ttl=60)
+    credentials = [models.Credential(id=f"cred-{i}", version=1, encrypted_secret=token) for i, token in enumerate(tokens)]
+
+    def credential_cache():
+        for i in range(count):
+            cache.resolve(credentials[i % len(credentials)])
+
+    _bench("Fernet pro Aufruf", count, uncached)
+    _bench("gecachte Cipher", count, cached)
+    _bench("decrypt_many", count, bulk)
+    _bench("Credential-Cache", count, credential_cache)
+
+
+if __name__ == "__main__":
+    main()